@@ -0,0 +1,284 @@
+import math
+import re
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from chebyshev import Unresolved, chebyshev_roots
+from evaluation import EvaluationBudgetExceeded, Evaluations
+from expression_cache import expression_cache
+from history import History
+from metrics import PhaseTimer
+
+ITERATION_FIELDS = ("iteration", "c", "f(c)", "error")
+
+
+def bisection_method(
+    f: Callable[[float], float],
+    a: float,
+    b: float,
+    tolerance: float = 1e-6,
+    max_iterations: int = 100,
+) -> Tuple[float, int, float, History]:
+    fa = f(a)
+    if fa * f(b) >= 0:
+        raise ValueError("Function must have opposite signs at endpoints")
+
+    iteration = 0
+    history = History(ITERATION_FIELDS)
+    a_current, b_current = a, b
+
+    while iteration < max_iterations:
+        c = (a_current + b_current) / 2
+        try:
+            fc = f(c)
+        except EvaluationBudgetExceeded:
+            # Out of evaluations: report the midpoint of the current bracket
+            break
+        error = abs(b_current - a_current)
+
+        history.append((iteration + 1, c, fc, error))
+
+        if abs(fc) < tolerance or error < tolerance:
+            return c, iteration + 1, error, history
+
+        # f(a_current) is cached and only updated when a_current moves
+        if fa * fc < 0:
+            b_current = c
+        else:
+            a_current, fa = c, fc
+
+        iteration += 1
+
+    c = (a_current + b_current) / 2
+    error = abs(b_current - a_current)
+    return c, iteration, error, history
+
+
+def itp_method(
+    f: Callable[[float], float],
+    a: float,
+    b: float,
+    tolerance: float = 1e-6,
+    max_iterations: int = 100,
+    k2: float = 2.0,
+    n0: int = 1,
+) -> Tuple[float, int, float, History]:
+    """Interpolate-Truncate-Project (ITP) root finding on the bracket [a, b]
+
+    Each step starts from the regula falsi point, truncates it towards the
+    midpoint and projects it into a window around the midpoint. The root
+    stays bracketed and the number of steps never exceeds bisection's by
+    more than n0, while smooth functions converge superlinearly. The
+    endpoint function values are cached so every step costs one evaluation.
+    """
+    fa, fb = f(a), f(b)
+    if fa * fb >= 0:
+        raise ValueError("Function must have opposite signs at endpoints")
+
+    # ITP assumes f(a) < 0 < f(b); flip the sign of f otherwise
+    sign = 1.0 if fa < 0 else -1.0
+    fa, fb = sign * fa, sign * fb
+
+    epsilon = tolerance / 2
+    k1 = 0.2 / (b - a)
+    n_max = (
+        math.ceil(math.log2((b - a) / (2 * epsilon))) + n0
+        if b - a > 2 * epsilon
+        else n0
+    )
+
+    iteration = 0
+    history = History(ITERATION_FIELDS)
+    a_current, b_current = a, b
+
+    while iteration < max_iterations:
+        error = abs(b_current - a_current)
+        x_half = (a_current + b_current) / 2
+
+        # Interpolation: regula falsi point
+        x_f = (fb * a_current - fa * b_current) / (fb - fa)
+
+        # Truncation: perturb towards the midpoint
+        sigma = math.copysign(1.0, x_half - x_f)
+        delta = k1 * error**k2
+        x_t = x_f + sigma * delta if delta <= abs(x_half - x_f) else x_half
+
+        # Projection: stay within the minmax window around the midpoint
+        r = epsilon * 2 ** (n_max - iteration) - error / 2
+        c = x_t if abs(x_t - x_half) <= r else x_half - sigma * r
+
+        try:
+            fc = sign * f(c)
+        except EvaluationBudgetExceeded:
+            break
+        history.append((iteration + 1, c, sign * fc, error))
+
+        if abs(fc) < tolerance or error < tolerance:
+            return c, iteration + 1, error, history
+
+        if fc > 0:
+            b_current, fb = c, fc
+        elif fc < 0:
+            a_current, fa = c, fc
+        else:
+            return c, iteration + 1, 0.0, history
+
+        iteration += 1
+
+    c = (a_current + b_current) / 2
+    error = abs(b_current - a_current)
+    return c, iteration, error, history
+
+
+METHODS = {
+    "bisection": bisection_method,
+    "itp": itp_method,
+}
+
+
+def evaluate_array(f, x_values):
+    """Evaluate a lambdified function on a numpy array in a single call
+
+    Invalid results (complex values, domain errors) come back as NaN. Falls back
+    to point-by-point evaluation for expressions that cannot be vectorized.
+    """
+    x_values = np.asarray(x_values, dtype=float)
+
+    with np.errstate(all="ignore"):
+        try:
+            y_values = np.asarray(f(x_values))
+            if np.iscomplexobj(y_values):
+                y_values = np.where(y_values.imag == 0, y_values.real, np.nan)
+            return np.broadcast_to(y_values, x_values.shape).astype(float)
+        except (TypeError, ValueError, ZeroDivisionError, OverflowError):
+            pass
+
+        y_values = np.full(x_values.shape, np.nan)
+        for i, x_val in enumerate(x_values.flat):
+            try:
+                y_values.flat[i] = float(f(float(x_val)))
+            except (TypeError, ValueError, ZeroDivisionError, OverflowError):
+                continue
+        return y_values
+
+
+def interval_roots(f, a: float, b: float, tolerance: float = 1e-6) -> List[float]:
+    """Every root of f on [a, b], from the roots of its Chebyshev interpolant
+
+    Roots are kept if |f(root)| < 10 * tolerance and merged when closer than
+    that. Raises Unresolved when f cannot be interpolated on [a, b] (poles,
+    points where it is undefined, non-smooth functions).
+    """
+    candidates, _ = chebyshev_roots(lambda x: evaluate_array(f, x), a, b)
+    verified = np.abs(evaluate_array(f, candidates)) < tolerance * 10
+
+    roots = []
+    for root in candidates[verified].tolist():
+        if not roots or root - roots[-1] >= tolerance * 10:
+            roots.append(root)
+    return roots
+
+
+def sympify_function(func_str: str):
+    # Imported here: functions of the fast_expression subset never need it
+    import sympy as sp
+
+    func_str = func_str.replace("^", "**")
+    func_str = re.sub(r"\be\b", "E", func_str)
+    return sp.sympify(func_str)
+
+
+def parse_function(
+    func_str: str, timer: Optional[PhaseTimer] = None
+) -> Callable[[float], float]:
+    return expression_cache.get(func_str, sympify_function, timer).f
+
+
+def bisection_task(
+    func_str: str,
+    a: float,
+    b: float,
+    tolerance: float,
+    max_iter: int,
+    method: str = "bisection",
+    max_evaluations: Optional[int] = None,
+    all_roots: bool = False,
+):
+    """Parse the function, run the selected bracketing method and sample f for plotting
+
+    Evaluations made by the solver are counted, memoized and capped at
+    `max_evaluations`; the counts are returned as {"nfev", "nfev_cached"}.
+    With `all_roots` every root in [a, b] is listed under "all_roots" (None,
+    with the reason in "all_roots_error", when they could not be found).
+    The time spent in each phase, in seconds, is returned under "timings".
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method}")
+
+    timer = PhaseTimer()
+    f = parse_function(func_str, timer)
+    evaluations = Evaluations(max_evaluations)
+    counted_f = evaluations.wrap(f)
+
+    # The solver's own f(a) and f(b) are answered from the memo
+    fa = counted_f(a)
+    fb = counted_f(b)
+    if fa * fb >= 0:
+        raise ValueError(
+            f"Function must have opposite signs at endpoints (f({a}) = {fa:.6f}, f({b}) = {fb:.6f})"
+        )
+
+    with timer.phase("iterate"):
+        root, iterations, error, history = METHODS[method](
+            counted_f, a, b, tolerance, max_iter
+        )
+
+    # The methods stop early exactly when the last step met the tolerance
+    converged = len(history) > 0 and bool(
+        abs(history.column("f(c)")[-1]) < tolerance
+        or history.column("error")[-1] < tolerance
+    )
+
+    roots, roots_error = None, None
+    if all_roots:
+        with timer.phase("roots"):
+            try:
+                roots = interval_roots(counted_f, a, b, tolerance)
+            except (Unresolved, EvaluationBudgetExceeded) as e:
+                roots_error = str(e)
+
+    with timer.phase("sample"):
+        try:
+            xs = np.linspace(a - (b - a) * 0.1, b + (b - a) * 0.1, 300)
+            ys = []
+            for xv in xs:
+                try:
+                    yv = float(f(xv))
+                except Exception:
+                    yv = None
+                ys.append(yv)
+            func_samples = {"xs": xs.tolist(), "ys": ys}
+        except Exception:
+            func_samples = None
+
+    with timer.phase("history"):
+        history = history.to_rows()
+
+    return {
+        "root": root,
+        "iterations": iterations,
+        "error": error,
+        "history": history,
+        "func_samples": func_samples,
+        "evaluations": evaluations.stats(),
+        "converged": converged,
+        "all_roots": roots,
+        "all_roots_error": roots_error,
+        "timings": timer.timings,
+    }
+
+
+def worker_cache_stats():
+    """Expression cache statistics of the current worker"""
+    return expression_cache.stats()
@@ -0,0 +1,159 @@
+import math
+import os
+from collections import OrderedDict
+from threading import Lock
+
+from fast_expression import Unsupported, parse_fast
+from metrics import PhaseTimer
+
+# sympy is only imported by the functions that need it: functions of the
+# fast_expression subset are compiled without it
+
+# Names read differently by sympify_function: a bare e is Euler's number
+FAST_ALIASES = {"e": "E"}
+
+# Errors the math module raises where numpy returns nan or inf
+SCALAR_ERRORS = (ValueError, OverflowError, ZeroDivisionError, TypeError)
+
+DUAL_SOURCE = """
+def f(x):
+    if x.__class__ is float:
+        try:
+            return {scalar}
+        except SCALAR_ERRORS:
+            pass
+    return vector(x)
+"""
+
+
+def compile_dual(expr):
+    """Compile expr into a single callable with a math path and a numpy path
+
+    Python floats are evaluated with the math module, inlined into the
+    generated function, which avoids numpy's per-call dispatch overhead in
+    scalar iteration loops. Everything else (arrays, numpy scalars) and
+    floats whose math evaluation fails (domain errors, overflow) go to the
+    numpy-backed lambdify, so results match numpy's. Expressions using a
+    function the math module lacks only get the numpy path. The numpy
+    function is available as the `vector` attribute.
+    """
+    from sympy import lambdify, symbols
+    from sympy.printing.pycode import pycode
+
+    vector = lambdify(symbols("x"), expr, "numpy")
+    try:
+        source = DUAL_SOURCE.format(scalar=pycode(expr, strict=True))
+    except NotImplementedError:
+        source = "def f(x):\n    return vector(x)\n"
+
+    namespace = {"math": math, "vector": vector, "SCALAR_ERRORS": SCALAR_ERRORS}
+    exec(compile(source, "<dual>", "exec"), namespace)
+    f = namespace["f"]
+    f.vector = vector
+    return f
+
+
+def normalize_function(func_str: str) -> str:
+    """Normalize a function string so equivalent spellings share a cache entry"""
+    func_str = func_str.replace("^", "**")
+    return " ".join(func_str.split())
+
+
+class CompiledExpression:
+    """Sympy expression with its f compiled by compile_dual
+
+    Call f on floats in iteration loops and on numpy arrays for vectorized
+    evaluation.
+    """
+
+    def __init__(self, expr):
+        self.expr = expr
+        self.f = compile_dual(expr)
+
+
+class FastCompiledExpression:
+    """Function of the sympy-free subset, compiled straight from its syntax tree
+
+    Has the f of CompiledExpression (see fast_expression), which is all the
+    bracketing methods use.
+    """
+
+    def __init__(self, fast):
+        self.f = fast.f
+
+
+class ExpressionCache:
+    """Bounded LRU cache of compiled expressions keyed on the normalized function
+
+    Functions of the fast_expression subset are compiled without sympy.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(
+        self, func_str: str, parse, timer: PhaseTimer | None = None
+    ) -> CompiledExpression:
+        """Return the cached entry for a function, parsing it with `parse` on a miss
+
+        On a miss the parse and lambdify phases are recorded in `timer`.
+        """
+        timer = timer or PhaseTimer()
+        key = normalize_function(func_str)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Parse outside the lock so a slow sympify does not block other lookups
+        with timer.phase("parse"):
+            try:
+                entry = FastCompiledExpression(parse_fast(key, FAST_ALIASES))
+            except (Unsupported, SyntaxError):
+                entry = None
+        if entry is None:
+            with timer.phase("parse"):
+                expr = parse(key)
+            with timer.phase("lambdify"):
+                entry = CompiledExpression(expr)
+
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                self._entries.move_to_end(key)
+                return existing
+            if self.maxsize <= 0:
+                return entry
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Process-wide cache shared by every request handled by this worker
+expression_cache = ExpressionCache(int(os.getenv("EXPRESSION_CACHE_SIZE", "128")))
@@ -0,0 +1,208 @@
+import ast
+import math
+
+import numpy as np
+
+# Functions of the sympy-free subset, by the names sympify accepts, with
+# their math and numpy implementations
+FUNCTIONS = {
+    "sin": (math.sin, np.sin),
+    "cos": (math.cos, np.cos),
+    "tan": (math.tan, np.tan),
+    "asin": (math.asin, np.arcsin),
+    "acos": (math.acos, np.arccos),
+    "atan": (math.atan, np.arctan),
+    "sinh": (math.sinh, np.sinh),
+    "cosh": (math.cosh, np.cosh),
+    "tanh": (math.tanh, np.tanh),
+    "asinh": (math.asinh, np.arcsinh),
+    "acosh": (math.acosh, np.arccosh),
+    "atanh": (math.atanh, np.arctanh),
+    "exp": (math.exp, np.exp),
+    "log": (math.log, np.log),
+    "sqrt": (math.sqrt, np.sqrt),
+    "Abs": (abs, np.abs),
+    "abs": (abs, np.abs),
+}
+
+CONSTANTS = {"pi": math.pi, "E": math.e}
+
+# Powers with an exponent other than an integer constant call _pow, so a
+# negative base gives nan (through numpy) instead of a Python complex
+POW = "_pow"
+
+# Errors the math module raises where numpy returns nan or inf
+SCALAR_ERRORS = (ValueError, OverflowError, ZeroDivisionError, TypeError)
+
+# Builtins of the compiled code: numpy's warnings (e.g. for log of a
+# negative number) import from the frame that raises them, which fails
+# with no builtins at all; the subset never lets an expression name it
+BUILTINS = {"__import__": __import__}
+
+DUAL_SOURCE = """
+def f(x):
+    if x.__class__ is float:
+        try:
+            return {scalar}
+        except SCALAR_ERRORS:
+            pass
+    return vector(x)
+"""
+
+
+class Unsupported(ValueError):
+    """Raised for syntax outside the sympy-free subset"""
+
+
+def is_integer_constant(node):
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        node = node.operand
+    return (
+        isinstance(node, ast.Constant)
+        and isinstance(node.value, int)
+        and not isinstance(node.value, bool)
+    )
+
+
+class SubsetTransformer(ast.NodeTransformer):
+    """Check a tree is in the subset, renaming aliases and rewriting powers to _pow"""
+
+    def __init__(self, aliases):
+        self.aliases = aliases
+
+    def generic_visit(self, node):
+        if not isinstance(
+            node,
+            (
+                ast.Expression,
+                ast.BinOp,
+                ast.UnaryOp,
+                ast.Call,
+                ast.Name,
+                ast.Constant,
+                ast.Load,
+                ast.Add,
+                ast.Sub,
+                ast.Mult,
+                ast.Div,
+                ast.Pow,
+                ast.USub,
+                ast.UAdd,
+            ),
+        ):
+            raise Unsupported(f"Unsupported syntax: {type(node).__name__}")
+        return super().generic_visit(node)
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise Unsupported(f"Unsupported constant: {node.value!r}")
+        return node
+
+    def visit_Name(self, node):
+        name = self.aliases.get(node.id, node.id)
+        if name != "x" and name not in CONSTANTS:
+            raise Unsupported(f"Unsupported name: {node.id}")
+        return ast.copy_location(ast.Name(id=name, ctx=ast.Load()), node)
+
+    def visit_Call(self, node):
+        if (
+            not isinstance(node.func, ast.Name)
+            or node.func.id not in FUNCTIONS
+            or len(node.args) != 1
+            or node.keywords
+        ):
+            raise Unsupported("Unsupported function call")
+        node.args = [self.visit(node.args[0])]
+        return node
+
+    def visit_BinOp(self, node):
+        node = self.generic_visit(node)
+        if isinstance(node.op, ast.Pow) and not is_integer_constant(node.right):
+            call = ast.Call(
+                func=ast.Name(id=POW, ctx=ast.Load()),
+                args=[node.left, node.right],
+                keywords=[],
+            )
+            return ast.copy_location(call, node)
+        return node
+
+
+class ScalarTransformer(ast.NodeTransformer):
+    """Qualify names with the math module for the inlined scalar path"""
+
+    def visit_Name(self, node):
+        if node.id == "x":
+            return node
+        if node.id in ("abs", "Abs"):
+            return ast.Name(id="abs", ctx=ast.Load())
+        if node.id == POW:
+            return ast.Name(id="math.pow", ctx=ast.Load())
+        if node.id == "E":
+            return ast.Name(id="math.e", ctx=ast.Load())
+        return ast.Name(id=f"math.{node.id}", ctx=ast.Load())
+
+
+def make_namespace(functions, pow_function, constants=CONSTANTS):
+    """Globals for a FastExpression's code: function names mapped to implementations"""
+    names = {name: function for name, function in functions.items()}
+    names.update(constants)
+    names[POW] = pow_function
+    names["__builtins__"] = BUILTINS
+    return names
+
+
+NUMPY_NAMESPACE = make_namespace(
+    {name: pair[1] for name, pair in FUNCTIONS.items()}, np.power
+)
+
+
+class FastExpression:
+    """Expression of the sympy-free subset compiled straight from its syntax tree
+
+    The subset is numbers, x, pi and E, + - * / and **, and one-argument
+    calls of FUNCTIONS. `f` evaluates Python floats with the math module,
+    falling back to numpy when that fails, and everything else with numpy,
+    like a sympy-compiled function; its numpy path is the `vector`
+    attribute.
+    """
+
+    def __init__(self, tree):
+        self.source = ast.unparse(tree)
+        lambda_node = ast.Expression(
+            body=ast.Lambda(
+                args=ast.arguments(
+                    posonlyargs=[],
+                    args=[ast.arg(arg="x")],
+                    kwonlyargs=[],
+                    kw_defaults=[],
+                    defaults=[],
+                ),
+                body=tree.body,
+            )
+        )
+        ast.fix_missing_locations(lambda_node)
+        self.code = compile(lambda_node, "<fast_expression>", "eval")
+
+        vector = self.bind(NUMPY_NAMESPACE)
+        scalar = ast.unparse(ScalarTransformer().visit(ast.parse(self.source)))
+        names = {"math": math, "vector": vector, "SCALAR_ERRORS": SCALAR_ERRORS}
+        exec(DUAL_SOURCE.format(scalar=scalar), names)
+        self.f = names["f"]
+        self.f.vector = vector
+
+    def bind(self, names):
+        """The expression as a function of x with its names looked up in `names`"""
+        return eval(self.code, names)
+
+
+def parse_fast(source: str, aliases=None) -> FastExpression:
+    """Compile a normalized expression string without sympy
+
+    `aliases` renames names before the check, e.g. {"e": "E"}. Raises
+    Unsupported when the expression is outside the subset (sympy is needed)
+    and SyntaxError when it does not parse as Python either.
+    """
+    tree = ast.parse(source.strip(), mode="eval")
+    tree = SubsetTransformer(aliases or {}).visit(tree)
+    ast.fix_missing_locations(tree)
+    return FastExpression(tree)
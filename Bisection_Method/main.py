@@ -1,8 +1,9 @@
 from fasthtml.common import *
-import sympy as sp
-import numpy as np
-from typing import Callable, Tuple, List, Dict
 import json
+import time
+from bisection import bisection_task, worker_cache_stats
+from metrics import Metrics
+from worker_pool import pool_from_env
 
 app, rt = fast_app(
     hdrs=(
@@ -11,62 +12,27 @@ app, rt = fast_app(
     )
 )
 
-
-def bisection_method(
-    f: Callable[[float], float],
-    a: float,
-    b: float,
-    tolerance: float = 1e-6,
-    max_iterations: int = 100,
-) -> Tuple[float, int, float, List[Dict]]:
-    if f(a) * f(b) >= 0:
-        raise ValueError("Function must have opposite signs at endpoints")
-
-    iteration = 0
-    history = []
-    a_current, b_current = a, b
-
-    while iteration < max_iterations:
-        c = (a_current + b_current) / 2
-        fc = f(c)
-        error = abs(b_current - a_current)
-
-        history.append(
-            {
-                "iteration": iteration + 1,
-                "c": c,
-                "f(c)": fc,
-                "error": error,
-            }
-        )
-
-        if abs(fc) < tolerance or error < tolerance:
-            return c, iteration + 1, error, history
-
-        if f(a_current) * fc < 0:
-            b_current = c
-        else:
-            a_current = c
-
-        iteration += 1
-
-    c = (a_current + b_current) / 2
-    error = abs(b_current - a_current)
-    return c, max_iterations, error, history
-
-
-def parse_function(func_str: str) -> Callable[[float], float]:
-    x = sp.symbols("x")
-    func_str = func_str.replace("^", "**")
-    import re
-
-    func_str = re.sub(r"\be\b", "E", func_str)
-    f_symbolic = sp.sympify(func_str)
-    return sp.lambdify(x, f_symbolic, "numpy")
-
-
-def build_results_html(root, iterations, error, history, func_samples=None):
+# CPU-bound work runs in a process pool so the event loop stays responsive
+solver_pool = pool_from_env(stats_hook=worker_cache_stats)
+
+# Request metrics of this app process, exposed on /metrics
+metrics = Metrics("bisection")
+
+
+def build_results_html(
+    root,
+    iterations,
+    error,
+    history,
+    func_samples=None,
+    queue_wait=None,
+    evaluations=None,
+    timings=None,
+    all_roots=None,
+    all_roots_error=None,
+):
     history_json = json.dumps(history)
+    all_roots_json = json.dumps(all_roots or [])
     func_json = json.dumps(func_samples) if func_samples is not None else "null"
     return Div(
         Div(
@@ -82,7 +48,55 @@ def build_results_html(root, iterations, error, history, func_samples=None):
                 P("Error", cls="text-sm text-gray-500 mb-1"),
                 P(f"{error:.2e}", cls="text-lg font-mono font-semibold text-gray-900"),
             ),
-            cls="grid grid-cols-1 md:grid-cols-3 gap-4 mb-6 bg-white p-4 rounded-md shadow-sm",
+            Div(
+                P("f evaluations", cls="text-sm text-gray-500 mb-1"),
+                P(
+                    (
+                        f"{evaluations['nfev']} (+{evaluations['nfev_cached']} cached)"
+                        if evaluations is not None
+                        else "-"
+                    ),
+                    cls="text-lg font-mono font-semibold text-gray-900",
+                ),
+            ),
+            cls="grid grid-cols-2 md:grid-cols-4 gap-4 mb-6 bg-white p-4 rounded-md shadow-sm",
+        ),
+        (
+            P(
+                f"Queue wait: {queue_wait * 1000:.1f} ms",
+                cls="text-xs text-gray-400 text-right -mt-4 mb-6",
+            )
+            if queue_wait is not None
+            else ""
+        ),
+        (
+            P(
+                f"All roots in [a, b] ({len(all_roots)}): "
+                + ", ".join(f"{r:.10f}" for r in all_roots),
+                cls="text-sm font-mono text-gray-700 bg-white p-4 rounded-md shadow-sm mb-6",
+            )
+            if all_roots is not None
+            else ""
+        ),
+        (
+            P(
+                f"All roots: {all_roots_error}",
+                cls="text-sm text-gray-500 bg-white p-4 rounded-md shadow-sm mb-6",
+            )
+            if all_roots_error
+            else ""
+        ),
+        (
+            P(
+                "Timings: "
+                + " · ".join(
+                    f"{phase} {seconds * 1000:.2f} ms"
+                    for phase, seconds in timings.items()
+                ),
+                cls="text-xs text-gray-400 text-right -mt-4 mb-6",
+            )
+            if timings
+            else ""
         ),
         Div(
             Canvas(id="functionChart", cls="w-full h-64"),
@@ -195,6 +209,7 @@ def build_results_html(root, iterations, error, history, func_samples=None):
                         const funcCtx = functionChartEl.getContext('2d');
                         const funcData = funcDataObj.xs.map((x, i) => ({{ x: x, y: funcDataObj.ys[i] }}));
                         const rootX = {root};
+                        const allRoots = {all_roots_json};
                         new Chart(funcCtx, {{
                             type: 'line',
                             data: {{
@@ -219,7 +234,16 @@ def build_results_html(root, iterations, error, history, func_samples=None):
                                         pointBackgroundColor: '#ef4444',
                                         pointBorderColor: '#dc2626',
                                         showLine: false
-                                    }}
+                                    }},
+                                    ...(allRoots.length ? [{{
+                                        label: 'All roots in [a, b]',
+                                        data: allRoots.map(r => ({{ x: r, y: 0 }})),
+                                        type: 'scatter',
+                                        pointRadius: 4,
+                                        pointBackgroundColor: '#f59e0b',
+                                        pointBorderColor: '#d97706',
+                                        showLine: false
+                                    }}] : [])
                                 ]
                             }},
                             options: {{
@@ -286,6 +310,10 @@ def page_content(results=None, form_values=None):
     b_default = "3.0"
     tolerance_default = "0.000001"
     max_iter_default = "100"
+    method_default = "bisection"
+    max_evaluations_default = ""
+    show_timings_default = False
+    all_roots_default = False
 
     func_val = (
         form_values.get("func_str")
@@ -312,6 +340,26 @@ def page_content(results=None, form_values=None):
         if form_values and form_values.get("max_iter") is not None
         else max_iter_default
     )
+    method_val = (
+        form_values.get("method")
+        if form_values and form_values.get("method") is not None
+        else method_default
+    )
+    max_evaluations_val = (
+        form_values.get("max_evaluations")
+        if form_values and form_values.get("max_evaluations") is not None
+        else max_evaluations_default
+    )
+    show_timings_val = (
+        form_values.get("show_timings")
+        if form_values and form_values.get("show_timings") is not None
+        else show_timings_default
+    )
+    all_roots_val = (
+        form_values.get("all_roots")
+        if form_values and form_values.get("all_roots") is not None
+        else all_roots_default
+    )
 
     return Html(
         Head(
@@ -413,7 +461,74 @@ def page_content(results=None, form_values=None):
                             ),
                             cls="flex-1",
                         ),
-                        cls="flex flex-col md:flex-row gap-4 mb-6",
+                        cls="flex flex-col md:flex-row gap-4 mb-4",
+                    ),
+                    Div(
+                        Div(
+                            Label(
+                                "Method",
+                                cls="block text-sm font-medium text-gray-700 mb-1",
+                            ),
+                            Select(
+                                Option(
+                                    "Bisection",
+                                    value="bisection",
+                                    selected=method_val == "bisection",
+                                ),
+                                Option(
+                                    "ITP (Interpolate-Truncate-Project)",
+                                    value="itp",
+                                    selected=method_val == "itp",
+                                ),
+                                name="method",
+                                cls="w-full px-3 py-2 border border-gray-300 rounded-md bg-white focus:outline-none focus:ring-1 focus:ring-gray-500",
+                            ),
+                            cls="flex-1",
+                        ),
+                        Div(
+                            Label(
+                                "Max evaluations (optional)",
+                                cls="block text-sm font-medium text-gray-700 mb-1",
+                            ),
+                            Input(
+                                type="number",
+                                name="max_evaluations",
+                                value=max_evaluations_val,
+                                min="2",
+                                placeholder="No limit",
+                                cls="w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-1 focus:ring-gray-500",
+                            ),
+                            cls="flex-1",
+                        ),
+                        cls="flex flex-col md:flex-row gap-4 mb-4",
+                    ),
+                    Div(
+                        Label(
+                            Input(
+                                type="checkbox",
+                                name="all_roots",
+                                value="1",
+                                checked=all_roots_val,
+                                cls="mr-2",
+                            ),
+                            "Find all roots in [a, b]",
+                            cls="inline-flex items-center text-sm text-gray-700",
+                        ),
+                        cls="mb-2",
+                    ),
+                    Div(
+                        Label(
+                            Input(
+                                type="checkbox",
+                                name="show_timings",
+                                value="1",
+                                checked=show_timings_val,
+                                cls="mr-2",
+                            ),
+                            "Show phase timings",
+                            cls="inline-flex items-center text-sm text-gray-700",
+                        ),
+                        cls="mb-6",
                     ),
                     Button(
                         "Calculate",
@@ -469,6 +584,10 @@ async def post(req):
         "b": form.get("b"),
         "tolerance": form.get("tolerance"),
         "max_iter": form.get("max_iter"),
+        "method": form.get("method") or "bisection",
+        "max_evaluations": form.get("max_evaluations") or "",
+        "show_timings": bool(form.get("show_timings")),
+        "all_roots": bool(form.get("all_roots")),
     }
 
     try:
@@ -476,38 +595,73 @@ async def post(req):
         b = float(form.get("b"))
         tolerance = float(form.get("tolerance"))
         max_iter = int(form.get("max_iter"))
+        # An empty field means no evaluation budget
+        max_evaluations = (
+            int(form_values["max_evaluations"])
+            if form_values["max_evaluations"]
+            else None
+        )
     except (ValueError, TypeError):
         return page_content(error_div("Invalid input values"))
 
+    request_start = time.perf_counter()
     try:
-        f = parse_function(func_str)
-        fa = f(a)
-        fb = f(b)
-        if fa * fb >= 0:
-            raise ValueError(
-                f"Function must have opposite signs at endpoints (f({a}) = {fa:.6f}, f({b}) = {fb:.6f})"
-            )
-        root, iterations, error, history = bisection_method(
-            f, a, b, tolerance, max_iter
+        result, queue_wait = await solver_pool.run(
+            bisection_task,
+            func_str,
+            a,
+            b,
+            tolerance,
+            max_iter,
+            form_values["method"],
+            max_evaluations,
+            form_values["all_roots"],
         )
-        try:
-            xs = np.linspace(a - (b - a) * 0.1, b + (b - a) * 0.1, 300)
-            ys = []
-            for xv in xs:
-                try:
-                    yv = float(f(xv))
-                except Exception:
-                    yv = None
-                ys.append(yv)
-            func_samples = {"xs": xs.tolist(), "ys": ys}
-        except Exception:
-            func_samples = None
-
-        results = build_results_html(root, iterations, error, history, func_samples)
     except Exception as e:
-        results = error_div(str(e))
+        metrics.inc("errors_total", endpoint="/")
+        return page_content(error_div(str(e)), form_values=form_values)
+
+    timings = result["timings"]
+    timings["queue_wait"] = queue_wait
+
+    render_start = time.perf_counter()
+    results = build_results_html(
+        result["root"],
+        result["iterations"],
+        result["error"],
+        result["history"],
+        result["func_samples"],
+        queue_wait,
+        result["evaluations"],
+        timings if form_values["show_timings"] else None,
+        result["all_roots"],
+        result["all_roots_error"],
+    )
+    page = page_content(results, form_values=form_values)
+    timings["render"] = time.perf_counter() - render_start
+
+    metrics.inc("solves_total", endpoint="/")
+    if not result["converged"]:
+        metrics.inc("convergence_failures_total", endpoint="/")
+    metrics.observe_phases(timings, endpoint="/")
+    metrics.observe(
+        "request_duration_seconds", time.perf_counter() - request_start, endpoint="/"
+    )
+    return page
+
 
-    return page_content(results, form_values=form_values)
+@rt("/metrics")
+def get():
+    """Solve counts, latency histograms and cache statistics in the Prometheus text format"""
+    stats = solver_pool.worker_stats()
+    gauges = {
+        f"expression_cache_{key}": value
+        for key, value in stats.items()
+        if key != "workers"
+    }
+    gauges["solver_workers"] = stats["workers"]
+    gauges["solver_pending_jobs"] = solver_pool.pending
+    return Response(metrics.render(gauges), media_type="text/plain; version=0.0.4")
 
 
 serve()
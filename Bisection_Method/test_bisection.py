@@ -0,0 +1,65 @@
+import math
+
+import pytest
+
+from bisection import bisection_method, bisection_task, itp_method
+
+
+def cubic(x):
+    return x**3 - 2 * x - 5
+
+
+CUBIC_ROOT = 2.0945514815423265
+
+
+@pytest.mark.parametrize("method", [bisection_method, itp_method])
+def test_root_within_tolerance(method):
+    root, iterations, _, history = method(cubic, 2.0, 3.0, 1e-10)
+    assert root == pytest.approx(CUBIC_ROOT, abs=1e-9)
+    assert len(history) == iterations
+
+
+@pytest.mark.parametrize("method", [bisection_method, itp_method])
+def test_endpoints_must_bracket_a_root(method):
+    with pytest.raises(ValueError, match="opposite signs"):
+        method(cubic, 3.0, 4.0)
+
+
+def test_itp_needs_far_fewer_steps_on_smooth_functions():
+    _, bisection_steps, _, _ = bisection_method(cubic, 2.0, 3.0, 1e-12)
+    _, itp_steps, _, _ = itp_method(cubic, 2.0, 3.0, 1e-12)
+    assert itp_steps < bisection_steps / 3
+
+
+def test_itp_never_takes_more_than_n0_steps_beyond_bisection():
+    # A step function defeats interpolation: ITP falls back to the midpoint
+    def step(x):
+        return -1.0 if x < 0.3 else 1.0
+
+    _, bisection_steps, _, _ = bisection_method(step, 0.0, 1.0, 1e-8)
+    _, itp_steps, _, _ = itp_method(step, 0.0, 1.0, 1e-8, n0=1)
+    assert itp_steps <= bisection_steps + 1
+
+
+def test_itp_keeps_the_root_bracketed_for_decreasing_functions():
+    root, _, _, history = itp_method(lambda x: math.cos(x), 0.0, 3.0, 1e-10)
+    assert root == pytest.approx(math.pi / 2, abs=1e-9)
+    assert all(0.0 <= c <= 3.0 for c in history.column("c"))
+
+
+def test_task_reports_method_and_evaluations():
+    result = bisection_task("x**3 - 2*x - 5", 2.0, 3.0, 1e-8, 100, method="itp")
+    assert result["converged"]
+    assert result["root"] == pytest.approx(CUBIC_ROOT, abs=1e-7)
+    # f(a) and f(b) are evaluated once, then answered from the memo
+    assert result["evaluations"]["nfev"] == result["iterations"] + 2
+
+
+def test_task_rejects_unknown_methods():
+    with pytest.raises(ValueError, match="Unknown method"):
+        bisection_task("x - 1", 0.0, 2.0, 1e-6, 100, method="brent")
+
+
+def test_task_result_is_plain_json():
+    result = bisection_task("x**2 - 2", 0.0, 2.0, 1e-8, 100)
+    assert type(result["converged"]) is bool
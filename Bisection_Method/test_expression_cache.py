@@ -0,0 +1,41 @@
+import math
+
+import pytest
+
+from bisection import sympify_function
+from expression_cache import (
+    CompiledExpression,
+    ExpressionCache,
+    FastCompiledExpression,
+    normalize_function,
+)
+
+
+def test_normalized_spellings_share_an_entry():
+    assert normalize_function("x^2  -  2") == "x**2 - 2"
+    cache = ExpressionCache(8)
+    entry = cache.get("x^2 - 2", sympify_function)
+    assert cache.get("x**2   - 2", sympify_function) is entry
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ExpressionCache(2)
+    for func_str in ("x - 1", "x - 2", "x - 1", "x - 3"):
+        cache.get(func_str, sympify_function)
+    stats = cache.stats()
+    assert (stats["size"], stats["evictions"]) == (2, 1)
+    cache.get("x - 1", sympify_function)
+    assert cache.stats()["hits"] == 2
+
+
+def test_fast_subset_and_sympy_entries():
+    cache = ExpressionCache(8)
+    fast = cache.get("x**3 - e", sympify_function)
+    assert isinstance(fast, FastCompiledExpression)
+    assert fast.f(1.0) == pytest.approx(1 - math.e)
+
+    entry = cache.get("sec(x) - 2", sympify_function)
+    assert isinstance(entry, CompiledExpression)
+    assert entry.f(0.5) == pytest.approx(1 / math.cos(0.5) - 2)
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+# Worker stats that are settings, the same in every worker, rather than counters
+WORKER_SETTINGS = ("maxsize",)
+
+
+class PoolBusyError(RuntimeError):
+    """Raised when the solver pool already has its maximum number of queued jobs"""
+
+
+def warm_worker():
+    """Import numpy once when a worker starts
+
+    sympy is left to be imported by the first function that needs it, so
+    workers start quickly and functions of the fast_expression subset never
+    pay for it.
+    """
+    import numpy  # noqa: F401
+
+
+def run_job(fn, args, submitted_at, stats_hook):
+    """Run a job inside a worker and report how long it waited in the queue"""
+    queue_wait = time.time() - submitted_at
+    result = fn(*args)
+    stats = stats_hook() if stats_hook is not None else None
+    return result, queue_wait, os.getpid(), stats
+
+
+class SolverPool:
+    """Process pool that runs CPU-bound solver work off the event loop
+
+    `max_workers=0` runs jobs in a single background thread instead, which is
+    handy for development. At most `max_queue` jobs may be waiting or running
+    at once; further submissions raise PoolBusyError.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, stats_hook=None):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.stats_hook = stats_hook
+        self._executor = None
+        self._pending = 0
+        self._worker_stats = {}
+
+    def _get_executor(self):
+        # Created lazily so importing this module in a worker never starts a pool
+        if self._executor is None:
+            if self.max_workers > 0:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, initializer=warm_worker
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, initializer=warm_worker
+                )
+        return self._executor
+
+    async def run(self, fn, *args):
+        """Run fn(*args) in the pool and return (result, queue wait in seconds)"""
+        if self._pending >= self.max_queue:
+            raise PoolBusyError("Solver queue is full, try again shortly")
+
+        self._pending += 1
+        try:
+            future = self._get_executor().submit(
+                run_job, fn, args, time.time(), self.stats_hook
+            )
+            result, queue_wait, pid, stats = await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next request
+            self._executor = None
+            raise
+        finally:
+            self._pending -= 1
+
+        if stats is not None:
+            self._worker_stats[pid] = stats
+        return result, queue_wait
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def worker_stats(self):
+        """Sum the latest stats reported by each worker
+
+        Settings (WORKER_SETTINGS) are reported once, as the per-worker value.
+        """
+        totals = {}
+        for stats in self._worker_stats.values():
+            for key, value in stats.items():
+                if key in WORKER_SETTINGS:
+                    totals[key] = value
+                else:
+                    totals[key] = totals.get(key, 0) + value
+        totals["workers"] = len(self._worker_stats)
+        return totals
+
+
+def pool_from_env(stats_hook=None):
+    """Build a SolverPool configured by SOLVER_WORKERS and SOLVER_MAX_QUEUE"""
+    max_workers = int(os.getenv("SOLVER_WORKERS", str(os.cpu_count() or 1)))
+    max_queue = int(os.getenv("SOLVER_MAX_QUEUE", str(max(max_workers, 1) * 8)))
+    return SolverPool(max_workers, max_queue, stats_hook)
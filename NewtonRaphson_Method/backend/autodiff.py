@@ -0,0 +1,311 @@
+import math
+from types import SimpleNamespace
+
+import numpy as np
+
+# Functions of sympy expressions that compile_autodiff can differentiate
+# (sec, csc and cot are printed in terms of cos, sin and tan, Abs as abs)
+AUTODIFF_FUNCTIONS = {
+    "sin",
+    "cos",
+    "tan",
+    "sec",
+    "csc",
+    "cot",
+    "asin",
+    "acos",
+    "atan",
+    "sinh",
+    "cosh",
+    "tanh",
+    "asinh",
+    "acosh",
+    "atanh",
+    "exp",
+    "log",
+    "Abs",
+}
+
+# Errors the math module raises where numpy returns nan or inf
+SCALAR_ERRORS = (ValueError, OverflowError, ZeroDivisionError, TypeError)
+
+
+def _log(value):
+    if isinstance(value, Dual):
+        return Dual(_log(value.value), value.derivative / value.value)
+    return np.log(value) if isinstance(value, np.ndarray) else math.log(value)
+
+
+def _sign(value):
+    if isinstance(value, Dual):
+        return _sign(value.value)
+    if isinstance(value, np.ndarray):
+        return np.sign(value)
+    return math.copysign(1.0, value)
+
+
+def _innermost(value):
+    while isinstance(value, Dual):
+        value = value.value
+    return value
+
+
+class Dual:
+    """Dual number value + derivative·ε with ε² = 0
+
+    Arithmetic on Duals applies the chain rule to the derivative, so
+    evaluating f on Dual(x, 1) gives f(x) and f'(x) in one pass. The value
+    and derivative are floats or numpy arrays of the same shape, or Duals
+    themselves for higher derivatives (see derivatives_evaluator).
+    """
+
+    __slots__ = ("value", "derivative")
+
+    # Make numpy arrays and scalars defer to the reflected Dual operators
+    # instead of building object arrays of Duals
+    __array_ufunc__ = None
+
+    def __init__(self, value, derivative=0.0):
+        self.value = value
+        self.derivative = derivative
+
+    def __add__(self, other):
+        if isinstance(other, Dual):
+            return Dual(self.value + other.value, self.derivative + other.derivative)
+        return Dual(self.value + other, self.derivative)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, Dual):
+            return Dual(self.value - other.value, self.derivative - other.derivative)
+        return Dual(self.value - other, self.derivative)
+
+    def __rsub__(self, other):
+        return Dual(other - self.value, -self.derivative)
+
+    def __mul__(self, other):
+        if isinstance(other, Dual):
+            return Dual(
+                self.value * other.value,
+                self.derivative * other.value + self.value * other.derivative,
+            )
+        return Dual(self.value * other, self.derivative * other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, Dual):
+            return Dual(
+                self.value / other.value,
+                (self.derivative * other.value - self.value * other.derivative)
+                / (other.value * other.value),
+            )
+        return Dual(self.value / other, self.derivative / other)
+
+    def __rtruediv__(self, other):
+        value = other / self.value
+        return Dual(value, -value * self.derivative / self.value)
+
+    def __pow__(self, other):
+        if isinstance(other, Dual):
+            value = self.value**other.value
+            return Dual(
+                value,
+                value
+                * (
+                    other.derivative * _log(self.value)
+                    + other.value * self.derivative / self.value
+                ),
+            )
+        if other == 0:
+            return Dual(self.value**0, self.derivative * 0)
+        return Dual(
+            self.value**other, other * self.value ** (other - 1) * self.derivative
+        )
+
+    def __rpow__(self, other):
+        value = other**self.value
+        return Dual(value, value * math.log(other) * self.derivative)
+
+    def __neg__(self):
+        return Dual(-self.value, -self.derivative)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return Dual(abs(self.value), _sign(self.value) * self.derivative)
+
+
+def dual_functions(lib):
+    """lambdify namespace of the elementary functions on Duals, computed with lib
+
+    `lib` is the math module for float Duals or numpy for array Duals.
+    Arguments that are not Duals (constant subexpressions) pass straight
+    through to lib, and nested Duals are differentiated with these same
+    functions.
+    """
+    # numpy spells the inverse functions arcsin, ..., arctanh
+    prefix = "a" if lib is math else "arc"
+    asin, acos, atan, asinh, acosh, atanh = (
+        getattr(lib, prefix + name)
+        for name in ("sin", "cos", "tan", "sinh", "cosh", "tanh")
+    )
+
+    # Derivatives take the value and the functions to compute with: lib for
+    # plain values, these Dual functions for nested Duals
+    def chain(func, derivative):
+        def apply(argument):
+            if not isinstance(argument, Dual):
+                return func(argument)
+            value = argument.value
+            if isinstance(value, Dual):
+                inner, functions_of_value = apply(value), nested
+            else:
+                inner, functions_of_value = func(value), lib
+            return Dual(
+                inner, derivative(value, functions_of_value) * argument.derivative
+            )
+
+        return apply
+
+    functions = {
+        "sin": chain(lib.sin, lambda v, m: m.cos(v)),
+        "cos": chain(lib.cos, lambda v, m: -m.sin(v)),
+        "tan": chain(lib.tan, lambda v, m: 1 + m.tan(v) ** 2),
+        "asin": chain(asin, lambda v, m: 1 / m.sqrt(1 - v * v)),
+        "acos": chain(acos, lambda v, m: -1 / m.sqrt(1 - v * v)),
+        "atan": chain(atan, lambda v, m: 1 / (1 + v * v)),
+        "sinh": chain(lib.sinh, lambda v, m: m.cosh(v)),
+        "cosh": chain(lib.cosh, lambda v, m: m.sinh(v)),
+        "tanh": chain(lib.tanh, lambda v, m: 1 - m.tanh(v) ** 2),
+        "asinh": chain(asinh, lambda v, m: 1 / m.sqrt(v * v + 1)),
+        "acosh": chain(acosh, lambda v, m: 1 / m.sqrt(v * v - 1)),
+        "atanh": chain(atanh, lambda v, m: 1 / (1 - v * v)),
+        "exp": chain(lib.exp, lambda v, m: m.exp(v)),
+        "log": chain(lib.log, lambda v, m: 1 / v),
+        "sqrt": chain(lib.sqrt, lambda v, m: 0.5 / m.sqrt(v)),
+    }
+    nested = SimpleNamespace(**functions)
+    return functions
+
+
+def dual_pow(base, exponent):
+    """base ** exponent on math-backed Duals; like math.pow, complex results raise ValueError"""
+    value = _innermost(base)
+    power = _innermost(exponent)
+    if value < 0 and power != int(power):
+        raise ValueError("math domain error")
+    return base**exponent
+
+
+def supports_autodiff(expr):
+    """Whether every function in expr has a Dual implementation"""
+    from sympy import Function
+
+    return all(
+        type(function).__name__ in AUTODIFF_FUNCTIONS
+        for function in expr.atoms(Function)
+    )
+
+
+def compile_autodiff(expr, order: int = 1):
+    """Compile expr into an evaluator of (f(x), f'(x)) by forward-mode autodiff
+
+    f is evaluated once on a Dual, with its common subexpressions computed
+    once, so the derivative costs a small multiple of f and its expression
+    is never built. Floats use math-backed Duals; arrays, and floats whose
+    math evaluation fails, numpy-backed ones. The numpy path is available
+    as the `vector` attribute. An `order` above 1 gives the evaluator of
+    (f, f', ..., f^(order)) of derivatives_evaluator instead. Check
+    supports_autodiff first.
+    """
+    from sympy import lambdify, symbols
+
+    x = symbols("x")
+    scalar = lambdify(x, expr, modules=[dual_functions(math), "math"], cse=True)
+    numpy_dual = lambdify(x, expr, modules=[dual_functions(np), "math"], cse=True)
+    if order > 1:
+        return derivatives_evaluator(scalar, numpy_dual, order)
+    return dual_evaluator(scalar, numpy_dual)
+
+
+def dual_evaluator(scalar, numpy_dual):
+    """(f(x), f'(x)) evaluator from f evaluated on math-backed and numpy-backed Duals
+
+    Further arguments of the evaluator (e.g. parameters) are passed on to f
+    as they are; f' is the derivative in x only.
+    """
+
+    def vector(value, *args):
+        value = np.asarray(value, dtype=float)
+        # Like evaluate_array: out-of-domain points give nan or inf, quietly
+        with np.errstate(all="ignore"):
+            result = numpy_dual(Dual(value, np.ones_like(value)), *args)
+        if isinstance(result, Dual):
+            return result.value, result.derivative
+        return result, np.zeros_like(value)
+
+    def f_and_prime(value, *args):
+        if value.__class__ is float:
+            try:
+                result = scalar(Dual(value, 1.0), *args)
+                if isinstance(result, Dual):
+                    return result.value, result.derivative
+                return result, 0.0
+            except SCALAR_ERRORS:
+                pass
+        return vector(value, *args)
+
+    f_and_prime.vector = vector
+    return f_and_prime
+
+
+def nested_seed(value, order: int):
+    """x as `order` Duals nested in one another, each with derivative 1"""
+    for _ in range(order):
+        value = Dual(value, 1.0)
+    return value
+
+
+def nested_parts(result, order: int):
+    """(f, f', ..., f^(order)) from f evaluated on nested_seed(x, order)
+
+    f^(k) is the innermost value after k steps into the derivatives; parts
+    that are not Duals (constants) have zero derivatives.
+    """
+    parts = []
+    for k in range(order + 1):
+        part = result
+        for _ in range(k):
+            part = part.derivative if isinstance(part, Dual) else 0.0
+        parts.append(_innermost(part))
+    return tuple(parts)
+
+
+def derivatives_evaluator(scalar, numpy_dual, order: int):
+    """(f, f', ..., f^(order)) evaluator from f evaluated on nested Duals
+
+    f is evaluated once on x seeded as `order` nested Duals, which carries
+    every derivative up to the order; the cost grows as 2**order times f.
+    Floats use the math-backed f and fall back to the numpy-backed one,
+    which is the `vector` attribute, like dual_evaluator.
+    """
+
+    def vector(value):
+        value = np.asarray(value, dtype=float)
+        with np.errstate(all="ignore"):
+            parts = nested_parts(numpy_dual(nested_seed(value, order)), order)
+        return tuple(part + np.zeros_like(value) for part in parts)
+
+    def derivatives(value):
+        if value.__class__ is float:
+            try:
+                return nested_parts(scalar(nested_seed(value, order)), order)
+            except SCALAR_ERRORS:
+                pass
+        return vector(value)
+
+    derivatives.vector = vector
+    return derivatives
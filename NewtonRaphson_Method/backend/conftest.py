@@ -0,0 +1,5 @@
+import os
+
+# Run pool jobs in a background thread: tests import main, whose pool would
+# otherwise start a worker process per CPU
+os.environ.setdefault("SOLVER_WORKERS", "0")
@@ -0,0 +1,81 @@
+import numpy as np
+
+
+class EvaluationBudgetExceeded(RuntimeError):
+    """Raised when a solve has used up its max_evaluations budget"""
+
+
+class Evaluations:
+    """Counts, memoizes and budgets the function evaluations of a single solve
+
+    Every function a solver calls goes through `wrap`, and all wrapped
+    functions share the counters. Scalar calls are memoized per function, so
+    asking for the same point twice costs one evaluation; repeats are
+    counted in `nfev_cached`. Array calls cost one evaluation per element
+    and are not memoized, nor are numbers of other types (e.g. mpmath's,
+    whose precision a float key would lose). Once `max_evaluations`
+    evaluations have been made, further calls raise
+    EvaluationBudgetExceeded.
+    """
+
+    def __init__(self, max_evaluations: int | None = None):
+        self.max_evaluations = max_evaluations
+        self.nfev = 0
+        self.nfev_cached = 0
+        self.exhausted = False
+
+    def _charge(self, count: int):
+        if (
+            self.max_evaluations is not None
+            and self.nfev + count > self.max_evaluations
+        ):
+            self.exhausted = True
+            raise EvaluationBudgetExceeded(
+                f"Evaluation budget of {self.max_evaluations} exhausted"
+            )
+        self.nfev += count
+
+    def wrap(self, func, cost: int = 1):
+        """Return func routed through the counters, with its own memo
+
+        Each point costs `cost` evaluations, e.g. 2 for a function that
+        returns f and f' together.
+        """
+        memo = {}
+
+        def evaluate(x):
+            if np.ndim(x) > 0:
+                self._charge(cost * int(np.size(x)))
+                return func(x)
+
+            if not isinstance(x, (int, float, np.number, np.ndarray)):
+                self._charge(cost)
+                return func(x)
+
+            key = float(x)
+            if key in memo:
+                self.nfev_cached += cost
+                return memo[key]
+
+            self._charge(cost)
+            value = func(x)
+            memo[key] = value
+            return value
+
+        return evaluate
+
+    def wrap_points(self, func, cost: int = 1):
+        """Return func, evaluating the rows of a 2-D array, through the counters
+
+        For functions of several variables: each row is a point and costs
+        `cost` evaluations, whatever its length. Calls are not memoized.
+        """
+
+        def evaluate(points):
+            self._charge(cost * len(points))
+            return func(points)
+
+        return evaluate
+
+    def stats(self):
+        return {"nfev": self.nfev, "nfev_cached": self.nfev_cached}
@@ -0,0 +1,619 @@
+import inspect
+import io
+import math
+import operator
+import os
+import tokenize
+from collections import OrderedDict
+from threading import Lock
+
+import numpy as np
+
+from autodiff import (
+    compile_autodiff,
+    derivatives_evaluator,
+    dual_evaluator,
+    dual_functions,
+    dual_pow,
+    supports_autodiff,
+)
+from expression_store import store_from_env
+from fast_expression import (
+    MAX_POLYNOMIAL_DEGREE,
+    Unsupported,
+    make_namespace,
+    parse_fast,
+)
+from metrics import PhaseTimer
+
+# sympy is only imported by the functions that need it: equations of the
+# fast_expression subset are compiled without it
+
+# Derivatives with more operations than this are not compiled, f' comes
+# from dual-number autodiff of f instead
+AUTODIFF_OPS = int(os.getenv("AUTODIFF_OPS", "200"))
+
+
+# Tokens normalize_equation drops, and those it can join without spaces
+SPACING_TOKENS = {tokenize.NEWLINE, tokenize.NL, tokenize.ENDMARKER}
+JOINABLE_TOKENS = {tokenize.NAME, tokenize.NUMBER, tokenize.OP}
+
+# Errors the math module raises where numpy returns nan or inf
+SCALAR_ERRORS = (ValueError, OverflowError, ZeroDivisionError, TypeError)
+
+DUAL_SOURCE = """
+def f(x):
+    if x.__class__ is float:
+        try:
+{scalar}
+        except SCALAR_ERRORS:
+            pass
+    return vector(x)
+"""
+
+VECTOR_SOURCE = "def f(x):\n    return vector(x)\n"
+
+# Namespace of numpy-backed lambdify functions, built once per process by
+# numpy_namespace for functions rebuilt from their source
+_numpy_namespace = None
+
+
+def numpy_namespace():
+    global _numpy_namespace
+    if _numpy_namespace is None:
+        from sympy import lambdify, symbols
+
+        x = symbols("x")
+        _numpy_namespace = lambdify(x, x, modules=["numpy"]).__globals__
+    return _numpy_namespace
+
+
+def scalar_source(expr):
+    """Body of the math path of compile_dual, indented for DUAL_SOURCE"""
+    from sympy import cse, numbered_symbols
+    from sympy.printing.pycode import pycode
+
+    if isinstance(expr, tuple):
+        replacements, reduced = cse(expr, symbols=numbered_symbols("_cse"))
+        lines = [f"{symbol} = {pycode(sub, strict=True)}" for symbol, sub in replacements]
+        lines.append(
+            "return (" + ", ".join(pycode(e, strict=True) for e in reduced) + ",)"
+        )
+    else:
+        lines = [f"return {pycode(expr, strict=True)}"]
+    return "\n".join(" " * 12 + line for line in lines)
+
+
+def compile_dual(expr):
+    """Compile expr into a single callable with a math path and a numpy path
+
+    Python floats are evaluated with the math module, inlined into the
+    generated function, which avoids numpy's per-call dispatch overhead in
+    scalar iteration loops. Everything else (arrays, numpy scalars) and
+    floats whose math evaluation fails (domain errors, overflow) go to the
+    numpy-backed lambdify, so results match numpy's. Expressions using a
+    function the math module lacks only get the numpy path. The numpy
+    function is available as the `vector` attribute.
+
+    A tuple of expressions gives a callable returning a tuple of values, with
+    their common subexpressions (sympy cse) computed once on both paths.
+
+    The generated sources are kept as the `source` attribute, from which
+    load_dual rebuilds the callable without printing it again.
+    """
+    from sympy import lambdify, symbols
+
+    x = symbols("x")
+    vector = lambdify(x, expr, modules=["numpy"], cse=isinstance(expr, tuple))
+    try:
+        source = DUAL_SOURCE.format(scalar=scalar_source(expr))
+    except NotImplementedError:
+        source = VECTOR_SOURCE
+    return build_dual(source, vector, inspect.getsource(vector))
+
+
+def build_dual(source, vector, vector_source):
+    namespace = {"math": math, "vector": vector, "SCALAR_ERRORS": SCALAR_ERRORS}
+    exec(compile(source, "<dual>", "exec"), namespace)
+    f = namespace["f"]
+    f.vector = vector
+    f.source = (source, vector_source)
+    return f
+
+
+def load_dual(source, vector_source):
+    """Rebuild a compile_dual callable from its `source` attribute"""
+    namespace = dict(numpy_namespace())
+    exec(compile(vector_source, "<lambdifygenerated>", "exec"), namespace)
+    return build_dual(source, namespace["_lambdifygenerated"], vector_source)
+
+
+def normalize_equation(equation_str: str) -> str:
+    """Normalize an equation string so equivalent spellings share a cache entry
+
+    ^ becomes ** and whitespace between tokens is dropped, so
+    "x**3 - 2*x - 5" and "x**3-2*x-5" are the same key. A single space is
+    kept where dropping it would join two tokens into one (e.g. "2 x" or
+    "* *"); strings that do not tokenize only have their whitespace runs
+    collapsed.
+    """
+    equation_str = equation_str.replace("^", "**").strip()
+    try:
+        tokens = [
+            token
+            for token in tokenize.generate_tokens(io.StringIO(equation_str).readline)
+            if token.type not in SPACING_TOKENS
+        ]
+    except (tokenize.TokenError, SyntaxError):
+        tokens = None
+    if not tokens or any(token.type not in JOINABLE_TOKENS for token in tokens):
+        return " ".join(equation_str.split())
+
+    parts = [tokens[0].string]
+    for previous, token in zip(tokens, tokens[1:]):
+        words = previous.type != tokenize.OP and token.type != tokenize.OP
+        operator_pair = (
+            previous.type == tokenize.OP
+            and token.type == tokenize.OP
+            and previous.string + token.string[0] in tokenize.EXACT_TOKEN_TYPES
+        )
+        if words or operator_pair:
+            parts.append(" ")
+        parts.append(token.string)
+    return "".join(parts)
+
+
+class CompiledExpression:
+    """Sympy expression with its compiled f and lazily built derivative
+
+    f and f_and_prime come from compile_dual: call them on floats in
+    iteration loops and on numpy arrays for vectorized evaluation.
+    `record()` and `from_record` save and restore everything compiled so
+    far, for the on-disk ExpressionStore.
+    """
+
+    def __init__(self, expr):
+        self.expr = expr
+        self.f = compile_dual(expr)
+        self._f_prime_expr = None
+        self._f_and_prime = None
+        self.derivative_mode = None
+        self._coefficients = None
+        self._derivatives = {}
+        self._lock = Lock()
+
+    def record(self):
+        """Picklable dict of the expression, its derivative and generated sources"""
+        f_and_prime = None
+        if self._f_and_prime is not None:
+            # Autodiff evaluators are rebuilt from the expression, which is cheap
+            f_and_prime = getattr(self._f_and_prime, "source", None)
+        return {
+            "expr": self.expr,
+            "f": self.f.source,
+            "f_prime_expr": self._f_prime_expr,
+            "derivative_mode": self.derivative_mode,
+            "f_and_prime": f_and_prime,
+            "coefficients": self._coefficients,
+            # Sources of compiled derivatives by order, None for autodiff
+            "derivatives": {
+                order: getattr(evaluator, "source", None)
+                for order, evaluator in self._derivatives.items()
+            },
+        }
+
+    @classmethod
+    def from_record(cls, record):
+        entry = cls.__new__(cls)
+        entry.expr = record["expr"]
+        entry.f = load_dual(*record["f"])
+        entry._f_prime_expr = record["f_prime_expr"]
+        entry._f_and_prime = None
+        entry.derivative_mode = record["derivative_mode"]
+        if record["derivative_mode"] == "symbolic":
+            entry._f_and_prime = load_dual(*record["f_and_prime"])
+        elif record["derivative_mode"] == "autodiff":
+            entry._f_and_prime = compile_autodiff(entry.expr)
+        entry._coefficients = record["coefficients"]
+        entry._derivatives = {
+            order: load_dual(*source)
+            if source is not None
+            else compile_autodiff(entry.expr, order)
+            for order, source in record.get("derivatives", {}).items()
+        }
+        entry._lock = Lock()
+        return entry
+
+    @property
+    def f_prime_expr(self):
+        if self._f_prime_expr is None:
+            from sympy import diff, symbols
+
+            with self._lock:
+                if self._f_prime_expr is None:
+                    self._f_prime_expr = diff(self.expr, symbols("x"))
+        return self._f_prime_expr
+
+    @property
+    def polynomial_coefficients(self):
+        """Real coefficients, highest degree first, if the expression is a polynomial in x
+
+        Empty when it is not a polynomial with real numeric coefficients of
+        degree 1 to MAX_POLYNOMIAL_DEGREE.
+        """
+        if self._coefficients is None:
+            from sympy import Poly, PolynomialError, symbols
+
+            x = symbols("x")
+            coefficients = ()
+            if self.expr.is_polynomial(x):
+                try:
+                    poly = Poly(self.expr, x)
+                    if 0 < poly.degree() <= MAX_POLYNOMIAL_DEGREE and all(
+                        c.is_number and c.is_real for c in poly.all_coeffs()
+                    ):
+                        coefficients = tuple(float(c) for c in poly.all_coeffs())
+                except (PolynomialError, TypeError, ValueError):
+                    pass
+            self._coefficients = coefficients
+        return self._coefficients
+
+    @property
+    def f_and_prime(self):
+        """Evaluator of (f(x), f'(x)) in one call
+
+        f and f' are compiled together, so the subexpressions they share
+        are evaluated once per call. When f or its symbolic derivative has
+        more than AUTODIFF_OPS operations (f is checked first, so a large f
+        is never differentiated), or the derivative cannot be compiled, f'
+        is computed by dual-number autodiff of f instead. `derivative_mode`
+        records which one was used: "symbolic" or "autodiff".
+        """
+        if self._f_and_prime is None:
+            from sympy import count_ops
+
+            autodiff = supports_autodiff(self.expr)
+            if autodiff and (
+                count_ops(self.expr) > AUTODIFF_OPS
+                or count_ops(self.f_prime_expr) > AUTODIFF_OPS
+            ):
+                mode, f_and_prime = "autodiff", compile_autodiff(self.expr)
+            else:
+                try:
+                    mode = "symbolic"
+                    f_and_prime = compile_dual((self.expr, self.f_prime_expr))
+                except NotImplementedError:
+                    # e.g. unevaluated Derivative terms of Abs(x)
+                    if not autodiff:
+                        raise
+                    mode, f_and_prime = "autodiff", compile_autodiff(self.expr)
+            with self._lock:
+                if self._f_and_prime is None:
+                    self._f_and_prime = f_and_prime
+                    self.derivative_mode = mode
+        return self._f_and_prime
+
+    def has_derivatives(self, order: int) -> bool:
+        return order in self._derivatives
+
+    def derivatives(self, order: int):
+        """Evaluator of (f, f', ..., f^(order)) in one call, for higher-order methods
+
+        Like f_and_prime: the derivatives are compiled together with f, or
+        computed by autodiff of f on nested Duals when one has more than
+        AUTODIFF_OPS operations or they cannot be compiled. Built once per
+        order. Raises ValueError when neither works.
+        """
+        evaluator = self._derivatives.get(order)
+        if evaluator is None:
+            from sympy import count_ops, diff, symbols
+
+            x = symbols("x")
+            autodiff = supports_autodiff(self.expr)
+            exprs = [self.expr]
+            large = autodiff and count_ops(self.expr) > AUTODIFF_OPS
+            # Stop differentiating as soon as one has swollen
+            while not large and len(exprs) <= order:
+                exprs.append(diff(exprs[-1], x))
+                large = autodiff and count_ops(exprs[-1]) > AUTODIFF_OPS
+            if large:
+                evaluator = compile_autodiff(self.expr, order)
+            else:
+                try:
+                    evaluator = compile_dual(tuple(exprs))
+                except (NotImplementedError, NameError, TypeError) as e:
+                    if not autodiff:
+                        reason = str(e).splitlines()[0] if str(e) else type(e).__name__
+                        raise ValueError(
+                            f"Derivatives up to order {order} cannot be compiled: "
+                            + reason
+                        )
+                    evaluator = compile_autodiff(self.expr, order)
+            with self._lock:
+                evaluator = self._derivatives.setdefault(order, evaluator)
+        return evaluator
+
+
+# Namespaces of FastExpression.bind for f evaluated on Duals
+DUAL_MATH_NAMESPACE = make_namespace(
+    {**dual_functions(math), "Abs": abs, "abs": abs}, dual_pow
+)
+DUAL_NUMPY_NAMESPACE = make_namespace(
+    {**dual_functions(np), "Abs": abs, "abs": abs}, operator.pow
+)
+
+
+class FastCompiledExpression:
+    """Equation of the sympy-free subset, with the interface of CompiledExpression
+
+    f comes straight from the syntax tree (see fast_expression) and
+    f_and_prime from dual-number autodiff of the same tree, so neither
+    parsing nor differentiating needs sympy.
+    """
+
+    derivative_mode = "autodiff"
+
+    def __init__(self, fast):
+        self.fast = fast
+        self.f = fast.f
+        self._f_and_prime = None
+        self._derivatives = {}
+
+    @property
+    def polynomial_coefficients(self):
+        return self.fast.polynomial_coefficients
+
+    @property
+    def f_and_prime(self):
+        if self._f_and_prime is None:
+            self._f_and_prime = dual_evaluator(
+                self.fast.bind(DUAL_MATH_NAMESPACE),
+                self.fast.bind(DUAL_NUMPY_NAMESPACE),
+            )
+        return self._f_and_prime
+
+    def has_derivatives(self, order: int) -> bool:
+        return order in self._derivatives
+
+    def derivatives(self, order: int):
+        """Evaluator of (f, f', ..., f^(order)) by autodiff on nested Duals"""
+        if order not in self._derivatives:
+            self._derivatives[order] = derivatives_evaluator(
+                self.fast.bind(DUAL_MATH_NAMESPACE),
+                self.fast.bind(DUAL_NUMPY_NAMESPACE),
+                order,
+            )
+        return self._derivatives[order]
+
+
+def compile_parametric(key: str, parameter: str, parse):
+    """Evaluator of (f(x, p), df/dx(x, p)) for a normalized equation in x and a parameter
+
+    Equations of the fast_expression subset are differentiated by dual-number
+    autodiff, others symbolically with sympy, which also checks that x and
+    the parameter are the only symbols. `parse` turns the equation into a
+    sympy expression when sympy is needed. Cached by
+    ExpressionCache.get_parametric.
+    """
+    try:
+        fast = parse_fast(key, variables=("x", parameter))
+        return dual_evaluator(
+            fast.bind(DUAL_MATH_NAMESPACE), fast.bind(DUAL_NUMPY_NAMESPACE)
+        )
+    except (Unsupported, SyntaxError):
+        pass
+
+    from sympy import diff, lambdify, symbols
+
+    x, p = symbols(f"x {parameter}")
+    expr = parse(key)
+    unknown = expr.free_symbols - {x, p}
+    if unknown:
+        names = ", ".join(sorted(str(symbol) for symbol in unknown))
+        raise ValueError(f"Equation may only contain x and {parameter}, not {names}")
+    return lambdify((x, p), (expr, diff(expr, x)), modules=["numpy"], cse=True)
+
+
+def compile_mpmath(key: str, parse):
+    """Evaluator of [f(x), f'(x)] in mpmath at the current working precision
+
+    `parse` turns the normalized equation into a sympy expression. Its
+    float literals are replaced by the rationals they spell, so 0.1 is
+    one tenth at any working precision rather than the nearest double.
+    Cached by ExpressionCache.get_mpmath.
+    """
+    from sympy import diff, lambdify, nsimplify, symbols
+
+    x = symbols("x")
+    expr = nsimplify(parse(key), rational=True)
+    return lambdify(x, [expr, diff(expr, x)], modules="mpmath")
+
+
+class ExpressionCache:
+    """Bounded LRU cache of compiled expressions keyed on the normalized equation
+
+    Equations of the fast_expression subset are compiled without sympy.
+    For the others, with an ExpressionStore, misses are first looked up in
+    the store, and equations compiled here are written to it complete with
+    their derivative, so other workers and later restarts skip the parse,
+    diff and lambdify.
+    """
+
+    def __init__(self, maxsize: int = 128, store=None):
+        self.maxsize = maxsize
+        self.store = store
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.store_loads = 0
+        self.store_writes = 0
+
+    def _insert(self, key, entry):
+        """Add an entry unless another thread got there first; return the cached one"""
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                self._entries.move_to_end(key)
+                return existing
+            if self.maxsize <= 0:
+                return entry
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def _lookup(self, key):
+        """Cached entry for a key, or None; counted as a hit or a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        return None
+
+    def _load(self, record):
+        """Entry rebuilt from a stored record, or None if the record is unusable"""
+        try:
+            entry = CompiledExpression.from_record(record)
+        except Exception:
+            # Written by an incompatible version; it is recompiled and replaced
+            self.store.errors += 1
+            return None
+        self.store_loads += 1
+        return entry
+
+    def warm(self):
+        """Load the most recently stored entries, up to maxsize, from the store"""
+        if self.store is None:
+            return
+        # Oldest first, so the newest end up most recently used
+        for key, record in reversed(self.store.recent(self.maxsize)):
+            entry = self._load(record)
+            if entry is not None:
+                self._insert(key, entry)
+
+    def _compile(self, key, parse, timer):
+        with timer.phase("parse"):
+            try:
+                return FastCompiledExpression(parse_fast(key))
+            except (Unsupported, SyntaxError):
+                pass
+
+        if self.store is not None:
+            record = self.store.get(key)
+            if record is not None:
+                with timer.phase("store"):
+                    entry = self._load(record)
+                if entry is not None:
+                    return entry
+
+        # Parse outside the lock so a slow sympify does not block other lookups
+        with timer.phase("parse"):
+            expr = parse(key)
+        with timer.phase("lambdify"):
+            entry = CompiledExpression(expr)
+
+        if self.store is not None:
+            with timer.phase("store"):
+                # Store the derivative too, it is the costliest part to rebuild
+                try:
+                    entry.f_and_prime
+                    entry.polynomial_coefficients
+                except NotImplementedError:
+                    pass
+                self.store.put(key, entry.record())
+            self.store_writes += 1
+        return entry
+
+    def get(
+        self, equation_str: str, parse, timer: PhaseTimer | None = None
+    ) -> CompiledExpression:
+        """Return the cached entry for an equation, parsing it with `parse` on a miss
+
+        On a miss the parse and lambdify phases, or the store phase when the
+        entry is loaded from or written to the store, are recorded in `timer`.
+        """
+        timer = timer or PhaseTimer()
+        key = normalize_equation(equation_str)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry
+        return self._insert(key, self._compile(key, parse, timer))
+
+    def get_derivatives(
+        self, equation_str: str, order: int, parse, timer: PhaseTimer | None = None
+    ):
+        """Return the derivatives(order) evaluator of an equation's cached entry
+
+        Built on first use and timed as diff; equations that need sympy are
+        then written to the store again, with it.
+        """
+        timer = timer or PhaseTimer()
+        entry = self.get(equation_str, parse, timer)
+        if entry.has_derivatives(order):
+            return entry.derivatives(order)
+        with timer.phase("diff"):
+            evaluator = entry.derivatives(order)
+        if self.store is not None and isinstance(entry, CompiledExpression):
+            with timer.phase("store"):
+                self.store.put(normalize_equation(equation_str), entry.record())
+            self.store_writes += 1
+        return evaluator
+
+    def get_parametric(
+        self, equation_str: str, parameter: str, parse, timer: PhaseTimer | None = None
+    ):
+        """Return the cached compile_parametric evaluator of an equation in x and a parameter
+
+        Cached alongside the equations, keyed on the normalized equation and
+        the parameter; a miss is timed as parse. These entries are not
+        written to the store.
+        """
+        timer = timer or PhaseTimer()
+        key = (normalize_equation(equation_str), parameter)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry
+        with timer.phase("parse"):
+            entry = compile_parametric(key[0], parameter, parse)
+        return self._insert(key, entry)
+
+    def get_mpmath(self, equation_str: str, parse):
+        """Return the cached compile_mpmath evaluator of an equation
+
+        Cached alongside the equations, keyed on the normalized equation.
+        These entries are not written to the store.
+        """
+        key = (normalize_equation(equation_str), "mpmath")
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry
+        return self._insert(key, compile_mpmath(key[0], parse))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "store_loads": self.store_loads,
+                "store_writes": self.store_writes,
+                "store_errors": self.store.errors if self.store is not None else 0,
+            }
+
+
+# Process-wide cache shared by every request handled by this worker
+expression_cache = ExpressionCache(
+    int(os.getenv("EXPRESSION_CACHE_SIZE", "128")), store_from_env()
+)
@@ -0,0 +1,107 @@
+import os
+import pickle
+import sqlite3
+import time
+from threading import Lock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS expressions (
+    key TEXT PRIMARY KEY,
+    record BLOB NOT NULL,
+    used_at REAL NOT NULL
+)
+"""
+
+# Errors of unpickling a record written by another version of the code
+RECORD_ERRORS = (
+    pickle.UnpicklingError,
+    AttributeError,
+    EOFError,
+    ImportError,
+    TypeError,
+    ValueError,
+)
+
+
+class ExpressionStore:
+    """SQLite file of compiled expression records shared by every worker
+
+    Records are pickled (see CompiledExpression.record), so the file must
+    only ever be written by this service. Each process opens its own
+    connection; SQLite's locking lets the workers read and write the same
+    file concurrently. Storage errors are counted and otherwise ignored, the
+    store only ever saves work.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = None
+        self._pid = None
+        self._lock = Lock()
+        self.errors = 0
+
+    def _connect(self):
+        # Connections must not cross a fork, open a new one in each worker
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(SCHEMA)
+            connection.commit()
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def get(self, key: str):
+        """The record stored for key, or None"""
+        with self._lock:
+            try:
+                row = (
+                    self._connect()
+                    .execute("SELECT record FROM expressions WHERE key = ?", (key,))
+                    .fetchone()
+                )
+                return None if row is None else pickle.loads(row[0])
+            except (sqlite3.Error, *RECORD_ERRORS):
+                self.errors += 1
+                return None
+
+    def put(self, key: str, record):
+        with self._lock:
+            try:
+                connection = self._connect()
+                connection.execute(
+                    "INSERT OR REPLACE INTO expressions VALUES (?, ?, ?)",
+                    (key, pickle.dumps(record), time.time()),
+                )
+                connection.commit()
+            except (sqlite3.Error, pickle.PicklingError, TypeError):
+                self.errors += 1
+
+    def recent(self, limit: int):
+        """(key, record) pairs of the most recently written records, newest first"""
+        with self._lock:
+            try:
+                rows = (
+                    self._connect()
+                    .execute(
+                        "SELECT key, record FROM expressions ORDER BY used_at DESC LIMIT ?",
+                        (limit,),
+                    )
+                    .fetchall()
+                )
+            except sqlite3.Error:
+                self.errors += 1
+                return []
+
+        records = []
+        for key, blob in rows:
+            try:
+                records.append((key, pickle.loads(blob)))
+            except RECORD_ERRORS:
+                self.errors += 1
+        return records
+
+
+def store_from_env():
+    """ExpressionStore at the EXPRESSION_STORE path, or None when it is not set"""
+    path = os.getenv("EXPRESSION_STORE")
+    return ExpressionStore(path) if path else None
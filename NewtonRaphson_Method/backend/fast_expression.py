@@ -0,0 +1,286 @@
+import ast
+import math
+
+import numpy as np
+from numpy.polynomial import polynomial as P
+
+# Functions of the sympy-free subset, by the names sympify accepts, with
+# their math and numpy implementations
+FUNCTIONS = {
+    "sin": (math.sin, np.sin),
+    "cos": (math.cos, np.cos),
+    "tan": (math.tan, np.tan),
+    "asin": (math.asin, np.arcsin),
+    "acos": (math.acos, np.arccos),
+    "atan": (math.atan, np.arctan),
+    "sinh": (math.sinh, np.sinh),
+    "cosh": (math.cosh, np.cosh),
+    "tanh": (math.tanh, np.tanh),
+    "asinh": (math.asinh, np.arcsinh),
+    "acosh": (math.acosh, np.arccosh),
+    "atanh": (math.atanh, np.arctanh),
+    "exp": (math.exp, np.exp),
+    "log": (math.log, np.log),
+    "sqrt": (math.sqrt, np.sqrt),
+    "Abs": (abs, np.abs),
+    "abs": (abs, np.abs),
+}
+
+CONSTANTS = {"pi": math.pi, "E": math.e}
+
+# Powers with an exponent other than an integer constant call _pow, so a
+# negative base gives nan (through numpy) instead of a Python complex
+POW = "_pow"
+
+# Errors the math module raises where numpy returns nan or inf
+SCALAR_ERRORS = (ValueError, OverflowError, ZeroDivisionError, TypeError)
+
+# Builtins of the compiled code: numpy's warnings (e.g. for log of a
+# negative number) import from the frame that raises them, which fails
+# with no builtins at all; the subset never lets an expression name it
+BUILTINS = {"__import__": __import__}
+
+# Polynomials of higher degree use the general solver, their companion
+# matrix eigenvalues are too ill-conditioned to be useful
+MAX_POLYNOMIAL_DEGREE = 100
+
+DUAL_SOURCE = """
+def f({args}):
+    if x.__class__ is float:
+        try:
+            return {scalar}
+        except SCALAR_ERRORS:
+            pass
+    return vector({args})
+"""
+
+
+class Unsupported(ValueError):
+    """Raised for syntax outside the sympy-free subset"""
+
+
+def is_integer_constant(node):
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        node = node.operand
+    return (
+        isinstance(node, ast.Constant)
+        and isinstance(node.value, int)
+        and not isinstance(node.value, bool)
+    )
+
+
+class SubsetTransformer(ast.NodeTransformer):
+    """Check a tree is in the subset, renaming aliases and rewriting powers to _pow"""
+
+    def __init__(self, aliases, variables):
+        self.aliases = aliases
+        self.variables = variables
+
+    def generic_visit(self, node):
+        if not isinstance(
+            node,
+            (
+                ast.Expression,
+                ast.BinOp,
+                ast.UnaryOp,
+                ast.Call,
+                ast.Name,
+                ast.Constant,
+                ast.Load,
+                ast.Add,
+                ast.Sub,
+                ast.Mult,
+                ast.Div,
+                ast.Pow,
+                ast.USub,
+                ast.UAdd,
+            ),
+        ):
+            raise Unsupported(f"Unsupported syntax: {type(node).__name__}")
+        return super().generic_visit(node)
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise Unsupported(f"Unsupported constant: {node.value!r}")
+        return node
+
+    def visit_Name(self, node):
+        name = self.aliases.get(node.id, node.id)
+        if name not in self.variables and name not in CONSTANTS:
+            raise Unsupported(f"Unsupported name: {node.id}")
+        return ast.copy_location(ast.Name(id=name, ctx=ast.Load()), node)
+
+    def visit_Call(self, node):
+        if (
+            not isinstance(node.func, ast.Name)
+            or node.func.id not in FUNCTIONS
+            or len(node.args) != 1
+            or node.keywords
+        ):
+            raise Unsupported("Unsupported function call")
+        node.args = [self.visit(node.args[0])]
+        return node
+
+    def visit_BinOp(self, node):
+        node = self.generic_visit(node)
+        if isinstance(node.op, ast.Pow) and not is_integer_constant(node.right):
+            call = ast.Call(
+                func=ast.Name(id=POW, ctx=ast.Load()),
+                args=[node.left, node.right],
+                keywords=[],
+            )
+            return ast.copy_location(call, node)
+        return node
+
+
+class ScalarTransformer(ast.NodeTransformer):
+    """Qualify names with the math module for the inlined scalar path"""
+
+    def __init__(self, variables):
+        self.variables = variables
+
+    def visit_Name(self, node):
+        if node.id in self.variables:
+            return node
+        if node.id in ("abs", "Abs"):
+            return ast.Name(id="abs", ctx=ast.Load())
+        if node.id == POW:
+            return ast.Name(id="math.pow", ctx=ast.Load())
+        if node.id == "E":
+            return ast.Name(id="math.e", ctx=ast.Load())
+        return ast.Name(id=f"math.{node.id}", ctx=ast.Load())
+
+
+def make_namespace(functions, pow_function, constants=CONSTANTS):
+    """Globals for a FastExpression's code: function names mapped to implementations"""
+    names = {name: function for name, function in functions.items()}
+    names.update(constants)
+    names[POW] = pow_function
+    names["__builtins__"] = BUILTINS
+    return names
+
+
+MATH_NAMESPACE = make_namespace(
+    {name: pair[0] for name, pair in FUNCTIONS.items()}, math.pow
+)
+NUMPY_NAMESPACE = make_namespace(
+    {name: pair[1] for name, pair in FUNCTIONS.items()}, np.power
+)
+
+
+class FastExpression:
+    """Expression of the sympy-free subset compiled straight from its syntax tree
+
+    The subset is numbers, x, pi and E, + - * / and **, and one-argument
+    calls of FUNCTIONS. `f` evaluates Python floats with the math module,
+    falling back to numpy when that fails, and everything else with numpy,
+    like a sympy-compiled function; its numpy path is the `vector`
+    attribute. `bind` evaluates the expression with other implementations
+    of the functions, e.g. on dual numbers. Expressions with more
+    `variables` than x take them as further arguments, in that order.
+    """
+
+    def __init__(self, tree, variables=("x",)):
+        self.tree = tree
+        self.variables = variables
+        self.source = ast.unparse(tree)
+        lambda_node = ast.Expression(
+            body=ast.Lambda(
+                args=ast.arguments(
+                    posonlyargs=[],
+                    args=[ast.arg(arg=name) for name in variables],
+                    kwonlyargs=[],
+                    kw_defaults=[],
+                    defaults=[],
+                ),
+                body=tree.body,
+            )
+        )
+        ast.fix_missing_locations(lambda_node)
+        self.code = compile(lambda_node, "<fast_expression>", "eval")
+
+        vector = self.bind(NUMPY_NAMESPACE)
+        scalar = ast.unparse(
+            ScalarTransformer(variables).visit(ast.parse(self.source))
+        )
+        names = {"math": math, "vector": vector, "SCALAR_ERRORS": SCALAR_ERRORS}
+        exec(DUAL_SOURCE.format(args=", ".join(variables), scalar=scalar), names)
+        self.f = names["f"]
+        self.f.vector = vector
+        self._coefficients = None
+
+    def bind(self, names):
+        """The expression as a function of x with its names looked up in `names`"""
+        return eval(self.code, names)
+
+    @property
+    def polynomial_coefficients(self):
+        """Real coefficients, highest degree first, if the expression is a polynomial in x
+
+        Empty when it is not a polynomial of degree 1 to MAX_POLYNOMIAL_DEGREE.
+        """
+        if self._coefficients is None:
+            try:
+                terms = P.polytrim(polynomial_terms(self.tree.body))
+            except ValueError:
+                terms = ()
+            if 1 < len(terms) <= MAX_POLYNOMIAL_DEGREE + 1 and np.isfinite(terms).all():
+                self._coefficients = tuple(terms[::-1].tolist())
+            else:
+                self._coefficients = ()
+        return self._coefficients
+
+
+def polynomial_terms(node):
+    """Coefficients (lowest degree first) of an expression node that is a polynomial in x
+
+    Raises ValueError for anything else: function calls, non-integer or
+    negative powers and division by a non-constant.
+    """
+    if isinstance(node, ast.Constant):
+        return np.array([float(node.value)])
+
+    if isinstance(node, ast.Name):
+        if node.id == "x":
+            return np.array([0.0, 1.0])
+        if node.id in CONSTANTS:
+            return np.array([CONSTANTS[node.id]])
+        raise ValueError(f"Not a polynomial in x: {node.id}")
+
+    if isinstance(node, ast.UnaryOp):
+        operand = polynomial_terms(node.operand)
+        return -operand if isinstance(node.op, ast.USub) else operand
+
+    if isinstance(node, ast.BinOp):
+        left = polynomial_terms(node.left)
+        right = polynomial_terms(node.right)
+        if isinstance(node.op, ast.Add):
+            return P.polyadd(left, right)
+        if isinstance(node.op, ast.Sub):
+            return P.polysub(left, right)
+        if isinstance(node.op, ast.Mult):
+            return P.polymul(left, right)
+        if isinstance(node.op, ast.Div) and len(P.polytrim(right)) == 1:
+            if right[0] == 0:
+                raise ValueError("Division by zero")
+            return left / right[0]
+        if isinstance(node.op, ast.Pow) and len(P.polytrim(right)) == 1:
+            exponent = right[0]
+            if exponent == int(exponent) and 0 <= exponent <= MAX_POLYNOMIAL_DEGREE:
+                return P.polypow(left, int(exponent))
+
+    raise ValueError(f"Not a polynomial: {type(node).__name__}")
+
+
+def parse_fast(source: str, aliases=None, variables=("x",)) -> FastExpression:
+    """Compile a normalized expression string without sympy
+
+    `aliases` renames names before the check, e.g. {"e": "E"}, and
+    `variables` lists the names it is a function of, x first. Raises
+    Unsupported when the expression is outside the subset (sympy is needed)
+    and SyntaxError when it does not parse as Python either.
+    """
+    tree = ast.parse(source.strip(), mode="eval")
+    tree = SubsetTransformer(aliases or {}, variables).visit(tree)
+    ast.fix_missing_locations(tree)
+    return FastExpression(tree, variables)
@@ -1,11 +1,36 @@
-from math import isinf, isnan
-from typing import List
-
-import sympy as sp
-from fastapi import FastAPI, HTTPException
+import asyncio
+import bisect
+import json
+import math
+import time
+from typing import Dict, List, Literal
+
+import numpy as np
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from sympy import diff, lambdify, symbols
+
+from chebyshev import (
+    MAX_PIECES,
+    PIECE_DEGREE,
+    Unresolved,
+    chebyshev_roots,
+    enumerate_roots,
+)
+from evaluation import EvaluationBudgetExceeded, Evaluations
+from expression_cache import expression_cache, normalize_equation
+from history import History
+from metrics import Metrics, PhaseTimer
+from precision import (
+    STAGNATED,
+    StagnationMonitor,
+    mpmath_steps,
+    needs_escalation,
+)
+from response_cache import response_cache_from_env
+from systems import compile_system, damped_newton
+from worker_pool import PoolBusyError, group_jobs, pool_from_env
 
 app = FastAPI(title="Newton-Raphson Method API", version="1.0.0")
 
@@ -26,6 +51,29 @@ class EquationRequest(BaseModel):
     max_iterations: int = 100
     search_range: float = 10.0  # Range to search for multiple roots
     num_search_points: int = 20  # Number of initial points to try
+    # Which iterations to return: all, first and last, every n-th, or last n
+    history: Literal["full", "summary", "every_n", "last_k"] = "full"
+    history_n: int = 10
+    # Stop the search once f and f' have been evaluated this many times
+    max_evaluations: int | None = None
+    # Include per-phase timings (timings_ms) in the response
+    include_timings: bool = False
+    # Also return the complex roots when the equation is a polynomial
+    include_complex: bool = False
+    # "adaptive" continues the run from the initial guess in mpmath, at
+    # escalating precision, when float64 is not enough
+    precision: Literal["float64", "adaptive"] = "float64"
+    # Iteration run from the initial guess: Newton (quadratic), Halley
+    # (cubic, also uses f'') or Householder (quartic, also uses f'' and the
+    # third derivative); the multi-start search always uses Newton
+    method: Literal["newton", "halley", "householder"] = "newton"
+    # How the roots are searched for: Newton-Raphson from num_search_points
+    # starts, or "chebyshev": exactly the roots inside the search range, from
+    # a Chebyshev interpolant (multi-start may also report roots outside it)
+    search: Literal["multistart", "chebyshev"] = "multistart"
+
+
+ITERATION_FIELDS = ("iteration", "x_value", "f_x", "f_prime_x", "error")
 
 
 class IterationData(BaseModel):
@@ -36,6 +84,11 @@ class IterationData(BaseModel):
     error: float
 
 
+class ComplexRoot(BaseModel):
+    real: float
+    imag: float
+
+
 class NewtonRaphsonResponse(BaseModel):
     root: float | None
     roots: List[
@@ -47,6 +100,55 @@ class NewtonRaphsonResponse(BaseModel):
     iterations_count: int
     iterations_data: List[IterationData]
     message: str
+    nfev: int = 0  # Evaluations of f and f'
+    nfev_cached: int = 0  # Repeated evaluations answered from the memo
+    queue_wait_ms: float | None = None  # Time spent waiting for a solver worker
+    timings_ms: Dict[str, float] | None = None  # Only with include_timings
+    # "polynomial" (companion matrix eigenvalues), "chebyshev" or "multistart"
+    path: str = "multistart"
+    complex_roots: List[ComplexRoot] | None = None  # Only with include_complex
+    # Answered from the response cache or an identical request in flight
+    cached: bool = False
+    # Only when the adaptive precision mode escalated: the root from the
+    # initial guess as a decimal string and the working precision (digits)
+    precise_root: str | None = None
+    precision_digits: int | None = None
+    method: str = "newton"
+    # Evaluations made by the run from the initial guess, each derivative
+    # counting as one (compare methods by this, not by iterations)
+    iterate_nfev: int = 0
+
+
+class BatchSolveRequest(BaseModel):
+    problems: List[EquationRequest]
+
+
+class BatchSolveItem(BaseModel):
+    index: int  # Position of the problem in the request
+    success: bool
+    result: NewtonRaphsonResponse | None = None
+    error: str | None = None
+
+
+class BatchSolveResponse(BaseModel):
+    results: List[BatchSolveItem]
+    solved: int
+    failed: int
+
+
+class EnumerateRequest(BaseModel):
+    equation: str
+    lower: float
+    upper: float
+    tolerance: float = 1e-6
+    # Limits of the enumeration: largest interpolant degree per piece, most
+    # pieces, smallest piece width (default: a millionth of the range), most
+    # roots and most evaluations of f
+    max_degree: int = PIECE_DEGREE
+    max_pieces: int = MAX_PIECES
+    min_width: float | None = None
+    max_roots: int | None = None
+    max_evaluations: int | None = None
 
 
 class EvaluateRequest(BaseModel):
@@ -63,14 +165,200 @@ class EvaluateResponse(BaseModel):
     points: List[EvaluatePoint]
     success: bool
     message: str
+    queue_wait_ms: float | None = None
 
 
-class NewtonRaphsonSolver:
-    def __init__(self):
-        self.x = symbols("x")
+class SweepRequest(BaseModel):
+    # Equation in x and the parameter, e.g. "x**3 - p*x - 1"
+    equation: str
+    parameter: str = "p"
+    p_values: List[float]
+    # Roots at p_values[0] to follow; by default every root in [lower, upper]
+    initial_guesses: List[float] | None = None
+    lower: float = -10.0
+    upper: float = 10.0
+    tolerance: float = 1e-6
+    max_iterations: int = 50
+    max_branches: int = 100
+    num_search_points: int = 20
+    max_evaluations: int | None = None
+    include_timings: bool = False
+
+
+class SweepResponse(BaseModel):
+    p_values: List[float]
+    # One root curve per branch, aligned with p_values; null where the
+    # branch was lost (e.g. past a fold) or the sweep stopped
+    branches: List[List[float | None]]
+    num_branches: int
+    complete: bool  # Whether every p value was reached
+    message: str
+    nfev: int = 0
+    nfev_cached: int = 0
+    queue_wait_ms: float | None = None
+    timings_ms: Dict[str, float] | None = None  # Only with include_timings
+
+
+class SystemRequest(BaseModel):
+    # One expression per equation, each equal to zero, e.g. ["x**2 + y**2 - 4", "x - y"]
+    equations: List[str]
+    # Order of the unknowns; by default the symbols sorted by name
+    variables: List[str] | None = None
+    initial_guesses: List[List[float]]
+    tolerance: float = 1e-6
+    max_iterations: int = 100
+    # Random starts in the cube of this side around the first initial guess
+    search_range: float = 10.0
+    num_search_points: int = 20
+    max_evaluations: int | None = None
+    include_timings: bool = False
+
+
+class SystemResponse(BaseModel):
+    variables: List[str]
+    root: List[float] | None  # Solution closest to the first initial guess
+    roots: List[List[float]]
+    residuals: List[float]  # max |F| at each root
+    converged: bool
+    iterations_count: int  # Iterations from the first initial guess
+    num_starts: int
+    # "dense" or "block" (independent blocks of the Jacobian)
+    linear_solver: str
+    message: str
+    nfev: int = 0  # Evaluations of the system; with the Jacobian they count twice
+    nfev_cached: int = 0
+    queue_wait_ms: float | None = None
+    timings_ms: Dict[str, float] | None = None  # Only with include_timings
+
+
+def real_array(values, shape):
+    """Float array of the given shape from a function result, NaN where it is complex"""
+    values = np.asarray(values)
+    if np.iscomplexobj(values):
+        values = np.where(values.imag == 0, values.real, np.nan)
+    return np.broadcast_to(values, shape).astype(float)
+
+
+def evaluate_array(func, x_values):
+    """Evaluate a lambdified function on a numpy array in a single call
+
+    Invalid results (complex values, domain errors) come back as NaN. Falls back
+    to point-by-point evaluation for expressions that cannot be vectorized.
+    """
+    x_values = np.asarray(x_values, dtype=float)
+
+    with np.errstate(all="ignore"):
+        try:
+            return real_array(func(x_values), x_values.shape)
+        except (TypeError, ValueError, ZeroDivisionError, OverflowError):
+            pass
+
+        y_values = np.full(x_values.shape, np.nan)
+        for i, x_val in enumerate(x_values.flat):
+            try:
+                y_values.flat[i] = float(func(float(x_val)))
+            except (TypeError, ValueError, ZeroDivisionError, OverflowError):
+                continue
+        return y_values
+
+
+def evaluate_pair(f_and_prime, x_values):
+    """evaluate_array for a fused evaluator: f and f' on a numpy array, as two arrays"""
+    x_values = np.asarray(x_values, dtype=float)
+
+    with np.errstate(all="ignore"):
+        try:
+            f_x, f_prime_x = f_and_prime(x_values)
+            return real_array(f_x, x_values.shape), real_array(f_prime_x, x_values.shape)
+        except (TypeError, ValueError, ZeroDivisionError, OverflowError):
+            pass
+
+        values = np.full((2,) + x_values.shape, np.nan)
+        for i, x_val in enumerate(x_values.flat):
+            try:
+                f_x, f_prime_x = f_and_prime(float(x_val))
+                values[0].flat[i], values[1].flat[i] = float(f_x), float(f_prime_x)
+            except (TypeError, ValueError, ZeroDivisionError, OverflowError):
+                continue
+        return values[0], values[1]
+
+
+# Highest derivative used by each higher-order method
+METHOD_ORDERS = {"halley": 2, "householder": 3}
+
+
+def householder_step(values):
+    """Step of Halley's method from [f, f', f''], or Householder's from [f, ..., f''']
+
+    Falls back to the Newton step where the denominator vanishes or is not
+    finite.
+    """
+    if len(values) == 3:
+        f_x, d1, d2 = values
+        numerator = 2 * f_x * d1
+        denominator = 2 * d1 * d1 - f_x * d2
+    else:
+        f_x, d1, d2, d3 = values
+        numerator = 6 * f_x * d1 * d1 - 3 * f_x * f_x * d2
+        denominator = 6 * d1**3 - 6 * f_x * d1 * d2 + f_x * f_x * d3
+    if denominator == 0 or not math.isfinite(denominator):
+        return f_x / d1
+    return numerator / denominator
+
+
+def polish_roots(f_and_prime, roots, steps: int = 2):
+    """Refine approximate roots with a few Newton steps, all roots at once
+
+    A root whose step is invalid (zero derivative, non-finite values) keeps
+    its previous value.
+    """
+    roots = np.asarray(roots, dtype=float)
+    for _ in range(steps):
+        f_x, f_prime_x = evaluate_pair(f_and_prime, roots)
+        with np.errstate(all="ignore"):
+            polished = roots - f_x / f_prime_x
+        roots = np.where(np.isfinite(polished), polished, roots)
+    return roots
+
 
+def step_events(steps, history: History | None = None):
+    """Run a step generator, yielding its rows as iteration events
+
+    When a history is given the rows are appended to it instead. Returns
+    the generator's return value, the number of rows and the last row.
+    """
+    count, last_row = 0, None
+    while True:
+        try:
+            row = next(steps)
+        except StopIteration as stop:
+            return stop.value, count, last_row
+        count += 1
+        last_row = row
+        if history is not None:
+            history.append(row)
+        else:
+            yield {"type": "iteration", **dict(zip(ITERATION_FIELDS, row))}
+
+
+def record_steps(steps, history: History):
+    """Run a step generator to completion, appending every yielded row to history
+
+    Returns the generator's return value.
+    """
+    while True:
+        try:
+            history.append(next(steps))
+        except StopIteration as stop:
+            return stop.value
+
+
+class NewtonRaphsonSolver:
     def parse_equation(self, equation_str: str):
         """Parse string equation into sympy expression"""
+        # Imported here: equations of the fast_expression subset never need it
+        import sympy as sp
+
         try:
             # Replace common mathematical functions for sympy compatibility
             equation_str = equation_str.replace("^", "**")  # Power operator
@@ -81,66 +369,234 @@ class NewtonRaphsonSolver:
         except Exception as e:
             raise ValueError(f"Invalid equation format: {str(e)}")
 
-    def solve_single(
+    def compile_equation(self, equation_str: str, timer: PhaseTimer | None = None):
+        """Get the parsed and lambdified equation from the process-wide cache"""
+        return expression_cache.get(equation_str, self.parse_equation, timer)
+
+    def newton_steps(
         self,
-        f,
-        f_prime,
+        f_and_prime,
         x0: float,
         tolerance: float = 1e-6,
         max_iterations: int = 100,
+        detect_stagnation: bool = False,
     ):
-        """Solve equation using Newton-Raphson method from a single initial guess"""
-
-        iterations_data = []
+        """Generator core of Newton-Raphson from a single initial guess
+
+        `f_and_prime` returns f(x) and f'(x) together (see
+        CompiledExpression.f_and_prime). Yields each iteration as a row of
+        ITERATION_FIELDS as soon as it is computed and returns (root, status)
+        when the iteration stops. With `detect_stagnation` the run also stops,
+        with status STAGNATED and its last iterate, once float64 stops making
+        progress (see StagnationMonitor).
+        """
         x_current = float(x0)
+        stagnation = StagnationMonitor() if detect_stagnation else None
 
         for i in range(max_iterations):
             try:
                 # Calculate function values
-                f_x = float(f(x_current))
-                f_prime_x = float(f_prime(x_current))
+                f_x, f_prime_x = f_and_prime(x_current)
+                f_x, f_prime_x = float(f_x), float(f_prime_x)
+
+                # Stop where f is undefined (numpy paths return inf or nan)
+                if not math.isfinite(f_x) or math.isnan(f_prime_x):
+                    return None, "Numerical error: f(x) is not finite"
 
                 # Check if derivative is zero
                 if abs(f_prime_x) < 1e-15:
-                    return None, iterations_data, "Derivative is zero"
+                    return None, "Derivative is zero"
 
                 # Calculate next approximation
                 x_next = x_current - f_x / f_prime_x
                 error = abs(x_next - x_current)
 
-                # Store iteration data
-                iterations_data.append(
-                    {
-                        "iteration": i + 1,
-                        "x_value": x_current,
-                        "f_x": f_x,
-                        "f_prime_x": f_prime_x,
-                        "error": error,
-                    }
-                )
+                yield i + 1, x_current, f_x, f_prime_x, error
 
                 # Check for convergence
                 if error < tolerance:
-                    return x_next, iterations_data, "converged"
+                    return x_next, "converged"
+
+                if stagnation is not None and stagnation.update(x_next, error, f_x):
+                    return x_next, STAGNATED
 
                 x_current = x_next
 
             except (OverflowError, ValueError, ZeroDivisionError) as e:
-                return None, iterations_data, f"Numerical error: {str(e)}"
+                return None, f"Numerical error: {str(e)}"
 
         # Maximum iterations reached
-        return None, iterations_data, "Max iterations reached"
+        return None, "Max iterations reached"
+
+    def householder_steps(
+        self,
+        derivatives,
+        x0: float,
+        tolerance: float = 1e-6,
+        max_iterations: int = 100,
+        detect_stagnation: bool = False,
+    ):
+        """newton_steps for Halley's and Householder's methods
+
+        `derivatives` returns f(x) and its derivatives up to the method's
+        order together (see ExpressionCache.get_derivatives). Yields the
+        same rows and returns the same (root, status) as newton_steps.
+        """
+        x_current = float(x0)
+        stagnation = StagnationMonitor() if detect_stagnation else None
+
+        for i in range(max_iterations):
+            try:
+                values = [float(value) for value in derivatives(x_current)]
+                f_x, f_prime_x = values[0], values[1]
+
+                # Stop where f is undefined (numpy paths return inf or nan)
+                if not math.isfinite(f_x) or any(math.isnan(v) for v in values[1:]):
+                    return None, "Numerical error: f(x) is not finite"
+
+                if abs(f_prime_x) < 1e-15:
+                    return None, "Derivative is zero"
+
+                x_next = x_current - householder_step(values)
+                error = abs(x_next - x_current)
+                if not math.isfinite(x_next):
+                    return None, "Numerical error: step is not finite"
+
+                yield i + 1, x_current, f_x, f_prime_x, error
+
+                if error < tolerance:
+                    return x_next, "converged"
+
+                if stagnation is not None and stagnation.update(x_next, error, f_x):
+                    return x_next, STAGNATED
+
+                x_current = x_next
+
+            except (OverflowError, ValueError, ZeroDivisionError) as e:
+                return None, f"Numerical error: {str(e)}"
+
+        return None, "Max iterations reached"
+
+    def solve_single(
+        self,
+        f_and_prime,
+        x0: float,
+        tolerance: float = 1e-6,
+        max_iterations: int = 100,
+    ):
+        """Solve equation using Newton-Raphson method from a single initial guess"""
+        iterations_data = History(ITERATION_FIELDS)
+        root, status = record_steps(
+            self.newton_steps(f_and_prime, x0, tolerance, max_iterations),
+            iterations_data,
+        )
+        return root, iterations_data, status
+
+    def vectorized_steps(
+        self,
+        f_and_prime,
+        x0_values,
+        tolerance: float = 1e-6,
+        max_iterations: int = 100,
+    ):
+        """Run Newton-Raphson from many initial guesses at once in lock-step
+
+        Every starting point is a lane of a numpy array. Lanes that converge or
+        diverge are dropped after each step, so later iterations only evaluate
+        the lanes still running. After each step yields the indices of the lanes
+        that converged together with their roots.
+        """
+        active = np.arange(len(x0_values))
+        x_current = np.asarray(x0_values, dtype=float)
+
+        for _ in range(max_iterations):
+            if active.size == 0:
+                break
+
+            # Calculate function values for all running lanes
+            f_x, f_prime_x = evaluate_pair(f_and_prime, x_current)
+
+            # Lanes with a zero derivative or invalid values diverge
+            diverged = (
+                ~np.isfinite(f_x)
+                | ~np.isfinite(f_prime_x)
+                | (np.abs(f_prime_x) < 1e-15)
+            )
+
+            # Calculate next approximation
+            with np.errstate(all="ignore"):
+                x_next = x_current - f_x / np.where(diverged, 1.0, f_prime_x)
+            diverged |= ~np.isfinite(x_next)
+            error = np.abs(x_next - x_current)
+
+            # Check for convergence and drop finished lanes
+            converged = ~diverged & (error < tolerance)
+            if converged.any():
+                yield active[converged], x_next[converged]
+
+            running = ~(converged | diverged)
+            active = active[running]
+            x_current = x_next[running]
+
+    def solve_vectorized(
+        self,
+        f_and_prime,
+        x0_values,
+        tolerance: float = 1e-6,
+        max_iterations: int = 100,
+    ):
+        """Return the root reached from each initial guess, NaN where it did not converge"""
+        roots = np.full(len(x0_values), np.nan)
+        for lanes, lane_roots in self.vectorized_steps(
+            f_and_prime, x0_values, tolerance, max_iterations
+        ):
+            roots[lanes] = lane_roots
+        return roots
+
+    def polynomial_roots(
+        self, coefficients, f, f_and_prime, tolerance: float = 1e-6
+    ):
+        """All real roots of a polynomial from one eigenvalue solve
+
+        np.roots computes the eigenvalues of the companion matrix. The real
+        parts of the (nearly) real eigenvalues are polished with Newton steps
+        and kept if f(root) ≈ 0, so multiple roots, whose eigenvalues split
+        into a small cluster, still come out as one real root. Returns the
+        verified roots with |f(root)| and the remaining complex eigenvalues.
+        """
+        eigenvalues = np.roots(coefficients)
+        nearly_real = np.abs(eigenvalues.imag) <= 1e-3 * np.maximum(
+            1.0, np.abs(eigenvalues)
+        )
+
+        candidates = polish_roots(f_and_prime, eigenvalues.real[nearly_real])
+        f_values = np.abs(evaluate_array(f, candidates))
+        verified = f_values < tolerance * 10
+        return (
+            candidates[verified],
+            f_values[verified],
+            eigenvalues[~nearly_real],
+        )
 
     def is_duplicate_root(
         self, root: float, existing_roots: List[float], tolerance: float = 1e-4
     ):
-        """Check if a root is a duplicate of an existing root"""
-        for existing_root in existing_roots:
-            if abs(root - existing_root) < tolerance:
-                return True
+        """Check if a root is a duplicate of an existing root
+
+        `existing_roots` must be sorted, only the neighbours of the insertion
+        point are compared.
+        """
+        position = bisect.bisect_left(existing_roots, root)
+        if position > 0 and root - existing_roots[position - 1] < tolerance:
+            return True
+        if (
+            position < len(existing_roots)
+            and existing_roots[position] - root < tolerance
+        ):
+            return True
         return False
 
-    def solve(
+    def solve_events(
         self,
         equation_str: str,
         x0: float,
@@ -148,95 +604,710 @@ class NewtonRaphsonSolver:
         max_iterations: int = 100,
         search_range: float = 10.0,
         num_search_points: int = 20,
+        history: History | None = None,
+        max_evaluations: int | None = None,
+        timer: PhaseTimer | None = None,
+        include_complex: bool = False,
+        precision: str = "float64",
+        method: str = "newton",
+        search: str = "multistart",
     ):
-        """Solve equation using Newton-Raphson method, searching for multiple roots"""
-
-        # Parse the equation
-        f_expr = self.parse_equation(equation_str)
-
-        # Calculate derivative
-        f_prime_expr = diff(f_expr, self.x)
-
-        # Convert to numerical functions
-        f = lambdify(self.x, f_expr, modules=["numpy"])
-        f_prime = lambdify(self.x, f_prime_expr, modules=["numpy"])
+        """Generator core of solve, yielding results as soon as they are known
+
+        Yields `iteration` events for the run from the initial guess, a `root`
+        event for every new root found by the multi-start search and a final
+        `result` event with the summary fields of the solve response. When a
+        history is given, iterations are recorded into it instead of yielded.
+        The search stops once `max_evaluations` evaluations of f and f' have
+        been made; roots verified before that are still reported. Phases are
+        timed into `timer`: parse, diff and lambdify (only on cache misses),
+        iterate (run from the initial guess) and search (multi-start). When the
+        events are streamed these also include the time spent sending them.
+
+        Polynomials skip the multi-start search: all their real roots come
+        from the companion matrix eigenvalues (the "polynomial" path), and
+        with `include_complex` the complex roots are reported as well. With
+        `search` "chebyshev", other equations are first interpolated on the
+        search range by a Chebyshev series whose roots are all the roots in
+        the range (the "chebyshev" path); the multi-start search only runs
+        when f cannot be resolved there, e.g. because of poles or points
+        where it is undefined.
+
+        With `precision` "adaptive", a run from the initial guess that
+        stagnates, fails to verify or cannot reach the tolerance in float64
+        continues from its last iterate in mpmath at escalating precision
+        (the escalate phase); its steps are reported as further iterations.
+
+        `method` "halley" or "householder" runs the iteration from the initial
+        guess with that method instead of Newton's; the higher derivatives
+        are compiled with f and f' into one cached evaluator (timed under
+        diff on first use).
+        """
+        timer = timer or PhaseTimer()
+
+        # Parse the equation, calculate its derivative and compile f and f'
+        # into one evaluator (cached across requests)
+        compiled = self.compile_equation(equation_str, timer)
+        with timer.phase("diff"):
+            compiled.f_and_prime
+
+        # All evaluations of this solve are counted against one budget; a
+        # call of f_and_prime evaluates both f and f'
+        evaluations = Evaluations(max_evaluations)
+        f = evaluations.wrap(compiled.f)
+        f_and_prime = evaluations.wrap(compiled.f_and_prime, cost=2)
 
         # Generate search points around the initial guess
         start_point = x0 - search_range / 2
         end_point = x0 + search_range / 2
-        step = search_range / (num_search_points - 1) if num_search_points > 1 else 0
-
-        search_points = [start_point + i * step for i in range(num_search_points)]
+        search_points = np.linspace(start_point, end_point, max(num_search_points, 0))
 
         # Also include the exact initial guess
         if x0 not in search_points:
-            search_points.append(x0)
+            search_points = np.append(search_points, x0)
 
-        all_roots = []
-        all_iterations_data = []
-        converged_count = 0
+        coefficients = compiled.polynomial_coefficients
+        path = "polynomial" if coefficients else "multistart"
+        complex_roots = []
 
-        # Try to find roots from each search point
-        for initial_point in search_points:
-            root, iterations_data, status = self.solve_single(
-                f, f_prime, initial_point, tolerance, max_iterations
-            )
+        iterations_count = 0
+        iterate_nfev = None
+        initial_root, initial_error = None, None
+        precise_root, precision_digits = None, None
+        all_roots = []
+        root_errors = {}
+        try:
+            # Iteration data is reported for the run from the initial guess
+            if method in METHOD_ORDERS:
+                derivatives = expression_cache.get_derivatives(
+                    equation_str, METHOD_ORDERS[method], self.parse_equation, timer
+                )
 
-            if root is not None and status == "converged":
-                # Verify it's actually a root (f(root) ≈ 0)
-                try:
-                    f_root = abs(float(f(root)))
-                    if f_root < tolerance * 10:  # Relaxed tolerance for verification
+            with timer.phase("iterate"):
+                if method in METHOD_ORDERS:
+                    steps = self.householder_steps(
+                        evaluations.wrap(derivatives, cost=METHOD_ORDERS[method] + 1),
+                        x0,
+                        tolerance,
+                        max_iterations,
+                        detect_stagnation=precision == "adaptive",
+                    )
+                else:
+                    steps = self.newton_steps(
+                        f_and_prime,
+                        x0,
+                        tolerance,
+                        max_iterations,
+                        detect_stagnation=precision == "adaptive",
+                    )
+                (initial_root, status), iterations_count, last_row = yield from (
+                    step_events(steps, history)
+                )
+                iterate_nfev = evaluations.nfev
+
+                # Verify the root reached from the initial guess up front, so it
+                # is still reported if the budget runs out during the search
+                if initial_root is not None:
+                    try:
+                        initial_error = abs(float(f(initial_root)))
+                    except (TypeError, ValueError, ZeroDivisionError, OverflowError):
+                        pass
+
+            # Continue in mpmath from the last iterate only when float64 failed
+            last_x, last_error = x0, None
+            if last_row is not None:
+                _, x_value, f_x, f_prime_x, last_error = last_row
+                last_x = x_value - f_x / f_prime_x
+            if initial_root is not None:
+                # Where the run stopped; higher-order steps are not Newton's
+                last_x = initial_root
+            if precision == "adaptive" and needs_escalation(
+                status, last_x, last_error, initial_error, tolerance
+            ):
+                with timer.phase("escalate"):
+                    f_and_prime_mp = evaluations.wrap(
+                        expression_cache.get_mpmath(equation_str, self.parse_equation),
+                        cost=2,
+                    )
+                    steps = mpmath_steps(
+                        f_and_prime_mp,
+                        last_x,
+                        tolerance,
+                        max_iterations,
+                        first=iterations_count + 1,
+                    )
+                    result, count, _ = yield from step_events(steps, history)
+                    iterations_count += count
+                    precise_root, precise_error, precision_digits = result
+                    if precise_root is not None:
+                        initial_root, initial_error = float(precise_root), precise_error
+
+            with timer.phase("search"):
+                batches = None
+                if coefficients:
+                    # One eigenvalue solve finds every root of a polynomial
+                    roots, f_values, eigenvalues = self.polynomial_roots(
+                        coefficients, f, f_and_prime, tolerance
+                    )
+                    batches = [(roots, f_values)]
+                    complex_roots = [
+                        {"real": z.real, "imag": z.imag} for z in eigenvalues.tolist()
+                    ]
+                elif search == "chebyshev" and end_point > start_point:
+                    # Every root of the Chebyshev interpolant on the search range
+                    try:
+                        roots, _ = chebyshev_roots(
+                            lambda x: evaluate_array(f, x), start_point, end_point
+                        )
+                        path = "chebyshev"
+                        batches = [(roots, np.abs(evaluate_array(f, roots)))]
+                    except Unresolved:
+                        pass
+
+                if batches is None:
+                    # Iterate all search points at once, verifying the roots
+                    # (f(root) ≈ 0, relaxed tolerance) as their lanes converge
+                    batches = (
+                        (candidates, np.abs(evaluate_array(f, candidates)))
+                        for _, candidates in self.vectorized_steps(
+                            f_and_prime, search_points, tolerance, max_iterations
+                        )
+                    )
+
+                # Report each new verified root
+                for candidates, f_values in batches:
+                    verified = f_values < tolerance * 10
+                    for root, f_value in zip(
+                        candidates[verified].tolist(), f_values[verified].tolist()
+                    ):
                         if not self.is_duplicate_root(root, all_roots, tolerance * 10):
-                            all_roots.append(root)
-                            converged_count += 1
-                            # Store iterations data for the first occurrence from initial guess
-                            if abs(initial_point - x0) < tolerance:
-                                all_iterations_data = iterations_data
-                except:
-                    pass
-
-        # If no iterations data stored yet, use data from the initial guess
-        if not all_iterations_data and search_points:
-            root, iterations_data, status = self.solve_single(
-                f, f_prime, x0, tolerance, max_iterations
-            )
-            all_iterations_data = iterations_data
-
-        # Sort roots for consistent output
-        all_roots.sort()
+                            bisect.insort(all_roots, root)
+                            root_errors[root] = f_value
+                            yield {"type": "root", "root": root}
+        except EvaluationBudgetExceeded:
+            # Stop searching; the roots verified so far are still reported
+            pass
+
+        if (
+            initial_error is not None
+            and initial_error < tolerance * 10
+            and not self.is_duplicate_root(initial_root, all_roots, tolerance * 10)
+        ):
+            bisect.insort(all_roots, initial_root)
+            root_errors[initial_root] = initial_error
+            yield {"type": "root", "root": initial_root}
 
         # Determine primary root (closest to initial guess)
         primary_root = None
         if all_roots:
             primary_root = min(all_roots, key=lambda r: abs(r - x0))
 
-        # Calculate final error
+        # Final error is |f(root)| from the verification step
         final_error = 0.0
         if primary_root is not None:
-            try:
-                final_error = abs(float(f(primary_root)))
-            except:
-                final_error = float("inf")
+            final_error = root_errors[primary_root]
 
         # Build response
-        if len(all_roots) > 0:
+        if len(all_roots) > 0 and coefficients:
+            message = f"Found {len(all_roots)} real root(s) of the polynomial."
+            converged = True
+        elif len(all_roots) > 0:
             message = f"Found {len(all_roots)} root(s) in the search range."
             converged = True
+        elif coefficients and not evaluations.exhausted:
+            message = "The polynomial has no real roots."
+            converged = False
         else:
             message = "No roots found in the search range. Try adjusting initial guess or search range."
             converged = False
-            all_roots = []
+        if evaluations.exhausted:
+            message += (
+                f" Search stopped after {evaluations.nfev} function evaluations"
+                " (max_evaluations reached)."
+            )
+        if precision_digits is not None:
+            outcome = "converged" if precise_root is not None else "did not converge"
+            message += (
+                f" The run from the initial guess {outcome} in mpmath at"
+                f" {precision_digits} digits."
+            )
 
-        return {
+        yield {
+            "type": "result",
             "root": primary_root,
             "roots": all_roots,
             "converged": converged,
             "total_error": final_error,
             "final_error": final_error,
-            "iterations_count": len(all_iterations_data),
-            "iterations_data": all_iterations_data,
+            "iterations_count": iterations_count,
             "message": message,
+            "path": path,
+            "complex_roots": complex_roots if include_complex else None,
+            "precise_root": precise_root,
+            "precision_digits": precision_digits,
+            "method": method,
+            # All evaluations when the budget ran out during that run
+            "iterate_nfev": evaluations.nfev if iterate_nfev is None else iterate_nfev,
+            **evaluations.stats(),
+        }
+
+    def solve(
+        self,
+        equation_str: str,
+        x0: float,
+        tolerance: float = 1e-6,
+        max_iterations: int = 100,
+        search_range: float = 10.0,
+        num_search_points: int = 20,
+        history_mode: str = "full",
+        history_n: int = 10,
+        max_evaluations: int | None = None,
+        include_complex: bool = False,
+        precision: str = "float64",
+        method: str = "newton",
+        search: str = "multistart",
+    ):
+        """Solve equation using Newton-Raphson method, searching for multiple roots
+
+        `history_mode` (full, summary, every_n, last_k) and `history_n` choose
+        which iterations are returned in iterations_data. `max_evaluations`
+        caps the evaluations of f and f' made by the whole search. The time
+        spent in each phase, in seconds, is returned under "timings".
+        `include_complex` adds the complex roots of polynomials, and
+        `precision` "adaptive" lets the run from the initial guess escalate to
+        mpmath (see solve_events). `method` chooses Newton, Halley or
+        Householder for that run, and `search` how the other roots are found.
+        """
+        timer = PhaseTimer()
+        all_iterations_data = History(ITERATION_FIELDS)
+        result = {}
+
+        for event in self.solve_events(
+            equation_str,
+            x0,
+            tolerance,
+            max_iterations,
+            search_range,
+            num_search_points,
+            history=all_iterations_data,
+            max_evaluations=max_evaluations,
+            timer=timer,
+            include_complex=include_complex,
+            precision=precision,
+            method=method,
+            search=search,
+        ):
+            if event.pop("type") == "result":
+                result = event
+
+        with timer.phase("history"):
+            iterations_data = all_iterations_data.to_rows(history_mode, history_n)
+
+        return {**result, "iterations_data": iterations_data, "timings": timer.timings}
+
+    def enumerate_events(
+        self,
+        equation_str: str,
+        lower: float,
+        upper: float,
+        tolerance: float = 1e-6,
+        max_degree: int = PIECE_DEGREE,
+        min_width: float | None = None,
+        max_pieces: int = MAX_PIECES,
+        max_roots: int | None = None,
+        max_evaluations: int | None = None,
+    ):
+        """Generator of every root of f on [lower, upper], for wide ranges
+
+        The range is subdivided adaptively (chebyshev.enumerate_roots) and a
+        `roots` event with the new verified roots is yielded as soon as each
+        piece is done, from left to right. Pieces where f could not be
+        resolved, e.g. around poles, are yielded as `skipped` events. Roots
+        are kept in a sorted list, so a root found again at the edge of the
+        next piece is dropped by bisection instead of a scan over all roots.
+        Stops at `max_pieces` pieces, `max_roots` roots or `max_evaluations`
+        evaluations of f, then yields a final `result` event.
+        """
+        if not upper > lower:
+            raise ValueError("upper must be greater than lower")
+
+        compiled = self.compile_equation(equation_str)
+        evaluations = Evaluations(max_evaluations)
+        f = evaluations.wrap(compiled.f)
+
+        all_roots = []
+        pieces, skipped = 0, 0
+        covered = lower
+        truncated = False
+        try:
+            for piece_lower, piece_upper, roots in enumerate_roots(
+                lambda x: evaluate_array(f, x),
+                lower,
+                upper,
+                max_degree,
+                min_width,
+                max_pieces,
+            ):
+                pieces += 1
+                if roots is None:
+                    skipped += 1
+                    covered = piece_upper
+                    yield {"type": "skipped", "lower": piece_lower, "upper": piece_upper}
+                    continue
+
+                # Verify the roots (f(root) ≈ 0, relaxed tolerance) and drop repeats
+                verified = np.abs(evaluate_array(f, roots)) < tolerance * 10
+                new_roots = []
+                for root in roots[verified].tolist():
+                    if max_roots is not None and len(all_roots) >= max_roots:
+                        truncated = True
+                        break
+                    if not self.is_duplicate_root(root, all_roots, tolerance * 10):
+                        bisect.insort(all_roots, root)
+                        new_roots.append(root)
+                # A piece cut short by max_roots is covered up to its last root
+                covered = all_roots[-1] if truncated and all_roots else piece_upper
+                yield {
+                    "type": "roots",
+                    "lower": piece_lower,
+                    "upper": piece_upper,
+                    "roots": new_roots,
+                }
+                if truncated:
+                    break
+        except EvaluationBudgetExceeded:
+            # Stop enumerating; the roots verified so far have been reported
+            pass
+
+        # Pieces are done from left to right, the last one ends at `upper`
+        # unless the enumeration stopped early
+        complete = covered >= upper and not truncated
+        if complete:
+            message = f"Found {len(all_roots)} root(s) in [{lower}, {upper}]."
+        else:
+            if truncated:
+                reason = "max_roots"
+            elif evaluations.exhausted:
+                reason = "max_evaluations"
+            else:
+                reason = "max_pieces"
+            message = (
+                f"Found {len(all_roots)} root(s) in [{lower}, {covered}]"
+                f" ({reason} reached)."
+            )
+        if skipped:
+            message += f" f could not be resolved on {skipped} piece(s)."
+
+        yield {
+            "type": "result",
+            "num_roots": len(all_roots),
+            "complete": complete,
+            "covered": covered,
+            "pieces": pieces,
+            "skipped_pieces": skipped,
+            "message": message,
+            **evaluations.stats(),
+        }
+
+    def branch_starts(
+        self,
+        f_and_prime,
+        initial_guesses,
+        lower: float,
+        upper: float,
+        tolerance: float = 1e-6,
+        max_iterations: int = 50,
+        num_search_points: int = 20,
+    ):
+        """Sorted distinct roots of f, the starting points of a parameter sweep
+
+        Roots are iterated from `initial_guesses` when given, otherwise they
+        are the roots of a Chebyshev interpolant on [lower, upper], or the
+        roots reached by a multi-start search there when f cannot be
+        resolved. Only roots with f(root) ≈ 0 (relaxed tolerance) are kept.
+        """
+        if initial_guesses:
+            candidates = self.solve_vectorized(
+                f_and_prime, initial_guesses, tolerance, max_iterations
+            )
+        else:
+            try:
+                roots, _ = chebyshev_roots(
+                    lambda x: evaluate_pair(f_and_prime, x)[0], lower, upper
+                )
+                candidates = polish_roots(f_and_prime, roots)
+            except Unresolved:
+                candidates = self.solve_vectorized(
+                    f_and_prime,
+                    np.linspace(lower, upper, max(num_search_points, 0)),
+                    tolerance,
+                    max_iterations,
+                )
+
+        candidates = candidates[np.isfinite(candidates)]
+        f_values = np.abs(evaluate_pair(f_and_prime, candidates)[0])
+        starts = []
+        for root in np.sort(candidates[f_values < tolerance * 10]).tolist():
+            if not self.is_duplicate_root(root, starts, tolerance * 10):
+                starts.append(root)
+        return np.array(starts, dtype=float)
+
+    def continue_branches(
+        self,
+        f_and_prime,
+        predicted,
+        previous,
+        tolerance: float = 1e-6,
+        max_iterations: int = 50,
+    ):
+        """One continuation step of a sweep for all running branches at once
+
+        Newton runs from the predicted roots in lock-step; lanes that fail are
+        retried from the branch's previous root. Roots that are not verified
+        (f(root) ≈ 0, relaxed tolerance) come back as NaN, and when two
+        branches converge to the same root only the one that moved least
+        keeps it, e.g. where two branches meet at a fold.
+        """
+        roots = self.solve_vectorized(f_and_prime, predicted, tolerance, max_iterations)
+        retry = ~np.isfinite(roots) & (predicted != previous)
+        if retry.any():
+            roots[retry] = self.solve_vectorized(
+                f_and_prime, previous[retry], tolerance, max_iterations
+            )
+
+        running = np.flatnonzero(np.isfinite(roots))
+        f_values = np.abs(evaluate_pair(f_and_prime, roots[running])[0])
+        roots[running[~(f_values < tolerance * 10)]] = np.nan
+
+        kept = []
+        for lane in sorted(np.flatnonzero(np.isfinite(roots)), key=roots.__getitem__):
+            if kept and roots[lane] - roots[kept[-1]] < tolerance * 10:
+                if abs(roots[lane] - previous[lane]) < abs(
+                    roots[kept[-1]] - previous[kept[-1]]
+                ):
+                    roots[kept[-1]] = np.nan
+                    kept[-1] = lane
+                else:
+                    roots[lane] = np.nan
+                continue
+            kept.append(lane)
+        return roots
+
+    def sweep(
+        self,
+        equation_str: str,
+        parameter: str,
+        p_values: List[float],
+        initial_guesses: List[float] | None = None,
+        lower: float = -10.0,
+        upper: float = 10.0,
+        tolerance: float = 1e-6,
+        max_iterations: int = 50,
+        max_branches: int = 100,
+        num_search_points: int = 20,
+        max_evaluations: int | None = None,
+    ):
+        """Follow every root branch of f(x, p) = 0 across a grid of parameter values
+
+        The equation is compiled once into an evaluator of f and df/dx in x
+        and p. The branches are the roots at p_values[0] (see branch_starts,
+        at most `max_branches`); each following p value warm-starts every
+        branch from its root at the previous p, extrapolated linearly from
+        the two previous roots, and all branches are iterated together (see
+        continue_branches). A lost branch stays NaN from there on. Phases are
+        timed under "timings": parse, start and continue.
+        """
+        if not p_values:
+            raise ValueError("p_values must not be empty")
+        if not initial_guesses and not upper > lower:
+            raise ValueError("upper must be greater than lower")
+
+        timer = PhaseTimer()
+        f_and_prime_xp = expression_cache.get_parametric(
+            equation_str, parameter, self.parse_equation, timer
+        )
+
+        # One budget for the whole sweep; each p value gets its own wrapped
+        # evaluator, since the memo is keyed on x alone
+        evaluations = Evaluations(max_evaluations)
+
+        def at(p: float):
+            return evaluations.wrap(lambda x: f_and_prime_xp(x, p), cost=2)
+
+        p_array = np.asarray(p_values, dtype=float)
+        curves = np.full((0, p_array.size), np.nan)
+        reached = 0
+        try:
+            with timer.phase("start"):
+                starts = self.branch_starts(
+                    at(float(p_array[0])),
+                    initial_guesses,
+                    lower,
+                    upper,
+                    tolerance,
+                    max_iterations,
+                    num_search_points,
+                )[: max(max_branches, 0)]
+                curves = np.full((starts.size, p_array.size), np.nan)
+                curves[:, 0] = starts
+                reached = 1
+
+            with timer.phase("continue"):
+                for j in range(1, p_array.size):
+                    running = np.flatnonzero(np.isfinite(curves[:, j - 1]))
+                    if running.size == 0:
+                        reached = p_array.size
+                        break
+
+                    # Predict each root by extrapolating the branch over p
+                    previous = curves[running, j - 1]
+                    predicted = previous.copy()
+                    if j > 1 and p_array[j - 1] != p_array[j - 2]:
+                        slope = (previous - curves[running, j - 2]) / (
+                            p_array[j - 1] - p_array[j - 2]
+                        )
+                        step = slope * (p_array[j] - p_array[j - 1])
+                        predicted = np.where(np.isfinite(step), previous + step, previous)
+
+                    curves[running, j] = self.continue_branches(
+                        at(float(p_array[j])),
+                        predicted,
+                        previous,
+                        tolerance,
+                        max_iterations,
+                    )
+                    reached = j + 1
+        except EvaluationBudgetExceeded:
+            # Stop sweeping; the roots up to the last complete p value are kept
+            pass
+
+        num_branches = curves.shape[0]
+        complete = reached == p_array.size
+        if num_branches == 0 and evaluations.exhausted:
+            message = f"No roots found yet at {parameter} = {p_values[0]}."
+        elif num_branches == 0:
+            message = f"No roots found at {parameter} = {p_values[0]}."
+        else:
+            lost = int(np.count_nonzero(~np.isfinite(curves[:, reached - 1])))
+            message = (
+                f"Tracked {num_branches} branch(es) over {reached} value(s) of"
+                f" {parameter}."
+            )
+            if lost:
+                message += f" {lost} branch(es) were lost on the way."
+        if evaluations.exhausted:
+            message += (
+                f" Sweep stopped after {evaluations.nfev} function evaluations"
+                " (max_evaluations reached)."
+            )
+
+        branches = [
+            [None if math.isnan(root) else root for root in curve]
+            for curve in curves.tolist()
+        ]
+        return {
+            "p_values": p_array.tolist(),
+            "branches": branches,
+            "num_branches": num_branches,
+            "complete": complete,
+            "message": message,
+            **evaluations.stats(),
+            "timings": timer.timings,
+        }
+
+    def solve_system(
+        self,
+        equations: List[str],
+        variables: List[str] | None,
+        initial_guesses: List[List[float]],
+        tolerance: float = 1e-6,
+        max_iterations: int = 100,
+        search_range: float = 10.0,
+        num_search_points: int = 20,
+        max_evaluations: int | None = None,
+    ):
+        """Solve a square system of equations by damped Newton from many starting points
+
+        The system and its Jacobian are compiled once (systems.compile_system,
+        cached). The initial guesses and `num_search_points` random points
+        in the cube of side `search_range` around the first guess are
+        iterated together (systems.damped_newton); the converged points with
+        max |F| below the relaxed tolerance are the solutions, without
+        repeats. Phases are timed under "timings": parse and iterate.
+        """
+        if not equations:
+            raise ValueError("equations must not be empty")
+        if not initial_guesses:
+            raise ValueError("initial_guesses must not be empty")
+
+        timer = PhaseTimer()
+        with timer.phase("parse"):
+            system = compile_system(
+                tuple(normalize_equation(equation) for equation in equations),
+                tuple(variables or ()),
+                self.parse_equation,
+            )
+        if any(len(guess) != system.size for guess in initial_guesses):
+            raise ValueError(
+                f"Each initial guess must have {system.size} values"
+                f" ({', '.join(system.variables)})"
+            )
+
+        # Random starts are seeded, so a request always gives the same answer
+        starts = np.asarray(initial_guesses, dtype=float)
+        if num_search_points > 0 and search_range > 0:
+            random_starts = np.random.default_rng(0).uniform(
+                starts[0] - search_range / 2,
+                starts[0] + search_range / 2,
+                size=(num_search_points, system.size),
+            )
+            starts = np.concatenate([starts, random_starts])
+
+        evaluations = Evaluations(max_evaluations)
+        with timer.phase("iterate"):
+            points, residual_norms, converged, iterations = damped_newton(
+                system, starts, evaluations, tolerance, max_iterations
+            )
+
+        # Keep verified solutions, dropping those already found from another start
+        roots, residuals = [], []
+        for lane in np.flatnonzero(converged & (residual_norms < tolerance * 10)):
+            point = points[lane]
+            if not any(
+                np.max(np.abs(point - root)) < tolerance * 10 for root in roots
+            ):
+                roots.append(point)
+                residuals.append(float(residual_norms[lane]))
+        order = sorted(range(len(roots)), key=lambda i: roots[i].tolist())
+        roots = [roots[i].tolist() for i in order]
+        residuals = [residuals[i] for i in order]
+
+        root = None
+        if roots:
+            root = min(roots, key=lambda r: np.linalg.norm(np.subtract(r, starts[0])))
+
+        if roots:
+            message = f"Found {len(roots)} solution(s) from {len(starts)} starting point(s)."
+        else:
+            message = "No solutions found. Try other initial guesses or a wider search range."
+        if evaluations.exhausted:
+            message += (
+                f" Search stopped after {evaluations.nfev} function evaluations"
+                " (max_evaluations reached)."
+            )
+
+        return {
+            "variables": system.variables,
+            "root": root,
+            "roots": roots,
+            "residuals": residuals,
+            "converged": bool(roots),
+            "iterations_count": int(iterations[0]),
+            "num_starts": len(starts),
+            "linear_solver": system.linear_solver,
+            "message": message,
+            **evaluations.stats(),
+            "timings": timer.timings,
         }
 
 
@@ -244,14 +1315,240 @@ class NewtonRaphsonSolver:
 solver = NewtonRaphsonSolver()
 
 
+def solve_task(*args):
+    """Solve an equation inside a pool worker"""
+    return solver.solve(*args)
+
+
+def solve_batch_task(groups):
+    """Solve groups of problems that share an equation inside a pool worker
+
+    `groups` is a list of (equation, [(index, solve arguments), ...]). Returns
+    (index, result, error) for every problem; a failing problem only sets its
+    own error.
+    """
+    results = []
+    for equation, problems in groups:
+        try:
+            # Compile once for the whole group; later solves hit the cache
+            solver.compile_equation(equation)
+        except ValueError as e:
+            results.extend((index, None, str(e)) for index, _ in problems)
+            continue
+
+        for index, args in problems:
+            try:
+                results.append((index, solver.solve(equation, *args), None))
+            except Exception as e:
+                results.append((index, None, str(e)))
+
+    return results
+
+
+def solve_events_task(args, options):
+    """Stream the events of solve_events(*args, **options) from inside a pool worker
+
+    Yields None first, once the equation (and its higher derivatives, for
+    Halley or Householder) has compiled, so invalid equations fail before
+    any event.
+    """
+    solver.compile_equation(args[0])
+    method = options.get("method", "newton")
+    if method in METHOD_ORDERS:
+        expression_cache.get_derivatives(
+            args[0], METHOD_ORDERS[method], solver.parse_equation
+        )
+    yield None
+    yield from solver.solve_events(*args, **options)
+
+
+def enumerate_events_task(*args):
+    """Stream the events of enumerate_events from inside a pool worker
+
+    Yields None first, once the equation has compiled.
+    """
+    solver.compile_equation(args[0])
+    yield None
+    yield from solver.enumerate_events(*args)
+
+
+def sweep_task(*args):
+    """Run a parameter sweep inside a pool worker"""
+    return solver.sweep(*args)
+
+
+def system_task(*args):
+    """Solve a system of equations inside a pool worker"""
+    return solver.solve_system(*args)
+
+
+def evaluate_task(equation: str, x_values: List[float]):
+    """Evaluate an equation at many points inside a pool worker"""
+    # Parse the equation and convert to numerical function (cached)
+    f = solver.compile_equation(equation).f
+
+    # Evaluate all points in a single array call and keep the finite ones
+    x_values = np.asarray(x_values, dtype=float)
+    y_values = evaluate_array(f, x_values)
+    valid = np.isfinite(y_values)
+    failed_points = int(x_values.size - np.count_nonzero(valid))
+
+    points = [
+        {"x": x_val, "y": y_val}
+        for x_val, y_val in zip(x_values[valid].tolist(), y_values[valid].tolist())
+    ]
+
+    if len(points) == 0:
+        return {
+            "points": [],
+            "success": False,
+            "message": "Could not evaluate function at any of the provided points",
+        }
+
+    message = f"Successfully evaluated {len(points)} points"
+    if failed_points > 0:
+        message += f" ({failed_points} points failed)"
+
+    return {"points": points, "success": True, "message": message}
+
+
+def solve_response_content(result, queue_wait: float, include_timings: bool = False):
+    """JSON content of a solve response and the phase timings of the solve
+
+    The summary fields are validated through NewtonRaphsonResponse, while the
+    iteration rows, already serialized from the history arrays, are passed
+    through as they are instead of building an IterationData model per row.
+    The queue wait and the time spent here are added to the timings as the
+    queue_wait and serialize phases.
+    """
+    serialize_start = time.perf_counter()
+    timings = result.pop("timings")
+    iterations_data = result.pop("iterations_data")
+    response = NewtonRaphsonResponse(
+        **result, iterations_data=[], queue_wait_ms=queue_wait * 1000
+    )
+    content = response.model_dump(mode="json")
+    content["iterations_data"] = iterations_data
+
+    timings["queue_wait"] = queue_wait
+    timings["serialize"] = time.perf_counter() - serialize_start
+    if include_timings:
+        content["timings_ms"] = {
+            phase: seconds * 1000 for phase, seconds in timings.items()
+        }
+    return content, timings
+
+
+def solve_cache_key(request: EquationRequest):
+    """Response cache key of a /solve request: the normalized equation and every other field
+
+    normalize_equation only tokenizes the equation, so building the key in
+    the API process never imports sympy.
+    """
+    params = request.model_dump(exclude={"equation"})
+    return normalize_equation(request.equation), tuple(sorted(params.items()))
+
+
+def record_solve(endpoint: str, converged: bool, timings=None):
+    """Count a finished solve and observe its phase timings in the metrics"""
+    metrics.inc("solves_total", endpoint=endpoint)
+    if not converged:
+        metrics.inc("convergence_failures_total", endpoint=endpoint)
+    if timings is not None:
+        metrics.observe_phases(timings, endpoint=endpoint)
+
+
+def format_event(event, sse: bool = False):
+    """Serialize a solver event as an NDJSON line or a server-sent event"""
+    payload = json.dumps(event)
+    if sse:
+        return f"event: {event['type']}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+
+async def start_stream(events, endpoint: str):
+    """Wait for a streaming job to start (its first item, None) before responding
+
+    So a full queue still gets a 503 response and an invalid equation a 400.
+    """
+    try:
+        await anext(events)
+    except PoolBusyError as e:
+        metrics.inc("errors_total", endpoint=endpoint)
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        metrics.inc("errors_total", endpoint=endpoint)
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def worker_cache_stats():
+    """Expression cache statistics of the current worker"""
+    return expression_cache.stats()
+
+
+def warm_worker_cache():
+    """Fill a new worker's expression cache from the on-disk store, if any"""
+    expression_cache.warm()
+
+
+# Equations compiled into the expression store by seed_expression_store
+EXAMPLE_EQUATIONS = (
+    "x**2 - 4",
+    "sin(x) - 0.5",
+    "exp(x) - 2",
+    "log(x) - 1",
+    "x**3 - 2*x - 5",
+    "cos(x) - x",
+    "tan(x) - x",
+)
+
+
+def seed_expression_store(equations=EXAMPLE_EQUATIONS):
+    """Compile equations into the expression store so workers start warm
+
+    Returns the number of equations that compiled. Equations of the
+    fast_expression subset compile without sympy and are not stored. Does
+    nothing without an EXPRESSION_STORE.
+    """
+    if expression_cache.store is None:
+        return 0
+    seeded = 0
+    for equation in equations:
+        try:
+            solver.compile_equation(equation)
+            seeded += 1
+        except ValueError:
+            continue
+    return seeded
+
+
+# CPU-bound work runs in a process pool so the event loop stays responsive
+solver_pool = pool_from_env(
+    stats_hook=worker_cache_stats, warm_hook=warm_worker_cache
+)
+
+# Request metrics of this API process, exposed on /metrics
+metrics = Metrics("newton")
+
+# Finished /solve responses of this API process, keyed on the request
+response_cache = response_cache_from_env()
+
+
 @app.get("/")
 async def root():
     return {
         "message": "Newton-Raphson Method API",
         "endpoints": {
             "/solve": "POST - Solve equation using Newton-Raphson method",
+            "/solve/stream": "POST - Stream iterations and roots as NDJSON or SSE",
+            "/solve/batch": "POST - Solve many equations in one request",
+            "/solve/enumerate": "POST - Stream every root in a (wide) interval",
+            "/solve/sweep": "POST - Follow the roots of f(x, p) across values of p",
+            "/solve/system": "POST - Solve a system of nonlinear equations",
             "/evaluate": "POST - Evaluate function at multiple x values",
             "/health": "GET - Health check",
+            "/cache/stats": "GET - Expression cache statistics",
+            "/metrics": "GET - Prometheus metrics",
         },
     }
 
@@ -261,6 +1558,30 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """Expression cache statistics summed over the solver workers, and response cache statistics"""
+    return {**solver_pool.worker_stats(), "response_cache": response_cache.stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Solve counts, latency histograms and cache statistics in the Prometheus text format"""
+    stats = solver_pool.worker_stats()
+    gauges = {
+        f"expression_cache_{key}": value
+        for key, value in stats.items()
+        if key != "workers"
+    }
+    gauges["solver_workers"] = stats["workers"]
+    gauges["solver_pending_jobs"] = solver_pool.pending
+    for key, value in response_cache.stats().items():
+        gauges[f"response_cache_{key}"] = value
+    return PlainTextResponse(
+        metrics.render(gauges), media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.post("/solve", response_model=NewtonRaphsonResponse)
 async def solve_equation(request: EquationRequest):
     """
@@ -279,6 +1600,8 @@ async def solve_equation(request: EquationRequest):
         * f'(x) derivative value
         * error at that iteration
     - message: Status message
+    - timings_ms: Time spent in each phase, when include_timings is set
+    - cached: Whether the response was reused from an identical request
 
     Supported functions:
     - Basic operations: +, -, *, /, ** (power)
@@ -296,66 +1619,373 @@ async def solve_equation(request: EquationRequest):
     - "log(x) - 1" (logarithmic)
     """
 
-    try:
-        result = solver.solve(
+    async def compute():
+        result, queue_wait = await solver_pool.run(
+            solve_task,
             request.equation,
             request.initial_guess,
             request.tolerance,
             request.max_iterations,
             request.search_range,
             request.num_search_points,
+            request.history,
+            request.history_n,
+            request.max_evaluations,
+            request.include_complex,
+            request.precision,
+            request.method,
+            request.search,
         )
 
-        return NewtonRaphsonResponse(**result)
+        content, timings = solve_response_content(
+            result, queue_wait, request.include_timings
+        )
+        record_solve("/solve", content["converged"], timings)
+        return content
 
+    request_start = time.perf_counter()
+    try:
+        # Identical requests are answered from the cache or share one solve
+        key = solve_cache_key(request)
+        content, cached = await response_cache.get(key, compute)
+        return JSONResponse({**content, "cached": cached})
+
+    except PoolBusyError as e:
+        metrics.inc("errors_total", endpoint="/solve")
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
+        metrics.inc("errors_total", endpoint="/solve")
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        metrics.inc("errors_total", endpoint="/solve")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    finally:
+        metrics.observe(
+            "request_duration_seconds",
+            time.perf_counter() - request_start,
+            endpoint="/solve",
+        )
 
 
-@app.post("/evaluate", response_model=EvaluateResponse)
-async def evaluate_function(request: EvaluateRequest):
+@app.post("/solve/stream")
+async def solve_equation_stream(request: EquationRequest, http_request: Request):
     """
-    Evaluate a mathematical function at multiple x values for plotting.
+    Solve a non-linear equation, streaming progress while it runs.
+
+    Emits one JSON object per line (NDJSON), or server-sent events when the
+    client sends `Accept: text/event-stream`:
+    - {"type": "iteration", ...}: each iteration from the initial guess
+    - {"type": "root", "root": ...}: each new root as soon as it is found
+    - {"type": "result", ...}: final summary, same fields as /solve without
+      iterations_data
+    - {"type": "error", "message": ...}: the solve failed part way
+
+    Closing the connection stops the solver. The solve runs in the solver
+    pool, so a full queue gets a 503 response.
+    """
+    sse = "text/event-stream" in http_request.headers.get("accept", "")
 
-    This endpoint is useful for generating function graphs.
+    events = solver_pool.stream(
+        solve_events_task,
+        (
+            request.equation,
+            request.initial_guess,
+            request.tolerance,
+            request.max_iterations,
+            request.search_range,
+            request.num_search_points,
+        ),
+        {
+            "max_evaluations": request.max_evaluations,
+            "include_complex": request.include_complex,
+            "precision": request.precision,
+            "method": request.method,
+            "search": request.search,
+        },
+    )
+    await start_stream(events, "/solve/stream")
+
+    async def stream():
+        # Events come from a pool worker; closing the stream stops the job
+        try:
+            async for event in events:
+                if event["type"] == "result":
+                    record_solve("/solve/stream", event["converged"])
+                yield format_event(event, sse)
+        except Exception as e:
+            metrics.inc("errors_total", endpoint="/solve/stream")
+            yield format_event({"type": "error", "message": str(e)}, sse)
+        finally:
+            await events.aclose()
+
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    return StreamingResponse(stream(), media_type=media_type)
+
+
+@app.post("/solve/batch", response_model=BatchSolveResponse)
+async def solve_batch(request: BatchSolveRequest):
+    """
+    Solve many equations (or one equation from many initial guesses) in one request.
+
+    Problems sharing an equation are grouped so it is parsed only once, and
+    the groups are spread over the solver workers. Results are returned in
+    the order of `problems`; a problem that fails reports its own `error`
+    without failing the rest of the batch.
+    """
+    problems = request.problems
+    keys = [normalize_equation(problem.equation) for problem in problems]
+    jobs = [
+        [
+            (
+                equation,
+                [
+                    (
+                        index,
+                        (
+                            problems[index].initial_guess,
+                            problems[index].tolerance,
+                            problems[index].max_iterations,
+                            problems[index].search_range,
+                            problems[index].num_search_points,
+                            problems[index].history,
+                            problems[index].history_n,
+                            problems[index].max_evaluations,
+                            problems[index].include_complex,
+                            problems[index].precision,
+                            problems[index].method,
+                            problems[index].search,
+                        ),
+                    )
+                    for index in indices
+                ],
+            )
+            for equation, indices in job
+        ]
+        for job in group_jobs(keys, solver_pool.max_workers)
+    ]
+
+    outcomes = await asyncio.gather(
+        *(solver_pool.run(solve_batch_task, job) for job in jobs),
+        return_exceptions=True,
+    )
+
+    items = [None] * len(problems)
+    for job, outcome in zip(jobs, outcomes):
+        if isinstance(outcome, Exception):
+            # The whole job failed (e.g. queue full), report it on each problem
+            for _, group in job:
+                for index, _ in group:
+                    metrics.inc("errors_total", endpoint="/solve/batch")
+                    items[index] = {
+                        "index": index,
+                        "success": False,
+                        "result": None,
+                        "error": str(outcome),
+                    }
+            continue
+
+        results, queue_wait = outcome
+        for index, result, error in results:
+            content = None
+            if error is None:
+                content, timings = solve_response_content(
+                    result, queue_wait, problems[index].include_timings
+                )
+                record_solve("/solve/batch", content["converged"], timings)
+            else:
+                metrics.inc("errors_total", endpoint="/solve/batch")
+            items[index] = {
+                "index": index,
+                "success": error is None,
+                "result": content,
+                "error": error,
+            }
+
+    solved = sum(1 for item in items if item["success"])
+    return JSONResponse(
+        {"results": items, "solved": solved, "failed": len(items) - solved}
+    )
+
+
+@app.post("/solve/enumerate")
+async def enumerate_equation_roots(request: EnumerateRequest, http_request: Request):
+    """
+    Find every root of an equation in [lower, upper], streaming them piece by piece.
+
+    The interval is subdivided adaptively until f is resolved by a Chebyshev
+    interpolant on every piece, so wide ranges with thousands of roots (e.g.
+    sin(50*x) on [-1000, 1000]) stay cheap. Emits NDJSON, or server-sent
+    events with `Accept: text/event-stream`:
+    - {"type": "roots", "lower", "upper", "roots"}: the new roots of a piece
+    - {"type": "skipped", "lower", "upper"}: f could not be resolved there
+    - {"type": "result", ...}: root and piece counts, whether the whole
+      interval was covered, and the evaluation counts
+    - {"type": "error", "message": ...}: the enumeration failed part way
+
+    Closing the connection stops the enumeration. It runs in the solver
+    pool, so a full queue gets a 503 response.
+    """
+    sse = "text/event-stream" in http_request.headers.get("accept", "")
+
+    if not request.upper > request.lower:
+        raise HTTPException(status_code=400, detail="upper must be greater than lower")
+
+    events = solver_pool.stream(
+        enumerate_events_task,
+        request.equation,
+        request.lower,
+        request.upper,
+        request.tolerance,
+        request.max_degree,
+        request.min_width,
+        request.max_pieces,
+        request.max_roots,
+        request.max_evaluations,
+    )
+    await start_stream(events, "/solve/enumerate")
+
+    async def stream():
+        # Events come from a pool worker; closing the stream stops the job
+        try:
+            async for event in events:
+                if event["type"] == "result":
+                    record_solve("/solve/enumerate", event["num_roots"] > 0)
+                yield format_event(event, sse)
+        except Exception as e:
+            metrics.inc("errors_total", endpoint="/solve/enumerate")
+            yield format_event({"type": "error", "message": str(e)}, sse)
+        finally:
+            await events.aclose()
+
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    return StreamingResponse(stream(), media_type=media_type)
+
+
+@app.post("/solve/sweep", response_model=SweepResponse)
+async def sweep_equation(request: SweepRequest):
+    """
+    Follow the roots of an equation in x and a parameter across a grid of parameter values.
+
+    The equation is compiled once. The roots at the first parameter value
+    (from initial_guesses, or every root in [lower, upper]) start one branch
+    each, and every branch is warm-started from its root at the previous
+    parameter value, all branches iterating together. Returns one root
+    curve per branch, aligned with p_values, with null where the branch was
+    lost, e.g. past a fold where two roots meet and vanish.
     """
+    request_start = time.perf_counter()
     try:
-        # Parse the equation
-        f_expr = solver.parse_equation(request.equation)
+        if not request.parameter.isidentifier() or request.parameter == "x":
+            raise ValueError("parameter must be a name other than x")
 
-        # Convert to numerical function
-        f = lambdify(solver.x, f_expr, modules=["numpy"])
+        result, queue_wait = await solver_pool.run(
+            sweep_task,
+            request.equation,
+            request.parameter,
+            request.p_values,
+            request.initial_guesses,
+            request.lower,
+            request.upper,
+            request.tolerance,
+            request.max_iterations,
+            request.max_branches,
+            request.num_search_points,
+            request.max_evaluations,
+        )
 
-        points = []
-        failed_points = 0
+        timings = result.pop("timings")
+        timings["queue_wait"] = queue_wait
+        record_solve("/solve/sweep", result["num_branches"] > 0, timings)
+        timings_ms = None
+        if request.include_timings:
+            timings_ms = {phase: seconds * 1000 for phase, seconds in timings.items()}
+        return SweepResponse(
+            **result, queue_wait_ms=queue_wait * 1000, timings_ms=timings_ms
+        )
 
-        for x_val in request.x_values:
-            try:
-                y_val = float(f(x_val))
-                # Check if result is valid
-                if not (isnan(y_val) or isinf(y_val)):
-                    points.append({"x": x_val, "y": y_val})
-                else:
-                    failed_points += 1
-            except (OverflowError, ValueError, ZeroDivisionError):
-                failed_points += 1
-                continue
+    except PoolBusyError as e:
+        metrics.inc("errors_total", endpoint="/solve/sweep")
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        metrics.inc("errors_total", endpoint="/solve/sweep")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        metrics.inc("errors_total", endpoint="/solve/sweep")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    finally:
+        metrics.observe(
+            "request_duration_seconds",
+            time.perf_counter() - request_start,
+            endpoint="/solve/sweep",
+        )
 
-        if len(points) == 0:
-            return EvaluateResponse(
-                points=[],
-                success=False,
-                message="Could not evaluate function at any of the provided points",
-            )
 
-        message = f"Successfully evaluated {len(points)} points"
-        if failed_points > 0:
-            message += f" ({failed_points} points failed)"
+@app.post("/solve/system", response_model=SystemResponse)
+async def solve_equation_system(request: SystemRequest):
+    """
+    Solve a square system of nonlinear equations with damped Newton steps.
+
+    The Jacobian is computed symbolically once per system. All initial
+    guesses, plus random starts around the first one, are iterated together;
+    each step backtracks until the residual decreases. Independent blocks of
+    the Jacobian are solved separately. Returns the distinct solutions found.
+    """
+    request_start = time.perf_counter()
+    try:
+        result, queue_wait = await solver_pool.run(
+            system_task,
+            request.equations,
+            request.variables,
+            request.initial_guesses,
+            request.tolerance,
+            request.max_iterations,
+            request.search_range,
+            request.num_search_points,
+            request.max_evaluations,
+        )
+
+        timings = result.pop("timings")
+        timings["queue_wait"] = queue_wait
+        record_solve("/solve/system", result["converged"], timings)
+        timings_ms = None
+        if request.include_timings:
+            timings_ms = {phase: seconds * 1000 for phase, seconds in timings.items()}
+        return SystemResponse(
+            **result, queue_wait_ms=queue_wait * 1000, timings_ms=timings_ms
+        )
+
+    except PoolBusyError as e:
+        metrics.inc("errors_total", endpoint="/solve/system")
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        metrics.inc("errors_total", endpoint="/solve/system")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        metrics.inc("errors_total", endpoint="/solve/system")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    finally:
+        metrics.observe(
+            "request_duration_seconds",
+            time.perf_counter() - request_start,
+            endpoint="/solve/system",
+        )
 
-        return EvaluateResponse(points=points, success=True, message=message)
 
+@app.post("/evaluate", response_model=EvaluateResponse)
+async def evaluate_function(request: EvaluateRequest):
+    """
+    Evaluate a mathematical function at multiple x values for plotting.
+
+    This endpoint is useful for generating function graphs.
+    """
+    try:
+        result, queue_wait = await solver_pool.run(
+            evaluate_task, request.equation, request.x_values
+        )
+        return EvaluateResponse(**result, queue_wait_ms=queue_wait * 1000)
+
+    except PoolBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -363,6 +1993,18 @@ async def evaluate_function(request: EvaluateRequest):
 
 
 if __name__ == "__main__":
+    import sys
+
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if sys.argv[1:2] == ["seed"]:
+        # python main.py seed [file with one equation per line]
+        equations = EXAMPLE_EQUATIONS
+        if len(sys.argv) > 2:
+            with open(sys.argv[2]) as file:
+                equations = [line.strip() for line in file if line.strip()]
+        if expression_cache.store is None:
+            sys.exit("Set EXPRESSION_STORE to the path of the store to seed")
+        print(f"Seeded {seed_expression_store(equations)} equations")
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,130 @@
+import bisect
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+HELP = {
+    "request_duration_seconds": "Time to handle a solve request",
+    "phase_duration_seconds": "Time spent in each phase of a solve",
+    "solves_total": "Solves handled",
+    "convergence_failures_total": "Solves that finished without finding a root",
+    "errors_total": "Solve requests that failed with an error",
+}
+
+
+class PhaseTimer:
+    """Wall-clock time spent in each named phase of one request"""
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the body of a with block; repeated phases add up"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+
+def format_labels(labels, **extra):
+    labels = [*labels, *extra.items()]
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Metrics:
+    """In-process counters and latency histograms in the Prometheus text format
+
+    Metrics are created on first use and every name is prefixed with
+    `prefix`. Labels are given as keyword arguments.
+    """
+
+    def __init__(self, prefix: str, buckets=LATENCY_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self._lock = Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            # Per-bucket counts (the last one is +Inf), then sum and count
+            values = series.get(key)
+            if values is None:
+                values = series[key] = [0] * (len(self.buckets) + 3)
+            values[bisect.bisect_left(self.buckets, seconds)] += 1
+            values[-2] += seconds
+            values[-1] += 1
+
+    def observe_phases(self, timings, **labels):
+        """Observe every phase of a PhaseTimer.timings dict"""
+        for phase, seconds in timings.items():
+            self.observe("phase_duration_seconds", seconds, phase=phase, **labels)
+
+    def render(self, gauges=None):
+        """Render all metrics, plus the given {name: value} gauges, as text"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                full_name = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {full_name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {full_name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{full_name}{format_labels(labels)} {value}")
+
+            for name, series in sorted(self._histograms.items()):
+                full_name = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {full_name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {full_name} histogram")
+                for labels, values in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(
+                        (*self.buckets, "+Inf"), values[: len(self.buckets) + 1]
+                    ):
+                        cumulative += count
+                        lines.append(
+                            f"{full_name}_bucket{format_labels(labels, le=bound)} {cumulative}"
+                        )
+                    lines.append(f"{full_name}_sum{format_labels(labels)} {values[-2]}")
+                    lines.append(
+                        f"{full_name}_count{format_labels(labels)} {values[-1]}"
+                    )
+
+        for name, value in (gauges or {}).items():
+            full_name = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {full_name} gauge")
+            lines.append(f"{full_name} {value}")
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,150 @@
+import math
+import os
+
+import numpy as np
+
+# mpmath (installed with sympy) is only imported once a solve escalates
+
+# Working precision of the first mpmath stage and the most it escalates to,
+# in decimal digits; each further stage doubles it
+START_DIGITS = 32
+MAX_DIGITS = int(os.getenv("MAX_PRECISION_DIGITS", "256"))
+
+# Status of a float64 run whose steps stopped getting smaller
+STAGNATED = "Stagnated in float64"
+
+# Errors of evaluating f in mpmath
+MPMATH_ERRORS = (ValueError, ZeroDivisionError, TypeError, OverflowError)
+
+
+def float64_resolves(x: float, step: float) -> bool:
+    """Whether a step of this size is resolved around x in float64"""
+    return step > 4 * np.finfo(float).eps * max(1.0, abs(x))
+
+
+def near_float64_limit(x: float, step: float) -> bool:
+    """Whether a step is small enough that rounding errors in f may dominate it"""
+    return step < math.sqrt(np.finfo(float).eps) * max(1.0, abs(x))
+
+
+class StagnationMonitor:
+    """Tells when a float64 Newton run has stopped making progress
+
+    That is when a step is below what float64 resolves, or when steps have
+    stopped shrinking (STALL_LIMIT times) once the run is near the float64
+    limit: steps near it, or |f| down by a factor of sqrt(eps) from the
+    start, where rounding errors in f dominate (e.g. at a multiple root).
+    """
+
+    STALL_LIMIT = 3
+
+    def __init__(self):
+        self.first_f = None
+        self.previous_step = None
+        self.stalls = 0
+
+    def update(self, x_next: float, step: float, f_x: float) -> bool:
+        """Record a step taken where f was f_x; True once the run has stagnated"""
+        if self.first_f is None:
+            self.first_f = abs(f_x)
+        if not float64_resolves(x_next, step):
+            return True
+        near_limit = near_float64_limit(x_next, step) or abs(f_x) < math.sqrt(
+            np.finfo(float).eps
+        ) * self.first_f
+        if (
+            near_limit
+            and self.previous_step is not None
+            and step > 0.9 * self.previous_step
+        ):
+            self.stalls += 1
+        self.previous_step = step
+        return self.stalls >= self.STALL_LIMIT
+
+
+def needs_escalation(
+    status: str, last_x, last_error, f_value, tolerance: float
+) -> bool:
+    """Whether a float64 Newton run should be continued in mpmath
+
+    It should when it stagnated, when it stopped on a zero derivative or
+    ran out of iterations with steps already near the float64 limit (slow
+    convergence to a multiple root), when the root it reached does not
+    verify (|f(root)| not below the relaxed tolerance, e.g. cancellation
+    near a multiple root), or when the tolerance is below what float64
+    resolves at the root.
+    """
+    if last_x is None or not math.isfinite(last_x):
+        return False
+    if status == STAGNATED:
+        return True
+    if status in ("Derivative is zero", "Max iterations reached"):
+        return last_error is not None and near_float64_limit(last_x, last_error)
+    if status != "converged":
+        return False
+    if f_value is None or not f_value < tolerance * 10:
+        return True
+    return not float64_resolves(last_x, tolerance)
+
+
+def root_digits(root, tolerance: float) -> int:
+    """Significant digits of a root that are meaningful at the tolerance"""
+    magnitude = math.floor(math.log10(abs(root))) + 1 if root else 1
+    return max(magnitude, 1) + max(math.ceil(-math.log10(tolerance)), 0) + 2
+
+
+def mpmath_steps(
+    f_and_prime, x_start: float, tolerance: float, max_iterations: int, first: int = 1
+):
+    """Newton-Raphson in mpmath from x_start at escalating working precision
+
+    Each stage runs up to `max_iterations` steps from where the previous
+    one stopped, starting at START_DIGITS digits (more when the tolerance
+    asks for it) and doubling up to MAX_DIGITS, until a step is below
+    `tolerance`; a stage that does not reduce |f| ends the escalation.
+    Yields every step as a row of ITERATION_FIELDS, numbered from
+    `first`, in floats. Returns (root, |f(root)|, digits) with the root as
+    a decimal string, or (None, None, digits) when no stage converged.
+    """
+    import mpmath
+
+    digits = max(START_DIGITS, math.ceil(-math.log10(tolerance)) + 16)
+    iteration = first
+    x = mpmath.mpf(x_start)
+    while digits <= MAX_DIGITS:
+        with mpmath.workdps(digits):
+            x = mpmath.mpf(x)
+            start_f, f_x = None, None
+            for _ in range(max_iterations):
+                try:
+                    f_x, f_prime_x = map(mpmath.mpmathify, f_and_prime(x))
+                except MPMATH_ERRORS:
+                    return None, None, digits
+                # Complex values mean x left the domain of f
+                if not (
+                    isinstance(f_x, mpmath.mpf)
+                    and isinstance(f_prime_x, mpmath.mpf)
+                    and mpmath.isfinite(f_x)
+                    and mpmath.isfinite(f_prime_x)
+                ):
+                    return None, None, digits
+                if start_f is None:
+                    start_f = abs(f_x)
+                if f_prime_x == 0:
+                    break
+
+                step = f_x / f_prime_x
+                error = abs(step)
+                yield iteration, float(x), float(f_x), float(f_prime_x), float(error)
+                iteration += 1
+                x -= step
+
+                if error < tolerance:
+                    f_root = abs(mpmath.mpmathify(f_and_prime(x)[0]))
+                    root = mpmath.nstr(x, min(root_digits(x, tolerance), digits))
+                    return root, float(f_root), digits
+
+            if f_x is None or not abs(f_x) < start_f:
+                return None, None, digits
+        digits *= 2
+    return None, None, digits // 2
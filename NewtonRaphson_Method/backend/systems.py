@@ -0,0 +1,306 @@
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from evaluation import EvaluationBudgetExceeded, Evaluations
+
+# Line search: sufficient decrease of |F|^2 and most step halvings
+ARMIJO = 1e-4
+MAX_BACKTRACKS = 10
+
+# Errors of evaluating a lambdified function at a point
+EVALUATION_ERRORS = (TypeError, ValueError, ZeroDivisionError, OverflowError)
+
+
+def jacobian_blocks(rows, cols, size):
+    """Independent blocks of a Jacobian from the positions of its nonzero entries
+
+    Unknowns and equations linked by a nonzero entry end up in the same
+    block, so after permuting, the Jacobian is block diagonal and each
+    block is solved on its own. Returns a list of (equations, unknowns)
+    index arrays, or a single block of everything when a block is not
+    square (the Jacobian is structurally singular).
+    """
+    # Union-find over equations 0..size-1 and unknowns size..2*size-1
+    parent = list(range(2 * size))
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for row, col in zip(rows, cols):
+        parent[find(row)] = find(size + col)
+
+    groups = {}
+    for node in range(2 * size):
+        groups.setdefault(find(node), []).append(node)
+
+    blocks = []
+    for nodes in groups.values():
+        equations = np.array([node for node in nodes if node < size], dtype=int)
+        unknowns = np.array([node - size for node in nodes if node >= size], dtype=int)
+        if equations.size != unknowns.size:
+            everything = np.arange(size)
+            return [(everything, everything)]
+        blocks.append((equations, unknowns))
+    return blocks
+
+
+def batch_function(symbols, exprs):
+    """Compile expressions into a function from points (rows) to rows of their values
+
+    Constant expressions, e.g. most entries of a linear Jacobian, are not
+    compiled but filled in, so the compiled part returns one array per
+    expression and the rows are stacked in one call. Complex results and
+    errors come back as NaN.
+    """
+    from sympy import lambdify
+
+    constant = np.array([not expr.free_symbols for expr in exprs], dtype=bool)
+    constants = np.array(
+        [complex(expr) if is_constant else 0 for expr, is_constant in zip(exprs, constant)]
+    )
+    constants = np.where(constants.imag == 0, constants.real, np.nan)
+    varying = np.flatnonzero(~constant)
+    func = lambdify(
+        symbols, [exprs[i] for i in varying], modules=["numpy"], cse=True
+    )
+
+    def evaluate(points):
+        points = np.asarray(points, dtype=float)
+        values = np.empty((len(points), len(exprs)))
+        values[:] = constants
+        with np.errstate(all="ignore"):
+            try:
+                columns = func(*points.T)
+                try:
+                    stacked = np.array(columns, dtype=np.result_type(*columns, float))
+                    if stacked.shape != (varying.size, len(points)):
+                        raise ValueError
+                except ValueError:
+                    # Some expressions do not depend on every variable
+                    stacked = np.array(
+                        [np.broadcast_to(column, len(points)) for column in columns]
+                    )
+                if np.iscomplexobj(stacked):
+                    stacked = np.where(stacked.imag == 0, stacked.real, np.nan)
+                values[:, varying] = stacked.T
+                return values
+            except EVALUATION_ERRORS:
+                pass
+
+            # Point by point for expressions that cannot be vectorized
+            for lane, point in enumerate(points.tolist()):
+                try:
+                    row = [complex(value) for value in func(*point)]
+                    values[lane, varying] = [
+                        value.real if value.imag == 0 else np.nan for value in row
+                    ]
+                except EVALUATION_ERRORS:
+                    values[lane, varying] = np.nan
+            return values
+
+    return evaluate
+
+
+class CompiledSystem:
+    """A square system of equations with its Jacobian, compiled once
+
+    The Jacobian is differentiated symbolically and only its structurally
+    nonzero entries are compiled, together with the equations into one
+    evaluator whose common subexpressions are computed once. Both
+    evaluators take a batch of points as the rows of an array and evaluate
+    them in one vectorized call.
+    """
+
+    def __init__(self, exprs, symbols):
+        from sympy import Matrix
+
+        self.size = len(symbols)
+        self.variables = [str(symbol) for symbol in symbols]
+        jacobian = Matrix(exprs).jacobian(symbols)
+        entries = [
+            (row, col, jacobian[row, col])
+            for row in range(self.size)
+            for col in range(self.size)
+            if jacobian[row, col] != 0
+        ]
+        self.rows = np.array([row for row, _, _ in entries], dtype=int)
+        self.cols = np.array([col for _, col, _ in entries], dtype=int)
+        self._residuals = batch_function(symbols, list(exprs))
+        self._fused = batch_function(
+            symbols, list(exprs) + [entry for _, _, entry in entries]
+        )
+
+        # Plan the linear solve of each independent block once
+        self.blocks = []
+        for equations, unknowns in jacobian_blocks(self.rows, self.cols, self.size):
+            row_position = np.full(self.size, -1)
+            row_position[equations] = np.arange(equations.size)
+            col_position = np.full(self.size, -1)
+            col_position[unknowns] = np.arange(unknowns.size)
+            members = np.flatnonzero(row_position[self.rows] >= 0)
+            self.blocks.append(
+                {
+                    "equations": equations,
+                    "unknowns": unknowns,
+                    "entries": members,
+                    "rows": row_position[self.rows[members]],
+                    "cols": col_position[self.cols[members]],
+                }
+            )
+
+        self.linear_solver = "block" if len(self.blocks) > 1 else "dense"
+
+    def residuals(self, points):
+        """F at each point (row) of points"""
+        return self._residuals(points)
+
+    def residuals_and_jacobian(self, points):
+        """F and the nonzero Jacobian entries (at self.rows, self.cols) at each point"""
+        values = self._fused(points)
+        return values[:, : self.size], values[:, self.size :]
+
+    def newton_directions(self, residuals, entries):
+        """Solve J dx = -F for every lane, block by block; NaN where J is singular"""
+        lanes = len(residuals)
+        directions = np.full((lanes, self.size), np.nan)
+        for block in self.blocks:
+            size = block["equations"].size
+            rhs = -residuals[:, block["equations"]]
+            values = entries[:, block["entries"]]
+            matrices = np.zeros((lanes, size, size))
+            matrices[:, block["rows"], block["cols"]] = values
+            try:
+                solution = np.linalg.solve(matrices, rhs[:, :, None])[:, :, 0]
+            except np.linalg.LinAlgError:
+                # Some lane is singular, solve them one at a time
+                solution = np.full((lanes, size), np.nan)
+                for lane in range(lanes):
+                    try:
+                        solution[lane] = np.linalg.solve(matrices[lane], rhs[lane])
+                    except np.linalg.LinAlgError:
+                        continue
+            directions[:, block["unknowns"]] = solution
+        return directions
+
+
+def natural_key(symbol):
+    """Sort key of a symbol by name, with numbered names in numeric order (x2 before x10)"""
+    return [
+        (0, int(part), "") if part.isdigit() else (1, 0, part)
+        for part in re.split(r"(\d+)", str(symbol))
+    ]
+
+
+@lru_cache(maxsize=int(os.getenv("EXPRESSION_CACHE_SIZE", "128")))
+def compile_system(equations, variables, parse):
+    """CompiledSystem of a tuple of normalized equations, cached
+
+    `variables` orders the unknowns; when empty they are the symbols of
+    the equations sorted by name (numbers in numeric order). `parse`
+    turns an equation into a sympy expression. Raises ValueError unless
+    the system is square in its unknowns.
+    """
+    from sympy import Symbol
+
+    exprs = [parse(equation) for equation in equations]
+    free = set().union(*(expr.free_symbols for expr in exprs))
+    if variables:
+        symbols = [Symbol(name) for name in variables]
+        unknown = free - set(symbols)
+        if unknown:
+            names = ", ".join(sorted(str(symbol) for symbol in unknown))
+            raise ValueError(f"Equations contain symbols that are not variables: {names}")
+    else:
+        symbols = sorted(free, key=natural_key)
+    if len(symbols) != len(exprs):
+        raise ValueError(
+            f"The system must have as many equations as variables"
+            f" ({len(exprs)} equations, {len(symbols)} variables)"
+        )
+    return CompiledSystem(exprs, symbols)
+
+
+def damped_newton(
+    system: CompiledSystem,
+    starts,
+    evaluations: Evaluations,
+    tolerance: float = 1e-6,
+    max_iterations: int = 100,
+):
+    """Damped Newton from many starting points at once, one lane per start
+
+    Each step solves J dx = -F and backtracks along dx, halving the step
+    until |F|^2 decreases enough (Armijo); lanes where MAX_BACKTRACKS
+    halvings are not enough have stalled and stop unconverged. Lanes also
+    stop once the step is below `tolerance` or when they diverge; only
+    running lanes are evaluated. Returns the last point of each lane,
+    |F| (max norm) there, whether it converged and its iterations. When the
+    evaluation budget runs out, the lanes stop where they are.
+    """
+    starts = np.asarray(starts, dtype=float)
+    residuals_and_jacobian = evaluations.wrap_points(
+        system.residuals_and_jacobian, cost=2
+    )
+    residuals = evaluations.wrap_points(system.residuals)
+
+    lanes = len(starts)
+    points = starts.copy()
+    residual_norms = np.full(lanes, np.nan)
+    converged = np.zeros(lanes, dtype=bool)
+    iterations = np.zeros(lanes, dtype=int)
+
+    active = np.arange(lanes)
+    x_current = starts
+    for _ in range(max_iterations):
+        if active.size == 0:
+            break
+        try:
+            f_x, entries = residuals_and_jacobian(x_current)
+            direction = system.newton_directions(f_x, entries)
+            merit = np.sum(f_x**2, axis=1)
+            valid = np.isfinite(merit) & np.isfinite(direction).all(axis=1)
+
+            # Backtracking line search, all lanes together
+            step = np.ones(len(x_current))
+            f_next = np.full(f_x.shape, np.nan)
+            pending = np.flatnonzero(valid)
+            for attempt in range(MAX_BACKTRACKS + 1):
+                if pending.size == 0:
+                    break
+                trial = x_current[pending] + step[pending, None] * direction[pending]
+                f_trial = residuals(trial)
+                f_next[pending] = f_trial
+                trial_merit = np.sum(f_trial**2, axis=1)
+                accepted = np.isfinite(trial_merit) & (
+                    trial_merit <= (1 - 2 * ARMIJO * step[pending]) * merit[pending]
+                )
+                pending = pending[~accepted]
+                if attempt < MAX_BACKTRACKS:
+                    step[pending] /= 2
+            # No step decreased |F|^2 enough: stalled, e.g. at a local
+            # minimum of |F|^2 that is not a solution
+            valid[pending] = False
+        except EvaluationBudgetExceeded:
+            break
+
+        x_next = x_current + step[:, None] * direction
+        valid &= np.isfinite(x_next).all(axis=1) & np.isfinite(f_next).all(axis=1)
+        error = np.max(np.abs(step[:, None] * direction), axis=1)
+
+        iterations[active] += 1
+        points[active[valid]] = x_next[valid]
+        residual_norms[active[valid]] = np.max(np.abs(f_next[valid]), axis=1)
+        done = valid & (error < tolerance)
+        converged[active[done]] = True
+
+        running = valid & ~done
+        active = active[running]
+        x_current = x_next[running]
+
+    return points, residual_norms, converged, iterations
@@ -0,0 +1,132 @@
+import json
+import math
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app, evaluate_array, solver_pool
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_evaluate_drops_invalid_points(client):
+    response = client.post(
+        "/evaluate", json={"equation": "log(x)", "x_values": [1.0, -1.0, math.e, 0.0]}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"]
+    assert [point["x"] for point in data["points"]] == [1.0, math.e]
+    assert [point["y"] for point in data["points"]] == pytest.approx([0.0, 1.0])
+    assert "(2 points failed)" in data["message"]
+
+
+def test_evaluate_with_no_valid_point(client):
+    response = client.post(
+        "/evaluate", json={"equation": "sqrt(x)", "x_values": [-1.0]}
+    )
+    assert response.status_code == 200
+    assert not response.json()["success"]
+
+
+def test_evaluate_invalid_equation(client):
+    response = client.post("/evaluate", json={"equation": "x +", "x_values": [1.0]})
+    assert response.status_code == 400
+
+
+def test_evaluate_array_in_one_call():
+    calls = []
+
+    def f(x):
+        calls.append(x)
+        return np.sqrt(x + 0j)
+
+    y = evaluate_array(f, [4.0, -1.0])
+    assert len(calls) == 1
+    assert y[0] == 2.0 and math.isnan(y[1])
+
+
+def test_evaluate_array_falls_back_to_points():
+    def f(x):
+        return math.log(float(x))
+
+    y = evaluate_array(f, [1.0, -1.0])
+    assert y[0] == 0.0 and math.isnan(y[1])
+
+
+def test_full_solver_queue_gives_503(client, monkeypatch):
+    monkeypatch.setattr(solver_pool, "max_queue", 0)
+    response = client.post("/solve", json={"equation": "x**2 - 5", "initial_guess": 1})
+    assert response.status_code == 503
+    assert client.get("/health").status_code == 200
+
+
+def test_batch_results_in_input_order(client):
+    problems = [
+        {"equation": "x**2 - 4", "initial_guess": 1},
+        {"equation": "x +", "initial_guess": 1},
+        {"equation": "cos(x) - x", "initial_guess": 0.5},
+        {"equation": "x^2 - 4", "initial_guess": -1},
+    ]
+    response = client.post("/solve/batch", json={"problems": problems})
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["index"] for item in data["results"]] == [0, 1, 2, 3]
+    assert (data["solved"], data["failed"]) == (3, 1)
+    assert not data["results"][1]["success"]
+    assert data["results"][1]["error"]
+    assert data["results"][0]["result"]["root"] == pytest.approx(2.0)
+    assert data["results"][2]["result"]["root"] == pytest.approx(0.7390851, abs=1e-6)
+    assert data["results"][3]["result"]["root"] == pytest.approx(-2.0)
+
+
+def test_stream_events(client):
+    response = client.post(
+        "/solve/stream", json={"equation": "x**2 - 4", "initial_guess": 1}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    types = [event["type"] for event in events]
+    assert types[0] == "iteration"
+    assert types[-1] == "result"
+    assert sorted(event["root"] for event in events if event["type"] == "root") == (
+        pytest.approx([-2.0, 2.0])
+    )
+    assert events[-1]["converged"]
+
+
+def test_stream_as_server_sent_events(client):
+    response = client.post(
+        "/solve/stream",
+        json={"equation": "x - 1", "initial_guess": 0},
+        headers={"Accept": "text/event-stream"},
+    )
+    assert response.headers["content-type"].startswith("text/event-stream")
+    blocks = response.text.strip().split("\n\n")
+    assert blocks[-1].startswith("event: result\ndata: ")
+
+
+def test_stream_rejects_invalid_equations_before_streaming(client):
+    response = client.post(
+        "/solve/stream", json={"equation": "x +", "initial_guess": 1}
+    )
+    assert response.status_code == 400
+
+
+def test_history_modes(client):
+    request = {"equation": "x**3 - 2*x - 5", "initial_guess": 10}
+    full = client.post("/solve", json=request).json()
+    summary = client.post("/solve", json={**request, "history": "summary"}).json()
+    last = client.post(
+        "/solve", json={**request, "history": "last_k", "history_n": 2}
+    ).json()
+    rows = full["iterations_data"]
+    assert len(rows) == full["iterations_count"] > 3
+    assert summary["iterations_data"] == [rows[0], rows[-1]]
+    assert last["iterations_data"] == rows[-2:]
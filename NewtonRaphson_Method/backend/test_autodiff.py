@@ -0,0 +1,83 @@
+import math
+import warnings
+
+import numpy as np
+import pytest
+from sympy import diff, lambdify, symbols, sympify
+
+import expression_cache
+from autodiff import Dual, compile_autodiff, supports_autodiff
+from expression_cache import CompiledExpression
+
+x = symbols("x")
+
+
+@pytest.mark.parametrize(
+    "equation",
+    ["x**3 - 2/x + sqrt(x)", "exp(-x)*sin(3*x)", "atan(x)**2 - log(1 + x**2)", "2**x"],
+)
+def test_autodiff_matches_the_symbolic_derivative(equation):
+    expr = sympify(equation)
+    f_and_prime = compile_autodiff(expr)
+    f_prime = lambdify(x, diff(expr, x), "numpy")
+    f_x, f_prime_x = f_and_prime(1.5)
+    assert type(f_prime_x) is float
+    assert f_prime_x == pytest.approx(f_prime(1.5))
+
+    points = np.array([0.5, 1.0, 2.5])
+    f_x, f_prime_x = f_and_prime(points)
+    assert f_prime_x == pytest.approx(f_prime(points))
+
+
+def test_dual_arithmetic():
+    result = (Dual(2.0, 1.0) ** 3 - 1 / Dual(2.0, 1.0)) * 2
+    assert (result.value, result.derivative) == (15.0, 24.5)
+
+
+def test_constants_have_zero_derivative():
+    assert compile_autodiff(sympify("3"))(2.0) == (3, 0.0)
+
+
+def test_floats_fall_back_to_numpy_where_math_raises():
+    f_and_prime = compile_autodiff(sympify("log(x)"))
+    f_x, _ = f_and_prime(-1.0)
+    assert math.isnan(f_x)
+
+
+@pytest.mark.parametrize("order", [1, 3])
+def test_arrays_outside_the_domain_do_not_warn(order):
+    evaluate = compile_autodiff(sympify("log(x) + sqrt(x) + 1/x + x**0.5"), order)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        values = evaluate(np.array([-1.0, 0.0, 1.0]))
+    assert np.isnan(values[1][0]) and np.isfinite(values[1][2])
+
+
+def test_f_and_prime_share_subexpressions():
+    entry = CompiledExpression(sympify("sec(x)**2 + x"))
+    f_x, f_prime_x = entry.f_and_prime(1.0)
+    assert entry.derivative_mode == "symbolic"
+    assert "_cse0" in entry.f_and_prime.source[0]
+    assert f_x == pytest.approx(1 / math.cos(1) ** 2 + 1)
+    assert f_prime_x == pytest.approx(2 * math.tan(1) / math.cos(1) ** 2 + 1)
+
+
+def test_derivatives_that_cannot_be_compiled_use_autodiff():
+    entry = CompiledExpression(sympify("Abs(x) - sec(x)"))
+    _, f_prime_x = entry.f_and_prime(-1.0)
+    assert entry.derivative_mode == "autodiff"
+    assert f_prime_x == pytest.approx(-1 - math.tan(-1) / math.cos(-1))
+
+
+def test_large_derivatives_use_autodiff(monkeypatch):
+    monkeypatch.setattr(expression_cache, "AUTODIFF_OPS", 1)
+    entry = CompiledExpression(sympify("sec(x)**2 + x"))
+    entry.f_and_prime(1.0)
+    assert entry.derivative_mode == "autodiff"
+
+    # Unless f uses a function autodiff does not know
+    assert not supports_autodiff(sympify("erf(x)"))
+    entry = CompiledExpression(sympify("erf(x) - 0.5"))
+    _, f_prime_x = entry.f_and_prime(1.0)
+    assert entry.derivative_mode == "symbolic"
+    assert f_prime_x == pytest.approx(2 / math.sqrt(math.pi) * math.exp(-1))
@@ -0,0 +1,74 @@
+import math
+
+import numpy as np
+import pytest
+
+from chebyshev import (
+    SUBDIVIDE_DEGREE,
+    Undefined,
+    Unresolved,
+    chebyshev_points,
+    chebyshev_roots,
+    interpolant_roots,
+    interpolate,
+    values_to_coefficients,
+)
+from main import solver
+
+
+def test_coefficients_reproduce_a_chebyshev_polynomial():
+    # T3(t) = 4t^3 - 3t
+    t = chebyshev_points(8)
+    coefficients = values_to_coefficients(4 * t**3 - 3 * t)
+    assert coefficients == pytest.approx([0, 0, 0, 1, 0, 0, 0, 0, 0], abs=1e-14)
+
+
+def test_smooth_functions_resolve_at_low_degree():
+    coefficients, _ = interpolate(np.exp, -1.0, 1.0)
+    assert 10 < len(coefficients) < 20
+
+
+def test_all_roots_on_the_interval():
+    roots, degree = chebyshev_roots(np.sin, -10.0, 10.0)
+    assert roots == pytest.approx([k * math.pi for k in range(-3, 4)], abs=1e-12)
+    assert degree < 64
+
+
+def test_high_degree_interpolants_are_split():
+    coefficients, threshold = interpolate(lambda x: np.sin(40 * x), -1.0, 1.0)
+    assert len(coefficients) - 1 > SUBDIVIDE_DEGREE
+    roots = np.sort(interpolant_roots(coefficients, threshold))
+    assert len(roots) == 25
+    assert np.abs(np.sin(40 * roots)).max() < 1e-10
+
+
+def test_root_at_the_middle_of_a_symmetric_interval():
+    roots, _ = chebyshev_roots(lambda x: x * np.cosh(x) ** 9, -3.0, 3.0)
+    assert roots == pytest.approx([0.0], abs=1e-12)
+
+
+def test_poles_and_undefined_functions_are_unresolved():
+    with pytest.raises(Unresolved):
+        chebyshev_roots(lambda x: 1 / (x - 0.3), 0.0, 1.0)
+    with pytest.raises(Undefined):
+        chebyshev_roots(lambda x: np.full_like(x, np.nan), 0.0, 1.0)
+
+
+def test_solver_uses_the_interpolant_for_smooth_equations():
+    result = solver.solve("cos(x) - x/5", 0.0, search_range=20.0, search="chebyshev")
+    assert result["path"] == "chebyshev"
+    roots = np.array(result["roots"])
+    assert len(roots) == 3
+    assert np.abs(np.cos(roots) - roots / 5).max() < 1e-9
+
+
+def test_chebyshev_search_is_opt_in():
+    # Multi-start keeps the roots its starts wander to outside the range
+    default = solver.solve("sin(x) - 0.5", 0.0)
+    assert default["path"] == "multistart"
+    assert len(default["roots"]) == 7
+
+    result = solver.solve("sin(x) - 0.5", 0.0, search="chebyshev")
+    assert result["path"] == "chebyshev"
+    assert len(result["roots"]) == 3
+    assert all(-5.0 <= root <= 5.0 for root in result["roots"])
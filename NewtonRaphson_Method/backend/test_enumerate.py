@@ -0,0 +1,77 @@
+import json
+import math
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app, solver
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def enumerate_roots(*args, **kwargs):
+    events = list(solver.enumerate_events(*args, **kwargs))
+    roots = [
+        root for event in events if event["type"] == "roots" for root in event["roots"]
+    ]
+    return roots, events
+
+
+def test_thousands_of_roots_piece_by_piece():
+    roots, events = enumerate_roots("sin(50*x)", -100, 100)
+    result = events[-1]
+    # k pi / 50 for |k| <= 1591
+    assert result["num_roots"] == len(roots) == 3183
+    assert result["complete"]
+    assert roots == sorted(roots)
+    pieces = [event for event in events if event["type"] == "roots"]
+    assert pieces[0]["lower"] == -100 and pieces[-1]["upper"] == 100
+    assert all(a["upper"] == b["lower"] for a, b in zip(pieces, pieces[1:]))
+
+
+def test_pieces_around_a_pole_are_skipped():
+    roots, events = enumerate_roots("tan(x)", 0, 4)
+    assert roots == pytest.approx([0.0, math.pi], abs=1e-9)
+    (skipped,) = [event for event in events if event["type"] == "skipped"]
+    assert skipped["lower"] < math.pi / 2 < skipped["upper"]
+    assert events[-1]["complete"]
+    assert events[-1]["skipped_pieces"] == 1
+
+
+def test_max_roots_stops_at_the_last_root():
+    roots, events = enumerate_roots("sin(x)", 0, 100, max_roots=5)
+    assert len(roots) == 5
+    result = events[-1]
+    assert not result["complete"]
+    assert result["covered"] == pytest.approx(4 * math.pi)
+    assert "max_roots reached" in result["message"]
+
+
+def test_budget_keeps_the_roots_reported_so_far():
+    roots, events = enumerate_roots("sin(50*x)", -100, 100, max_evaluations=5000)
+    result = events[-1]
+    assert result["nfev"] <= 5000
+    assert not result["complete"]
+    assert "max_evaluations reached" in result["message"]
+    assert 0 < len(roots) == result["num_roots"] < 3183
+
+
+def test_enumerate_stream(client):
+    response = client.post(
+        "/solve/enumerate", json={"equation": "cos(x)", "lower": 0, "upper": 10}
+    )
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[-1]["type"] == "result"
+    assert events[-1]["num_roots"] == 3
+
+
+def test_enumerate_rejects_an_empty_range(client):
+    response = client.post(
+        "/solve/enumerate", json={"equation": "cos(x)", "lower": 1, "upper": 1}
+    )
+    assert response.status_code == 400
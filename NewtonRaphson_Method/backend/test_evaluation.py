@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from evaluation import EvaluationBudgetExceeded, Evaluations
+from main import solver
+
+
+def test_scalar_calls_are_memoized_per_function():
+    evaluations = Evaluations()
+    calls = []
+    square = evaluations.wrap(lambda x: calls.append(x) or x * x)
+    cube = evaluations.wrap(lambda x: x**3)
+    assert square(2.0) == square(2) == 4.0
+    cube(2.0)
+    assert calls == [2.0]
+    assert evaluations.stats() == {"nfev": 2, "nfev_cached": 1}
+
+
+def test_arrays_cost_one_evaluation_per_element():
+    evaluations = Evaluations()
+    f = evaluations.wrap(np.sin, cost=2)
+    f(np.zeros(3))
+    f(np.zeros(3))
+    assert evaluations.stats() == {"nfev": 12, "nfev_cached": 0}
+    g = evaluations.wrap_points(lambda points: points.sum(axis=1))
+    g(np.ones((4, 3)))
+    assert evaluations.nfev == 16
+
+
+def test_budget_is_never_overspent():
+    evaluations = Evaluations(max_evaluations=3)
+    f = evaluations.wrap(lambda x: x, cost=2)
+    f(1.0)
+    f(1.0)
+    with pytest.raises(EvaluationBudgetExceeded, match="budget of 3"):
+        f(2.0)
+    assert evaluations.exhausted
+    assert evaluations.nfev == 2
+
+
+def test_budget_exhausted_mid_search_keeps_verified_roots():
+    unbounded = solver.solve("tan(x) - 1", 1.0)
+    result = solver.solve("tan(x) - 1", 1.0, max_evaluations=20)
+    assert result["nfev"] <= 20 < unbounded["nfev"]
+    assert 0 < len(result["roots"]) < len(unbounded["roots"])
+    assert result["converged"]
+    assert "max_evaluations reached" in result["message"]
+
+
+def test_budget_exhausted_before_any_root():
+    result = solver.solve("tan(x) - 1", 1.0, max_evaluations=1)
+    assert result["roots"] == []
+    assert not result["converged"]
+    assert result["nfev"] == 0
@@ -0,0 +1,122 @@
+import math
+
+import numpy as np
+import pytest
+from sympy import sympify
+
+from expression_cache import (
+    VECTOR_SOURCE,
+    CompiledExpression,
+    ExpressionCache,
+    FastCompiledExpression,
+    compile_dual,
+    normalize_equation,
+)
+
+
+class CountingParse:
+    """sympify that counts its calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, equation):
+        self.calls += 1
+        return sympify(equation)
+
+
+@pytest.mark.parametrize(
+    "spelling",
+    ["x**3 - 2*x - 5", "x**3-2*x-5", "x^3 - 2*x - 5", "  x ** 3 -2 * x-5 "],
+)
+def test_spellings_share_a_key(spelling):
+    assert normalize_equation(spelling) == "x**3-2*x-5"
+
+
+def test_spaces_that_separate_tokens_are_kept():
+    assert normalize_equation("x ** -2") == "x**-2"
+    assert normalize_equation("x * * 2") == "x* *2"
+    assert normalize_equation("1 .5") == "1 .5"
+
+
+def test_hits_misses_and_parse_once():
+    cache = ExpressionCache(8)
+    parse = CountingParse()
+    first = cache.get("sec(x) - 2", parse)
+    assert isinstance(first, CompiledExpression)
+    assert cache.get("sec(x)-2", parse) is first
+    assert parse.calls == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ExpressionCache(2)
+    parse = CountingParse()
+    cache.get("sec(x) - 1", parse)
+    cache.get("sec(x) - 2", parse)
+    cache.get("sec(x) - 1", parse)
+    cache.get("sec(x) - 3", parse)
+    assert cache.stats()["evictions"] == 1
+    cache.get("sec(x) - 1", parse)
+    assert parse.calls == 3
+    cache.get("sec(x) - 2", parse)
+    assert parse.calls == 4
+
+
+def test_maxsize_zero_disables_caching():
+    cache = ExpressionCache(0)
+    parse = CountingParse()
+    cache.get("sec(x) - 2", parse)
+    cache.get("sec(x) - 2", parse)
+    assert parse.calls == 2
+    assert cache.stats()["size"] == 0
+
+
+def test_entry_evaluates_f_and_its_derivative():
+    entry = ExpressionCache(8).get("sec(x) - 2", sympify)
+    assert entry.f(0.5) == pytest.approx(1 / math.cos(0.5) - 2)
+    f_x, f_prime_x = entry.f_and_prime(0.5)
+    assert f_prime_x == pytest.approx(math.tan(0.5) / math.cos(0.5))
+
+
+def test_invalid_equations_are_not_cached():
+    cache = ExpressionCache(8)
+
+    def parse(equation):
+        raise ValueError("Invalid equation")
+
+    with pytest.raises(ValueError):
+        cache.get("sec(x) +", parse)
+    assert cache.stats()["size"] == 0
+
+
+def test_fast_subset_never_calls_parse():
+    def parse(equation):
+        raise AssertionError("sympy parse used")
+
+    entry = ExpressionCache(8).get("x**2 - 2*sin(x)", parse)
+    assert isinstance(entry, FastCompiledExpression)
+    assert entry.f(np.array([0.0, 1.0])) == pytest.approx([0.0, 1 - 2 * math.sin(1)])
+
+
+def test_dual_floats_use_math_and_arrays_use_numpy():
+    f = compile_dual(sympify("sin(x) + log(x)"))
+    assert "math.sin" in f.source[0]
+    assert type(f(2.0)) is float
+    assert f(2.0) == pytest.approx(math.sin(2) + math.log(2))
+    assert isinstance(f(np.float64(2.0)), np.float64)
+    assert f(np.array([1.0, 2.0])) == pytest.approx(f.vector(np.array([1.0, 2.0])))
+
+
+def test_dual_falls_back_to_numpy_where_math_raises():
+    f = compile_dual(sympify("log(x)"))
+    with np.errstate(invalid="ignore", over="ignore"):
+        assert math.isnan(f(-1.0))
+        assert compile_dual(sympify("exp(x)"))(1000.0) == math.inf
+
+
+def test_dual_without_a_math_version_only_has_the_numpy_path():
+    f = compile_dual(sympify("arg(x) + x"))
+    assert f.source[0] == VECTOR_SOURCE
+    assert f(-2.0) == pytest.approx(math.pi - 2)
@@ -0,0 +1,92 @@
+import math
+import sqlite3
+
+import pytest
+from sympy import sympify
+
+from expression_cache import CompiledExpression, ExpressionCache
+from expression_store import ExpressionStore, store_from_env
+
+
+def no_parse(equation):
+    raise AssertionError("equation parsed again")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ExpressionStore(str(tmp_path / "expressions.db"))
+
+
+def test_records_roundtrip_newest_first(store):
+    assert store.get("missing") is None
+    store.put("a", {"value": 1})
+    store.put("b", {"value": 2})
+    assert store.get("a") == {"value": 1}
+    assert [key for key, _ in store.recent(10)] == ["b", "a"]
+    assert store.recent(1) == [("b", {"value": 2})]
+    assert store.errors == 0
+
+
+def test_unreadable_records_and_files_are_counted_errors(store, tmp_path):
+    store.put("a", {"value": 1})
+    with sqlite3.connect(store.path) as connection:
+        connection.execute("UPDATE expressions SET record = ?", (b"not a pickle",))
+    assert store.get("a") is None
+    assert store.recent(10) == []
+    assert store.errors == 2
+
+    broken = ExpressionStore(str(tmp_path / "missing" / "expressions.db"))
+    broken.put("a", {"value": 1})
+    assert broken.get("a") is None
+    assert broken.errors == 2
+
+
+def test_compiled_entries_are_shared_through_the_store(store):
+    writer = ExpressionCache(8, store)
+    writer.get("sec(x) - 2", sympify)
+    assert writer.stats()["store_writes"] == 1
+
+    # Another worker, or a restart, loads it without parsing or differentiating
+    reader = ExpressionCache(8, store)
+    entry = reader.get("sec(x)-2", no_parse)
+    assert isinstance(entry, CompiledExpression)
+    assert entry.derivative_mode == "symbolic"
+    f_x, f_prime_x = entry.f_and_prime(0.5)
+    assert f_x == pytest.approx(1 / math.cos(0.5) - 2)
+    assert f_prime_x == pytest.approx(math.tan(0.5) / math.cos(0.5))
+    assert reader.stats()["store_loads"] == 1
+
+
+def test_warm_loads_the_most_recent_entries(store):
+    writer = ExpressionCache(8, store)
+    for equation in ("sec(x) - 1", "sec(x) - 2", "sec(x) - 3"):
+        writer.get(equation, sympify)
+
+    reader = ExpressionCache(2, store)
+    reader.warm()
+    assert reader.stats()["size"] == 2
+    reader.get("sec(x) - 3", no_parse)
+    reader.get("sec(x) - 2", no_parse)
+    assert reader.stats()["hits"] == 2
+
+
+def test_fast_equations_are_not_stored(store):
+    cache = ExpressionCache(8, store)
+    cache.get("x**2 - 2", sympify)
+    assert store.recent(10) == []
+
+
+def test_incompatible_records_are_recompiled_and_replaced(store):
+    store.put("sec(x)-2", {"expr": "from an older version"})
+    cache = ExpressionCache(8, store)
+    entry = cache.get("sec(x) - 2", sympify)
+    assert entry.f(0.0) == pytest.approx(-1.0)
+    assert cache.stats()["store_errors"] == 1
+    assert ExpressionCache(8, store).get("sec(x) - 2", no_parse).f(0.0) == -1.0
+
+
+def test_store_is_configured_by_environment(monkeypatch, tmp_path):
+    monkeypatch.delenv("EXPRESSION_STORE", raising=False)
+    assert store_from_env() is None
+    monkeypatch.setenv("EXPRESSION_STORE", str(tmp_path / "store.db"))
+    assert store_from_env().path == str(tmp_path / "store.db")
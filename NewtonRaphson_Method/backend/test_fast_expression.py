@@ -0,0 +1,91 @@
+import math
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from sympy import lambdify, symbols, sympify
+
+from expression_cache import ExpressionCache
+from fast_expression import Unsupported, parse_fast
+
+x = symbols("x")
+
+
+@pytest.mark.parametrize(
+    "equation",
+    [
+        "x**3 - 2*x - 5",
+        "exp(-x)*cos(2*pi*x) + E",
+        "sqrt(Abs(x)) - log(1 + x**2)",
+        "x**x",
+    ],
+)
+def test_subset_matches_sympy(equation):
+    fast = parse_fast(equation)
+    reference = lambdify(x, sympify(equation), "numpy")
+    assert type(fast.f(1.7)) is float
+    assert fast.f(1.7) == pytest.approx(reference(1.7))
+    points = np.array([0.5, 1.0, 2.5])
+    assert fast.f(points) == pytest.approx(reference(points))
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "sec(x)",
+        "y + x",
+        "x.real",
+        "sin(x, 2)",
+        "sin(x=1)",
+        "x//2",
+        "x if x else 1",
+        "'x'",
+    ],
+)
+def test_everything_else_needs_sympy(source):
+    with pytest.raises(Unsupported):
+        parse_fast(source)
+
+
+def test_powers_of_negative_numbers():
+    assert parse_fast("x**3").f(-2.0) == -8.0
+    with np.errstate(invalid="ignore"):
+        assert math.isnan(parse_fast("x**pi").f(-2.0))
+        assert math.isnan(parse_fast("x**0.5").f(np.array([-4.0]))[0])
+
+
+def test_polynomial_coefficients_from_the_syntax_tree():
+    assert parse_fast("x**3 - 2*x - 5").polynomial_coefficients == (1, 0, -2, -5)
+    assert parse_fast("(x - 1)*(x + 1)/2").polynomial_coefficients == (0.5, 0, -0.5)
+    assert parse_fast("x**-1 + 1").polynomial_coefficients == ()
+    assert parse_fast("sin(x)").polynomial_coefficients == ()
+    assert parse_fast("5").polynomial_coefficients == ()
+
+
+def test_fast_entries_differentiate_by_autodiff():
+    entry = ExpressionCache(8).get("x**2*sin(x)", sympify)
+    assert entry.derivative_mode == "autodiff"
+    _, f_prime_x = entry.f_and_prime(1.0)
+    assert f_prime_x == pytest.approx(2 * math.sin(1) + math.cos(1))
+
+
+def test_fast_equations_never_import_sympy():
+    script = (
+        "import sys\n"
+        "from main import solver\n"
+        "solver.solve('x**3 - 2*x - 5', 2.0)\n"
+        "print('sympy' in sys.modules)\n"
+        "solver.solve('sec(x) - 2', 1.0)\n"
+        "print('sympy' in sys.modules)\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, SOLVER_WORKERS="0"),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert completed.stdout.split() == ["False", "True"]
@@ -0,0 +1,62 @@
+import math
+
+import pytest
+
+from history import History
+
+FIELDS = ("iteration", "x", "error")
+
+
+def history_of(rows):
+    history = History(FIELDS, capacity=2)
+    for i in range(1, rows + 1):
+        history.append((i, i / 2, 1.0 / i))
+    return history
+
+
+def iterations(history, mode, n=10):
+    return [row["iteration"] for row in history.to_rows(mode, n)]
+
+
+def test_appends_grow_past_the_capacity():
+    history = history_of(40)
+    assert len(history) == 40
+    assert history.column("x")[-1] == 20.0
+
+
+@pytest.mark.parametrize(
+    "mode, n, expected",
+    [
+        ("full", 3, list(range(1, 11))),
+        ("summary", 3, [1, 10]),
+        ("every_n", 3, [1, 4, 7, 10]),
+        ("every_n", 4, [1, 5, 9, 10]),
+        ("last_k", 3, [8, 9, 10]),
+        ("last_k", 20, list(range(1, 11))),
+    ],
+)
+def test_modes_select_rows(mode, n, expected):
+    assert iterations(history_of(10), mode, n) == expected
+
+
+def test_single_row_and_empty_history():
+    assert iterations(history_of(1), "summary") == [1]
+    assert History(FIELDS).to_rows("summary") == []
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError, match="Unknown history mode"):
+        history_of(3).to_rows("middle")
+
+
+def test_serialized_types_and_non_finite_values():
+    history = History(FIELDS)
+    history.append((1, 0.5, math.inf))
+    history.append((2, math.nan, 0.25))
+    assert history.to_columns() == {
+        "iteration": [1, 2],
+        "x": [0.5, None],
+        "error": [None, 0.25],
+    }
+    row = history.to_rows()[0]
+    assert isinstance(row["iteration"], int)
@@ -0,0 +1,107 @@
+import math
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sympy import diff, lambdify, symbols, sympify
+
+from autodiff import compile_autodiff
+from evaluation import Evaluations
+from expression_cache import CompiledExpression, ExpressionCache
+from expression_store import ExpressionStore
+from main import app, householder_step, solver
+from metrics import PhaseTimer
+
+x = symbols("x")
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def no_parse(equation):
+    raise AssertionError("equation parsed again")
+
+
+def test_halley_and_householder_steps():
+    # f = x**2 - 2 at x = 1
+    assert householder_step([-1.0, 2.0, 2.0]) == pytest.approx(-4 / 10)
+    assert householder_step([-1.0, 2.0, 2.0, 0.0]) == pytest.approx(-30 / 72)
+    # A vanishing denominator falls back to the Newton step
+    assert householder_step([2.0, 2.0, 4.0]) == 1.0
+
+
+@pytest.mark.parametrize(
+    "equation, reference",
+    [
+        ("exp(-x)*sin(3*x)", "exp(-x)*sin(3*x)"),
+        ("x**3/(1 + x**2)", "x**3/(1 + x**2)"),
+        # sympy leaves the derivatives of Abs unevaluated
+        ("Abs(x - 3) - log(x)", "3 - x - log(x)"),
+    ],
+)
+def test_nested_duals_match_sympy(equation, reference):
+    expr = sympify(equation)
+    exprs = [sympify(reference)]
+    for _ in range(3):
+        exprs.append(diff(exprs[-1], x))
+    expected = [float(e.subs(x, 1.5)) for e in exprs]
+    assert compile_autodiff(expr, 3)(1.5) == pytest.approx(expected)
+    values = compile_autodiff(expr, 3)(np.array([1.5, 1.5]))
+    assert [value[0] for value in values] == pytest.approx(expected)
+
+
+def test_compiled_derivatives_and_abs():
+    entry = CompiledExpression(sympify("sec(x) - 2"))
+    f_x, d1, d2 = entry.derivatives(2)(0.5)
+    assert d2 == pytest.approx(lambdify(x, diff(sympify("sec(x)"), x, 2))(0.5))
+    # Derivative(re(x)) terms of Abs cannot be compiled: autodiff instead
+    entry = CompiledExpression(sympify("Abs(x) - sec(x)"))
+    assert entry.derivatives(3)(-1.0)[1] == pytest.approx(
+        -1 - math.tan(-1) / math.cos(-1)
+    )
+
+
+@pytest.mark.parametrize(
+    "method, iterations", [("newton", 6), ("halley", 4), ("householder", 3)]
+)
+def test_higher_order_methods_take_fewer_steps(method, iterations):
+    result = solver.solve("exp(x) - 10*x", 4.0, 1e-12, method=method)
+    assert result["method"] == method
+    assert result["iterations_count"] == iterations
+    assert result["root"] == pytest.approx(3.577152063957297)
+
+
+def test_derivatives_are_compiled_once_and_counted_per_order():
+    cache = ExpressionCache(8)
+    timer = PhaseTimer()
+    derivatives = cache.get_derivatives("sec(x) - 2", 3, sympify, timer)
+    assert "diff" in timer.timings
+    timer = PhaseTimer()
+    assert cache.get_derivatives("sec(x)-2", 3, no_parse, timer) is derivatives
+    assert "diff" not in timer.timings
+
+    # Each point costs f and its three derivatives
+    evaluations = Evaluations()
+    evaluations.wrap(derivatives, cost=4)(0.5)
+    assert evaluations.nfev == 4
+
+
+def test_derivatives_are_saved_to_the_store(tmp_path):
+    store = ExpressionStore(str(tmp_path / "expressions.db"))
+    ExpressionCache(8, store).get_derivatives("sec(x) - 2", 2, sympify)
+
+    entry = ExpressionCache(8, store).get("sec(x) - 2", no_parse)
+    assert entry.has_derivatives(2)
+    assert entry.derivatives(2)(0.0) == pytest.approx((-1.0, 0.0, 1.0))
+
+
+def test_method_in_the_solve_request(client):
+    request = {"equation": "x**3 - 2*x - 5", "initial_guess": 3, "method": "halley"}
+    response = client.post("/solve", json=request)
+    assert response.status_code == 200
+    assert response.json()["method"] == "halley"
+    response = client.post("/solve", json={**request, "method": "secant"})
+    assert response.status_code == 422
@@ -0,0 +1,66 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from metrics import Metrics, PhaseTimer
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_repeated_phases_add_up():
+    timer = PhaseTimer()
+    timer.add("parse", 0.25)
+    with timer.phase("parse"):
+        pass
+    timer.add("iterate", 0.5)
+    assert timer.timings["parse"] >= 0.25
+    assert timer.timings["iterate"] == 0.5
+
+
+def test_render_counters_histograms_and_gauges():
+    metrics = Metrics("test", buckets=(0.1, 1.0))
+    metrics.inc("solves_total", endpoint="solve")
+    metrics.inc("solves_total", endpoint="solve")
+    metrics.observe("request_duration_seconds", 0.5)
+    metrics.observe("request_duration_seconds", 5.0)
+    lines = metrics.render({"pending": 3}).splitlines()
+    assert "# TYPE test_solves_total counter" in lines
+    assert 'test_solves_total{endpoint="solve"} 2' in lines
+    # Buckets are cumulative and end with +Inf
+    assert 'test_request_duration_seconds_bucket{le="0.1"} 0' in lines
+    assert 'test_request_duration_seconds_bucket{le="1.0"} 1' in lines
+    assert 'test_request_duration_seconds_bucket{le="+Inf"} 2' in lines
+    assert "test_request_duration_seconds_sum 5.5" in lines
+    assert "test_request_duration_seconds_count 2" in lines
+    assert "test_pending 3" in lines
+
+
+def test_solve_reports_timings_and_metrics(client):
+    response = client.post(
+        "/solve",
+        json={"equation": "x**2 - 2", "initial_guess": 1.0, "include_timings": True},
+    )
+    assert response.status_code == 200
+    timings = response.json()["timings_ms"]
+    assert {"iterate", "queue_wait", "serialize"} <= timings.keys()
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'newton_solves_total{endpoint="/solve"}' in text
+    assert (
+        'newton_phase_duration_seconds_count{endpoint="/solve",phase="iterate"}' in text
+    )
+    assert "newton_solver_pending_jobs 0" in text
+
+
+def test_timings_are_left_out_by_default(client):
+    response = client.post(
+        "/solve", json={"equation": "x**2 - 3", "initial_guess": 1.0}
+    )
+    assert response.json()["timings_ms"] is None
@@ -0,0 +1,60 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app, solver
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_all_real_roots_come_from_the_companion_matrix():
+    result = solver.solve("x**3 - 6*x**2 + 11*x - 6", 0.0)
+    assert result["path"] == "polynomial"
+    assert result["roots"] == pytest.approx([1.0, 2.0, 3.0])
+    assert result["converged"]
+    assert result["complex_roots"] is None
+
+
+def test_roots_outside_the_search_range_are_found():
+    result = solver.solve("x**2 - 100", 0.0, search_range=2.0)
+    assert result["roots"] == pytest.approx([-10.0, 10.0])
+
+
+def test_multiple_root_is_reported_once():
+    result = solver.solve("(x - 1)**2*(x + 2)", 0.0)
+    assert result["roots"] == pytest.approx([-2.0, 1.0], abs=1e-6)
+
+
+def test_complex_roots_on_request():
+    result = solver.solve("x**4 - 1", 0.0, include_complex=True)
+    assert result["roots"] == pytest.approx([-1.0, 1.0])
+    complex_roots = sorted(
+        (complex(root["real"], root["imag"]) for root in result["complex_roots"]),
+        key=lambda z: z.imag,
+    )
+    assert complex_roots == pytest.approx([-1j, 1j])
+
+
+def test_no_real_roots():
+    result = solver.solve("x**2 + 1", 0.0, include_complex=True)
+    assert result["roots"] == []
+    assert not result["converged"]
+    assert result["message"] == "The polynomial has no real roots."
+    assert len(result["complex_roots"]) == 2
+
+
+def test_non_polynomials_take_another_path():
+    assert solver.solve("x**2 - 2**x", 1.0)["path"] != "polynomial"
+
+
+def test_complex_roots_in_the_response(client):
+    response = client.post(
+        "/solve",
+        json={"equation": "x**2 + 4", "initial_guess": 0, "include_complex": True},
+    )
+    assert response.status_code == 200
+    imag = sorted(root["imag"] for root in response.json()["complex_roots"])
+    assert imag == pytest.approx([-2.0, 2.0])
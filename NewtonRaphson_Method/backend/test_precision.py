@@ -0,0 +1,103 @@
+import mpmath
+import pytest
+
+import precision
+from main import solver
+from precision import (
+    STAGNATED,
+    StagnationMonitor,
+    mpmath_steps,
+    needs_escalation,
+    root_digits,
+)
+
+
+def run(steps):
+    """Rows yielded by a step generator and the value it returned"""
+    rows = []
+    while True:
+        try:
+            rows.append(next(steps))
+        except StopIteration as stop:
+            return rows, stop.value
+
+
+def test_stagnation_after_repeated_stalls_near_the_limit():
+    monitor = StagnationMonitor()
+    stagnated = [monitor.update(1.0, 1e-9, 1e-3) for _ in range(4)]
+    assert stagnated == [False, False, False, True]
+    # Steps below what float64 resolves stagnate at once
+    assert StagnationMonitor().update(1.0, 1e-17, 1e-3)
+
+
+def test_needs_escalation():
+    assert needs_escalation(STAGNATED, 1.0, 1e-9, 1e-10, 1e-6)
+    assert not needs_escalation("converged", 1.0, 1e-9, 1e-20, 1e-6)
+    # Unverified root, and a tolerance float64 cannot resolve
+    assert needs_escalation("converged", 1.0, 1e-9, 1e-3, 1e-6)
+    assert needs_escalation("converged", 1.0, 1e-9, 1e-20, 1e-20)
+    # A zero derivative far from the float64 limit is not a precision problem
+    assert not needs_escalation("Derivative is zero", 1.0, 0.5, None, 1e-6)
+    assert not needs_escalation(STAGNATED, float("nan"), None, None, 1e-6)
+
+
+def test_root_digits_cover_the_tolerance():
+    assert root_digits(1.4, 1e-30) == 33
+    assert root_digits(123.0, 1e-6) == 11
+
+
+def test_mpmath_steps_converge_past_float64():
+    rows, (root, f_root, digits) = run(
+        mpmath_steps(lambda x: (x**2 - 2, 2 * x), 1.0, 1e-30, 50, first=4)
+    )
+    assert rows[0] == (4, 1.0, -1.0, 2.0, 0.5)
+    assert digits == 46
+    with mpmath.workdps(50):
+        assert abs(mpmath.mpf(root) - mpmath.sqrt(2)) < mpmath.mpf("1e-30")
+    assert f_root < 1e-30
+
+
+def test_mpmath_steps_give_up_when_no_stage_reduces_f():
+    rows, result = run(mpmath_steps(lambda x: (x**2 + 1, 2 * x), 0.5, 1e-10, 5))
+    assert result == (None, None, 128)
+    assert len(rows) == 15
+
+
+def test_adaptive_solve_escalates_past_float64():
+    float64 = solver.solve("x**2 - 2", 1.0, 1e-20)
+    assert float64["precise_root"] is None
+    assert float64["precision_digits"] is None
+
+    result = solver.solve("x**2 - 2", 1.0, 1e-20, precision="adaptive")
+    assert result["precise_root"].startswith("1.41421356237309504880")
+    assert result["precision_digits"] == 36
+    assert "converged in mpmath at 36 digits" in result["message"]
+    # float64 alone runs out of iterations short of the tolerance
+    assert result["iterations_count"] < float64["iterations_count"]
+
+
+def test_adaptive_solve_keeps_decimal_literals_exact():
+    result = solver.solve("x**3 - 0.1", 0.5, 1e-30, precision="adaptive")
+    with mpmath.workdps(40):
+        error = mpmath.mpf(result["precise_root"]) - mpmath.cbrt(mpmath.mpf("0.1"))
+        assert abs(error) < mpmath.mpf("1e-25")
+
+
+def test_adaptive_solve_at_a_multiple_root():
+    result = solver.solve("(x - 1)**3*exp(x)", 2.0, 1e-10, precision="adaptive")
+    assert float(result["precise_root"]) == pytest.approx(1.0, abs=1e-8)
+
+
+def test_escalation_that_does_not_converge():
+    # No real root: |f| bottoms out at 1e-20 near x = 1
+    result = solver.solve("(x - 1)**2 + 1e-20", 2.0, 1e-12, 50, precision="adaptive")
+    assert result["precise_root"] is None
+    assert result["precision_digits"] == 128
+    assert "did not converge in mpmath at 128 digits" in result["message"]
+
+
+def test_escalation_is_capped_at_max_digits(monkeypatch):
+    monkeypatch.setattr(precision, "MAX_DIGITS", 32)
+    rows, result = run(mpmath_steps(lambda x: (x**2 + 1, 2 * x), 0.5, 1e-10, 5))
+    assert result == (None, None, 32)
+    assert len(rows) == 5
@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import response_cache as response_cache_module
+from main import EquationRequest, app, solve_cache_key
+from response_cache import ResponseCache
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+class Clock:
+    """Stand-in for the time module of response_cache"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def counter():
+    calls = []
+
+    async def compute():
+        calls.append(None)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    return compute, calls
+
+
+def test_hits_until_the_ttl_expires(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache_module, "time", clock)
+    cache = ResponseCache(maxsize=8, ttl=10.0)
+    compute, calls = counter()
+
+    async def scenario():
+        assert await cache.get("key", compute) == (1, False)
+        clock.now += 9.0
+        assert await cache.get("key", compute) == (1, True)
+        clock.now += 2.0
+        assert await cache.get("key", compute) == (2, False)
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_identical_requests_in_flight_share_one_computation():
+    cache = ResponseCache()
+    compute, calls = counter()
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get("key", compute) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert results == [(1, False)] + [(1, True)] * 4
+    assert (cache.misses, cache.coalesced, cache.stats()["inflight"]) == (1, 4, 0)
+
+
+def test_a_cancelled_waiter_does_not_cancel_the_computation():
+    cache = ResponseCache()
+    compute, calls = counter()
+
+    async def scenario():
+        first = asyncio.ensure_future(cache.get("key", compute))
+        second = asyncio.ensure_future(cache.get("key", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == (1, True)
+    assert cache.stats()["size"] == 1
+
+
+def test_failures_are_not_cached():
+    cache = ResponseCache()
+
+    async def fail():
+        raise ValueError("bad equation")
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                await cache.get("key", fail)
+
+    asyncio.run(scenario())
+    assert (cache.misses, cache.stats()["size"]) == (2, 0)
+
+
+def test_least_recently_used_response_is_evicted():
+    cache = ResponseCache(maxsize=2)
+
+    async def scenario():
+        for key in ("a", "b", "a", "c"):
+            await cache.get(key, counter()[0])
+        return await cache.get("b", counter()[0])
+
+    assert asyncio.run(scenario()) == (1, False)
+    assert cache.evictions == 2
+
+
+def test_maxsize_zero_disables_caching():
+    cache = ResponseCache(maxsize=0)
+    compute, calls = counter()
+
+    async def scenario():
+        await cache.get("key", compute)
+        return await cache.get("key", compute)
+
+    assert asyncio.run(scenario()) == (2, False)
+
+
+def test_equivalent_solve_requests_share_a_response(client):
+    first = client.post("/solve", json={"equation": "x**2 - 7", "initial_guess": 2})
+    second = client.post("/solve", json={"equation": "x^2-7", "initial_guess": 2})
+    assert (first.json()["cached"], second.json()["cached"]) == (False, True)
+    assert second.json()["roots"] == first.json()["roots"]
+
+    other = client.post("/solve", json={"equation": "x**2 - 7", "initial_guess": 3})
+    assert not other.json()["cached"]
+    assert client.get("/cache/stats").json()["response_cache"]["hits"] >= 1
+
+
+def test_solve_cache_key_uses_the_normalized_equation():
+    request = EquationRequest(equation="besselj(0, x) ^ 2", initial_guess=1.0)
+    key, params = solve_cache_key(request)
+    assert key == "besselj(0,x)**2"
+    assert ("initial_guess", 1.0) in params
@@ -0,0 +1,46 @@
+import math
+
+import numpy as np
+import pytest
+
+from main import solver
+
+
+def test_lanes_converge_independently():
+    f_and_prime = solver.compile_equation("x**2 - 4").f_and_prime
+    roots = solver.solve_vectorized(f_and_prime, [1.0, -3.0, 0.0, 10.0])
+    # x = 0 has a zero derivative, so that lane diverges
+    assert roots[[0, 1, 3]] == pytest.approx([2.0, -2.0, 2.0])
+    assert math.isnan(roots[2])
+
+
+def test_lanes_are_reported_as_they_converge():
+    f_and_prime = solver.compile_equation("x**2 - 4").f_and_prime
+    finished = [
+        lanes.tolist()
+        for lanes, _ in solver.vectorized_steps(f_and_prime, [2.1, 100.0])
+    ]
+    assert finished[0] == [0]
+    assert finished[-1] == [1]
+
+
+def test_multistart_finds_every_root_between_poles():
+    result = solver.solve("tan(x) - 1", 1.0)
+    assert result["path"] == "multistart"
+    expected = [math.pi / 4 + k * math.pi for k in (-1, 0, 1, 2)]
+    assert result["roots"] == pytest.approx(expected)
+    assert result["root"] == pytest.approx(math.pi / 4)
+    assert result["converged"]
+
+
+def test_no_root_in_range():
+    result = solver.solve("1/x - 0.5", -5.0, search_range=4.0)
+    assert result["roots"] == []
+    assert not result["converged"]
+    assert result["root"] is None
+
+
+def test_search_points_include_the_initial_guess():
+    result = solver.solve("sqrt(x) - 1", 1.0, num_search_points=0)
+    assert result["roots"] == pytest.approx([1.0])
+    assert np.isfinite(result["final_error"])
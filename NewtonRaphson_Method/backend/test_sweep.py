@@ -0,0 +1,88 @@
+import math
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from expression_cache import ExpressionCache
+from main import app, solver
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_branches_follow_the_roots():
+    p_values = np.linspace(0.0, 4.0, 9).tolist()
+    result = solver.sweep("x**3 - p*x - 1", "p", p_values)
+    assert result["complete"]
+    (branch,) = result["branches"]
+    for root, p in zip(branch, p_values):
+        assert root**3 - p * root - 1 == pytest.approx(0.0, abs=1e-9)
+
+
+def test_branches_are_lost_past_a_fold():
+    result = solver.sweep("x**2 - p", "p", [1.0, 0.5, 0.1, -0.1, -0.5])
+    assert result["complete"]
+    negative, positive = result["branches"]
+    assert positive[:3] == pytest.approx([1.0, math.sqrt(0.5), math.sqrt(0.1)])
+    assert negative[:3] == pytest.approx([-1.0, -math.sqrt(0.5), -math.sqrt(0.1)])
+    assert positive[3:] == negative[3:] == [None, None]
+    assert "2 branch(es) were lost" in result["message"]
+
+
+def test_initial_guesses_pick_the_branches():
+    result = solver.sweep("x**2 - p", "p", [1.0, 4.0], initial_guesses=[0.8])
+    assert result["branches"] == [pytest.approx([1.0, 2.0])]
+
+
+def test_budget_keeps_the_complete_p_values():
+    p_values = np.linspace(0.0, 0.9, 50).tolist()
+    result = solver.sweep(
+        "sin(x) - p", "p", p_values, lower=-1, upper=1, max_evaluations=200
+    )
+    assert not result["complete"]
+    assert result["nfev"] <= 200
+    (branch,) = result["branches"]
+    reached = [root for root in branch if root is not None]
+    assert 1 < len(reached) < len(p_values)
+    assert reached == pytest.approx(np.arcsin(p_values[: len(reached)]))
+    assert "max_evaluations reached" in result["message"]
+
+
+def test_spellings_share_one_parametric_entry():
+    # No parse function: the fast subset never needs sympy
+    cache = ExpressionCache(8)
+    first = cache.get_parametric("x - p", "p", None)
+    assert cache.get_parametric("x-p", "p", None) is first
+    assert cache.get_parametric("x - q", "q", None) is not first
+    assert cache.stats()["hits"] == 1
+    assert first(2.0, 0.5) == (1.5, 1.0)
+
+
+def test_other_symbols_are_rejected():
+    with pytest.raises(ValueError, match="only contain x and p, not q"):
+        solver.sweep("x - p*q", "p", [0.0, 1.0])
+
+
+def test_sweep_endpoint(client):
+    response = client.post(
+        "/solve/sweep",
+        json={"equation": "x**2 - p", "p_values": [1, 4, 9], "lower": 0, "upper": 5},
+    )
+    assert response.status_code == 200
+    assert response.json()["branches"] == [pytest.approx([1.0, 2.0, 3.0])]
+
+
+@pytest.mark.parametrize(
+    "request_fields",
+    [
+        {"equation": "x - p*q", "p_values": [0, 1]},
+        {"equation": "x - x0", "parameter": "x0 + 1", "p_values": [0]},
+        {"equation": "x - p", "p_values": []},
+    ],
+)
+def test_sweep_endpoint_rejects_bad_requests(client, request_fields):
+    assert client.post("/solve/sweep", json=request_fields).status_code == 400
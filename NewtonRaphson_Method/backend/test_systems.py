@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sympy import sympify
+
+from evaluation import Evaluations
+from main import app
+from systems import compile_system, damped_newton, jacobian_blocks
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def parse(equation):
+    return sympify(equation)
+
+
+def test_circle_and_line():
+    system = compile_system(("x**2 + y**2 - 4", "x - y"), (), parse)
+    points, residuals, converged, _ = damped_newton(
+        system, [[1.0, 1.0], [-1.0, -2.0]], Evaluations()
+    )
+    assert converged.all()
+    assert np.allclose(points, [[2**0.5, 2**0.5], [-(2**0.5), -(2**0.5)]])
+    assert (residuals < 1e-9).all()
+
+
+def test_variables_order_the_unknowns():
+    system = compile_system(("x2 - 1", "x10 - 2"), (), parse)
+    assert system.variables == ["x2", "x10"]
+    system = compile_system(("x - 1", "y - 2"), ("y", "x"), parse)
+    assert system.variables == ["y", "x"]
+
+
+def test_system_must_be_square():
+    with pytest.raises(ValueError, match="as many equations as variables"):
+        compile_system(("x + y - 1",), (), parse)
+    with pytest.raises(ValueError, match="not variables: z"):
+        compile_system(("x + z", "y"), ("x", "y"), parse)
+
+
+def test_independent_blocks():
+    system = compile_system(("x**2 - 4", "y**3 - 8", "z + x - 1"), (), parse)
+    assert system.linear_solver == "block"
+    blocks = jacobian_blocks(system.rows, system.cols, system.size)
+    assert sorted(len(unknowns) for _, unknowns in blocks) == [1, 2]
+    points, _, converged, _ = damped_newton(system, [[3.0, 3.0, 0.0]], Evaluations())
+    assert converged[0]
+    assert np.allclose(points[0], [2.0, 2.0, -1.0])
+
+
+def test_structurally_singular_jacobian_is_one_block():
+    # Two equations in x only: no square blocks
+    blocks = jacobian_blocks(np.array([0, 1]), np.array([0, 0]), 2)
+    assert len(blocks) == 1
+
+
+def test_stalled_line_search_stops_unconverged():
+    # |F|^2 has a local minimum at x = 1, where F = 1; the root is near -2.1
+    system = compile_system(("x**3 - 3*x + 3",), ("x",), parse)
+    points, residuals, converged, iterations = damped_newton(
+        system, [[1.001], [-3.0]], Evaluations()
+    )
+    assert not converged[0]
+    assert iterations[0] == 1
+    # No step that increases |F| is taken
+    assert points[0, 0] == 1.001
+    assert converged[1]
+    assert points[1, 0] == pytest.approx(-2.1038034, abs=1e-6)
+
+
+def test_budget_stops_lanes_where_they_are():
+    system = compile_system(("x**2 + y**2 - 4", "x - y"), (), parse)
+    evaluations = Evaluations(max_evaluations=4)
+    points, _, converged, _ = damped_newton(system, [[5.0, 1.0]], evaluations)
+    assert evaluations.exhausted
+    assert not converged[0]
+    assert np.isfinite(points[0]).all()
+
+
+def test_system_endpoint_finds_every_solution(client):
+    response = client.post(
+        "/solve/system",
+        json={"equations": ["x**2 + y**2 - 4", "x - y"], "initial_guesses": [[1, 1]]},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["converged"]
+    assert data["root"] == pytest.approx([2**0.5, 2**0.5])
+    assert np.allclose(data["roots"], [[-(2**0.5), -(2**0.5)], [2**0.5, 2**0.5]])
+    assert data["num_starts"] == 21
+
+
+def test_system_endpoint_without_solutions(client):
+    response = client.post(
+        "/solve/system",
+        json={"equations": ["x**2 + 1", "y - 2"], "initial_guesses": [[1, 1]]},
+    )
+    data = response.json()
+    assert (data["roots"], data["converged"]) == ([], False)
+    assert data["linear_solver"] == "block"
+
+
+@pytest.mark.parametrize(
+    "request_fields",
+    [
+        {"equations": ["x + y - 1"], "initial_guesses": [[1, 1]]},
+        {"equations": ["x - 1", "y - 2"], "initial_guesses": [[1]]},
+    ],
+)
+def test_system_endpoint_rejects_bad_requests(client, request_fields):
+    assert client.post("/solve/system", json=request_fields).status_code == 400
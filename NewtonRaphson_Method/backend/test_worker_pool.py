@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+import pytest
+
+from worker_pool import PoolBusyError, SolverPool, group_jobs, pool_from_env
+
+
+def add(a, b):
+    return a + b
+
+
+def wait_for(event):
+    event.wait(5)
+    return "done"
+
+
+def test_run_returns_result_and_queue_wait():
+    pool = SolverPool(0, 4, stats_hook=lambda: {"hits": 1, "maxsize": 8})
+    result, queue_wait = asyncio.run(pool.run(add, 1, 2))
+    assert result == 3
+    assert queue_wait >= 0
+    assert pool.pending == 0
+    assert pool.worker_stats() == {"hits": 1, "maxsize": 8, "workers": 1}
+
+
+def test_full_queue_is_rejected_until_a_job_finishes():
+    pool = SolverPool(0, 1)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.create_task(pool.run(wait_for, release))
+        await asyncio.sleep(0.05)
+        assert pool.pending == 1
+        with pytest.raises(PoolBusyError):
+            await pool.run(add, 1, 2)
+        release.set()
+        assert (await first)[0] == "done"
+        assert pool.pending == 0
+        return (await pool.run(add, 1, 2))[0]
+
+    assert asyncio.run(scenario()) == 3
+
+
+def test_settings_are_reported_once_and_counters_summed():
+    pool = SolverPool(0, 4)
+    pool._worker_stats = {
+        1: {"hits": 2, "maxsize": 128},
+        2: {"hits": 3, "maxsize": 128},
+    }
+    assert pool.worker_stats() == {"hits": 5, "maxsize": 128, "workers": 2}
+
+
+def test_group_jobs_keeps_keys_together_and_balances():
+    jobs = group_jobs(["a", "b", "a", "c", "a", "b"], 2)
+    assert len(jobs) == 2
+    groups = dict(group for job in jobs for group in job)
+    assert groups == {"a": [0, 2, 4], "b": [1, 5], "c": [3]}
+    sizes = sorted(sum(len(indices) for _, indices in job) for job in jobs)
+    assert sizes == [3, 3]
+    assert len(group_jobs(["a", "a"], 4)) == 1
+
+
+def test_pool_from_env(monkeypatch):
+    monkeypatch.setenv("SOLVER_WORKERS", "3")
+    monkeypatch.delenv("SOLVER_MAX_QUEUE", raising=False)
+    pool = pool_from_env()
+    assert (pool.max_workers, pool.max_queue) == (3, 24)
+    monkeypatch.setenv("SOLVER_MAX_QUEUE", "5")
+    assert pool_from_env().max_queue == 5
+
+
+def count_forever(produced):
+    n = 0
+    while True:
+        produced.append(n)
+        yield n
+        n += 1
+
+
+def fail_after_one():
+    yield 1
+    raise ValueError("bad equation")
+
+
+def test_stream_yields_items_and_raises_job_errors():
+    pool = SolverPool(0, 4)
+
+    async def scenario():
+        items = []
+        with pytest.raises(ValueError, match="bad equation"):
+            async for item in pool.stream(fail_after_one):
+                items.append(item)
+        return items
+
+    assert asyncio.run(scenario()) == [1]
+    assert pool.pending == 0
+
+
+def test_closing_a_stream_stops_its_job_and_frees_the_slot():
+    pool = SolverPool(0, 1)
+    produced = []
+
+    async def scenario():
+        events = pool.stream(count_forever, produced)
+        assert await anext(events) == 0
+        with pytest.raises(PoolBusyError):
+            await anext(pool.stream(count_forever, []))
+        await events.aclose()
+        for _ in range(50):
+            if pool.pending == 0:
+                break
+            await asyncio.sleep(0.05)
+        assert pool.pending == 0
+        stopped_at = len(produced)
+        await asyncio.sleep(0.2)
+        return stopped_at
+
+    stopped_at = asyncio.run(scenario())
+    assert len(produced) == stopped_at
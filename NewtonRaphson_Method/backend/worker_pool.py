@@ -0,0 +1,273 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+# Most items a streaming job may have waiting for the API process; the job
+# pauses while the client reads more slowly than it produces them
+STREAM_BUFFER = 64
+
+# Seconds between checks for a closed stream or a dead worker
+STREAM_POLL = 0.5
+
+
+# Worker stats that are settings, the same in every worker, rather than counters
+WORKER_SETTINGS = ("maxsize",)
+
+
+class PoolBusyError(RuntimeError):
+    """Raised when the solver pool already has its maximum number of queued jobs"""
+
+
+def warm_worker(warm_hook=None):
+    """Import numpy once when a worker starts, then run warm_hook
+
+    sympy is left to be imported by the first equation that needs it, so
+    workers start quickly and equations of the fast_expression subset never
+    pay for it.
+    """
+    import numpy  # noqa: F401
+
+    if warm_hook is not None:
+        warm_hook()
+
+
+def run_job(fn, args, submitted_at, stats_hook):
+    """Run a job inside a worker and report how long it waited in the queue"""
+    queue_wait = time.time() - submitted_at
+    result = fn(*args)
+    stats = stats_hook() if stats_hook is not None else None
+    return result, queue_wait, os.getpid(), stats
+
+
+def put_message(messages, closed, message) -> bool:
+    """Put a message on a stream's queue, waiting while it is full
+
+    Returns False, without putting it, once the stream has been closed.
+    """
+    while not closed.is_set():
+        try:
+            messages.put(message, timeout=STREAM_POLL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def run_stream_job(fn, args, messages, closed, stats_hook):
+    """Run a generator job inside a worker, putting its items on `messages`
+
+    Puts ("item", item) for every item, then ("done", (pid, stats)) or
+    ("error", exception). Stops at the next item once `closed` is set.
+    """
+    try:
+        generator = fn(*args)
+        try:
+            for item in generator:
+                if not put_message(messages, closed, ("item", item)):
+                    return
+        finally:
+            generator.close()
+    except Exception as e:
+        put_message(messages, closed, ("error", e))
+        return
+    stats = stats_hook() if stats_hook is not None else None
+    put_message(messages, closed, ("done", (os.getpid(), stats)))
+
+
+def next_message(messages, closed, future):
+    """Wait for the next message of a streaming job
+
+    Returns None once the stream has been closed, and raises when the job
+    ended without its last message (e.g. its worker died).
+    """
+    while not closed.is_set():
+        try:
+            return messages.get(timeout=STREAM_POLL)
+        except queue.Empty:
+            if future.done():
+                future.result()
+                try:
+                    return messages.get_nowait()
+                except queue.Empty:
+                    raise RuntimeError("Streaming job ended without a result")
+    return None
+
+
+class SolverPool:
+    """Process pool that runs CPU-bound solver work off the event loop
+
+    `max_workers=0` runs jobs in a single background thread instead, which is
+    handy for development. At most `max_queue` jobs may be waiting or running
+    at once; further submissions raise PoolBusyError. `warm_hook` runs once in
+    each worker when it starts. Generator jobs stream their items back with
+    `stream`, through queues of a multiprocessing manager started on first
+    use.
+    """
+
+    def __init__(
+        self, max_workers: int, max_queue: int, stats_hook=None, warm_hook=None
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.stats_hook = stats_hook
+        self.warm_hook = warm_hook
+        self._executor = None
+        self._manager = None
+        self._pending = 0
+        self._worker_stats = {}
+
+    def _get_executor(self):
+        # Created lazily so importing this module in a worker never starts a pool
+        if self._executor is None:
+            if self.max_workers > 0:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=warm_worker,
+                    initargs=(self.warm_hook,),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, initializer=warm_worker, initargs=(self.warm_hook,)
+                )
+        return self._executor
+
+    async def run(self, fn, *args):
+        """Run fn(*args) in the pool and return (result, queue wait in seconds)"""
+        if self._pending >= self.max_queue:
+            raise PoolBusyError("Solver queue is full, try again shortly")
+
+        self._pending += 1
+        try:
+            future = self._get_executor().submit(
+                run_job, fn, args, time.time(), self.stats_hook
+            )
+            result, queue_wait, pid, stats = await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next request
+            self._executor = None
+            raise
+        finally:
+            self._pending -= 1
+
+        if stats is not None:
+            self._worker_stats[pid] = stats
+        return result, queue_wait
+
+    def _stream_channel(self):
+        """Queue and closed flag of a new stream, shared with the job's worker"""
+        if self.max_workers > 0:
+            if self._manager is None:
+                self._manager = multiprocessing.Manager()
+            return self._manager.Queue(STREAM_BUFFER), self._manager.Event()
+        return queue.Queue(STREAM_BUFFER), threading.Event()
+
+    def _release(self):
+        self._pending -= 1
+
+    def _release_on(self, loop):
+        """Done callback of a job's future that frees its slot on the event loop"""
+
+        def release(_):
+            try:
+                loop.call_soon_threadsafe(self._release)
+            except RuntimeError:
+                # The event loop has closed; nothing is waiting for the slot
+                pass
+
+        return release
+
+    async def stream(self, fn, *args):
+        """Run the generator function fn(*args) in the pool, yielding its items
+
+        Counts against max_queue like run: the first iteration raises
+        PoolBusyError when the queue is full. Exceptions of the job are
+        raised here. Closing this generator (e.g. when the client
+        disconnects) stops the job at its next item; its slot is freed once
+        it has stopped.
+        """
+        if self._pending >= self.max_queue:
+            raise PoolBusyError("Solver queue is full, try again shortly")
+
+        self._pending += 1
+        future = None
+        messages, closed = self._stream_channel()
+        try:
+            future = self._get_executor().submit(
+                run_stream_job, fn, args, messages, closed, self.stats_hook
+            )
+            while True:
+                kind, payload = await asyncio.to_thread(
+                    next_message, messages, closed, future
+                )
+                if kind == "item":
+                    yield payload
+                elif kind == "error":
+                    raise payload
+                else:
+                    pid, stats = payload
+                    if stats is not None:
+                        self._worker_stats[pid] = stats
+                    return
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next request
+            self._executor = None
+            raise
+        finally:
+            closed.set()
+            if future is None or future.done():
+                self._release()
+            else:
+                future.add_done_callback(self._release_on(asyncio.get_running_loop()))
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def worker_stats(self):
+        """Sum the latest stats reported by each worker
+
+        Settings (WORKER_SETTINGS) are reported once, as the per-worker value.
+        """
+        totals = {}
+        for stats in self._worker_stats.values():
+            for key, value in stats.items():
+                if key in WORKER_SETTINGS:
+                    totals[key] = value
+                else:
+                    totals[key] = totals.get(key, 0) + value
+        totals["workers"] = len(self._worker_stats)
+        return totals
+
+
+def group_jobs(keys, max_jobs: int):
+    """Group item indices by key and spread the groups over at most max_jobs jobs
+
+    Items sharing a key always land in the same job so each key is only
+    compiled once. Larger groups are placed first, each into the job with the
+    fewest items so far. Returns a list of jobs, each a list of (key, indices).
+    """
+    groups = {}
+    for index, key in enumerate(keys):
+        groups.setdefault(key, []).append(index)
+
+    jobs = [[] for _ in range(max(1, min(max_jobs, len(groups))))]
+    sizes = [0] * len(jobs)
+    for key, indices in sorted(groups.items(), key=lambda item: -len(item[1])):
+        smallest = sizes.index(min(sizes))
+        jobs[smallest].append((key, indices))
+        sizes[smallest] += len(indices)
+
+    return [job for job in jobs if job]
+
+
+def pool_from_env(stats_hook=None, warm_hook=None):
+    """Build a SolverPool configured by SOLVER_WORKERS and SOLVER_MAX_QUEUE"""
+    max_workers = int(os.getenv("SOLVER_WORKERS", str(os.cpu_count() or 1)))
+    max_queue = int(os.getenv("SOLVER_MAX_QUEUE", str(max(max_workers, 1) * 8)))
+    return SolverPool(max_workers, max_queue, stats_hook, warm_hook)
@@ -0,0 +1,212 @@
+import numpy as np
+from numpy.polynomial import chebyshev as C
+
+# Degrees of the first and the largest interpolant tried
+MIN_DEGREE = 16
+MAX_DEGREE = 4096
+# Coefficients below this, relative to max |f| on the interval, are noise
+CHOP_TOLERANCE = 1e-13
+# Interpolants of higher degree are split before the eigenvalue solve
+SUBDIVIDE_DEGREE = 50
+# Split point on [-1, 1], slightly off-centre so that a root at the
+# middle of a symmetric interval does not land on the boundary
+SPLIT_POINT = -0.004849834917525
+# Eigenvalues this close to the real interval [-1, 1] count as real roots
+REAL_TOLERANCE = 1e-6
+# Defaults of enumerate_roots: largest degree per piece, most pieces in total
+# and the smallest piece width relative to the whole range
+PIECE_DEGREE = 256
+MAX_PIECES = 100_000
+MIN_WIDTH_FRACTION = 1e-6
+
+
+class Unresolved(ValueError):
+    """f could not be represented by a Chebyshev interpolant on the interval"""
+
+
+class Undefined(Unresolved):
+    """f is not finite at any sample point of the interval"""
+
+
+def chebyshev_points(n: int):
+    """The n + 1 Chebyshev points of the second kind on [-1, 1], from 1 to -1"""
+    return np.cos(np.pi * np.arange(n + 1) / n)
+
+
+def to_interval(t, a: float, b: float):
+    return (a + b) / 2 + (b - a) / 2 * t
+
+
+def values_to_coefficients(values):
+    """Chebyshev coefficients of the interpolant through values at chebyshev_points"""
+    n = len(values) - 1
+    if n == 0:
+        return np.array(values, dtype=float)
+    extended = np.concatenate((values, values[n - 1 : 0 : -1]))
+    coefficients = np.fft.rfft(extended).real[: n + 1] / n
+    coefficients[0] /= 2
+    coefficients[n] /= 2
+    return coefficients
+
+
+def chop(coefficients, threshold: float):
+    """Drop the trailing coefficients below threshold (keeps at least one)"""
+    large = np.nonzero(np.abs(coefficients) > threshold)[0]
+    return coefficients[: large[-1] + 1 if len(large) else 1]
+
+
+def interpolate(
+    evaluate, a: float, b: float, min_degree=MIN_DEGREE, max_degree=MAX_DEGREE
+):
+    """Adaptively build the Chebyshev interpolant of f on [a, b]
+
+    `evaluate` maps an array of points to f at those points (NaN where f is
+    undefined). The degree doubles until the trailing coefficients have
+    decayed to rounding level; each doubling only samples the new points.
+    Returns (chopped coefficients, chop threshold) or raises Unresolved when
+    f is not finite on [a, b] or does not resolve within max_degree.
+    """
+    n = min_degree
+    values = np.asarray(evaluate(to_interval(chebyshev_points(n), a, b)), dtype=float)
+
+    while True:
+        finite = np.isfinite(values)
+        if not np.any(finite):
+            raise Undefined(f"f is not finite anywhere on [{a}, {b}]")
+        if not np.all(finite):
+            raise Unresolved(f"f is not finite everywhere on [{a}, {b}]")
+
+        # Rounding noise of the samples: relative to max |f|, plus the error
+        # of f at points rounded to the precision of x (|x| eps |f'|)
+        points = to_interval(chebyshev_points(n), a, b)
+        with np.errstate(all="ignore"):
+            coefficients = values_to_coefficients(values)
+            slope = np.max(np.abs(np.diff(values) / np.diff(points)))
+            threshold = (
+                np.max(np.abs(values)) * (CHOP_TOLERANCE + n * np.finfo(float).eps)
+                + np.finfo(float).eps * max(abs(a), abs(b)) * slope
+            )
+        if not (np.all(np.isfinite(coefficients)) and np.isfinite(threshold)):
+            raise Unresolved(f"f overflows on [{a}, {b}]")
+        tail = coefficients[-max(4, n // 8) :]
+        if np.all(np.abs(tail) <= threshold):
+            return chop(coefficients, threshold), threshold
+
+        if 2 * n > max_degree:
+            raise Unresolved(f"f is not resolved by degree {max_degree} on [{a}, {b}]")
+
+        # The points of degree 2n interleave the ones already sampled
+        refined = np.empty(2 * n + 1)
+        refined[::2] = values
+        refined[1::2] = evaluate(
+            to_interval(np.cos(np.pi * np.arange(1, 2 * n, 2) / (2 * n)), a, b)
+        )
+        values = refined
+        n *= 2
+
+
+def restrict(coefficients, lower: float, upper: float, threshold: float):
+    """Coefficients of the interpolant restricted to [lower, upper] within [-1, 1]"""
+    n = max(len(coefficients) - 1, 1)
+    values = C.chebval(to_interval(chebyshev_points(n), lower, upper), coefficients)
+    return chop(values_to_coefficients(values), threshold)
+
+
+def interpolant_roots(coefficients, threshold: float):
+    """Real roots in [-1, 1] of a Chebyshev series on [-1, 1]
+
+    The roots are the eigenvalues of the colleague matrix. Series of degree
+    above SUBDIVIDE_DEGREE are restricted to two subintervals first, which
+    keeps every eigenvalue problem small. Returns an unsorted array.
+    """
+    if len(coefficients) < 2:
+        # Constant: no isolated roots
+        return np.empty(0)
+
+    if len(coefficients) - 1 > SUBDIVIDE_DEGREE:
+        return np.concatenate(
+            [
+                to_interval(
+                    interpolant_roots(
+                        restrict(coefficients, left, right, threshold), threshold
+                    ),
+                    left,
+                    right,
+                )
+                for left, right in ((-1.0, SPLIT_POINT), (SPLIT_POINT, 1.0))
+            ]
+        )
+
+    t = C.chebroots(coefficients)
+    real = (np.abs(t.imag) <= REAL_TOLERANCE) & (np.abs(t.real) <= 1 + REAL_TOLERANCE)
+    return np.clip(t.real[real], -1.0, 1.0)
+
+
+def chebyshev_roots(
+    evaluate, a: float, b: float, max_degree=MAX_DEGREE, refine_steps: int = 2
+):
+    """All roots of f on [a, b] from its Chebyshev interpolant
+
+    The roots of the interpolant are refined with Newton steps that use f
+    itself and the derivative of the interpolant. The cost depends on how
+    smooth f is, not on how many starting guesses are tried. Returns the
+    sorted roots and the interpolant degree; raises Unresolved when f cannot
+    be interpolated on [a, b].
+    """
+    coefficients, threshold = interpolate(evaluate, a, b, max_degree=max_degree)
+    t = interpolant_roots(coefficients, threshold)
+    roots = np.sort(to_interval(t, a, b))
+
+    derivative = C.chebder(coefficients) * 2 / (b - a)
+    for _ in range(refine_steps):
+        if len(roots) == 0:
+            break
+        f_x = np.asarray(evaluate(roots), dtype=float)
+        slope = C.chebval((2 * roots - a - b) / (b - a), derivative)
+        with np.errstate(all="ignore"):
+            refined = roots - f_x / slope
+        keep = np.isfinite(refined) & (refined >= a) & (refined <= b)
+        roots = np.where(keep, refined, roots)
+
+    return np.sort(roots), len(coefficients) - 1
+
+
+def enumerate_roots(
+    evaluate,
+    a: float,
+    b: float,
+    max_degree=PIECE_DEGREE,
+    min_width: float | None = None,
+    max_pieces=MAX_PIECES,
+):
+    """Roots of f over a wide range, piece by piece from left to right
+
+    [a, b] is halved until f is resolved on every piece by an interpolant of
+    degree at most `max_degree`, so the work adapts to where f oscillates.
+    Yields (lower, upper, roots) for each piece as soon as it is done, with
+    sorted roots that may repeat one found at the end of the previous piece.
+    A piece is skipped (roots None) when f is undefined on all of it, or
+    when it still cannot be resolved at `min_width` (default: a millionth
+    of the range), e.g. around a pole. Stops after `max_pieces` pieces.
+    """
+    if min_width is None:
+        min_width = (b - a) * MIN_WIDTH_FRACTION
+
+    pieces = 0
+    stack = [(a, b)]
+    while stack and pieces < max_pieces:
+        lower, upper = stack.pop()
+        pieces += 1
+        try:
+            roots, _ = chebyshev_roots(evaluate, lower, upper, max_degree)
+        except Undefined:
+            roots = None
+        except Unresolved:
+            if upper - lower > 2 * min_width:
+                middle = (lower + upper) / 2
+                # The left half is popped, and reported, first
+                stack.append((middle, upper))
+                stack.append((lower, middle))
+                continue
+            roots = None
+        yield lower, upper, roots
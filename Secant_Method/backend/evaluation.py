@@ -0,0 +1,58 @@
+import numpy as np
+
+
+class EvaluationBudgetExceeded(RuntimeError):
+    """Raised when a solve has used up its max_evaluations budget"""
+
+
+class Evaluations:
+    """Counts, memoizes and budgets the function evaluations of a single solve
+
+    Every function a solver calls goes through `wrap`, and all wrapped
+    functions share the counters. Scalar calls are memoized per function, so
+    asking for the same point twice costs one evaluation; repeats are
+    counted in `nfev_cached`. Array calls cost one evaluation per element
+    and are not memoized. Once `max_evaluations` evaluations have been
+    made, further calls raise EvaluationBudgetExceeded.
+    """
+
+    def __init__(self, max_evaluations: int | None = None):
+        self.max_evaluations = max_evaluations
+        self.nfev = 0
+        self.nfev_cached = 0
+        self.exhausted = False
+
+    def _charge(self, count: int):
+        if (
+            self.max_evaluations is not None
+            and self.nfev + count > self.max_evaluations
+        ):
+            self.exhausted = True
+            raise EvaluationBudgetExceeded(
+                f"Evaluation budget of {self.max_evaluations} exhausted"
+            )
+        self.nfev += count
+
+    def wrap(self, func):
+        """Return func routed through the counters, with its own memo"""
+        memo = {}
+
+        def evaluate(x):
+            if np.ndim(x) > 0:
+                self._charge(int(np.size(x)))
+                return func(x)
+
+            key = float(x)
+            if key in memo:
+                self.nfev_cached += 1
+                return memo[key]
+
+            self._charge(1)
+            value = func(x)
+            memo[key] = value
+            return value
+
+        return evaluate
+
+    def stats(self):
+        return {"nfev": self.nfev, "nfev_cached": self.nfev_cached}
@@ -0,0 +1,251 @@
+import ast
+import os
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+
+import numpy as np
+from numpy.polynomial import polynomial as P
+
+# Safe namespace with the mathematical functions available to user expressions
+math_namespace = {
+    # Basic math
+    "abs": abs,
+    "pow": pow,
+    "sqrt": np.sqrt,
+    # Trigonometric functions
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "asin": np.arcsin,
+    "acos": np.arccos,
+    "atan": np.arctan,
+    "sinh": np.sinh,
+    "cosh": np.cosh,
+    "tanh": np.tanh,
+    "asinh": np.arcsinh,
+    "acosh": np.arccosh,
+    "atanh": np.arctanh,
+    # Exponential and logarithmic functions
+    "exp": np.exp,
+    "log": np.log,
+    "log10": np.log10,
+    "log2": np.log2,
+    # Constants
+    "pi": np.pi,
+    "e": np.e,
+}
+
+# Builtins of compiled expressions: numpy's warnings (e.g. for log of a
+# negative number) import from the frame that raises them, which fails
+# with no builtins at all; validate_expression never lets a source name it
+BUILTINS = {"__import__": __import__}
+
+ALLOWED_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Call,
+    ast.Name,
+    ast.Constant,
+    ast.Load,
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.FloorDiv,
+    ast.Mod,
+    ast.Pow,
+    ast.USub,
+    ast.UAdd,
+)
+
+
+def validate_expression(tree):
+    """Check that an expression only uses arithmetic, x and names from math_namespace"""
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ValueError(f"Unsupported syntax in function: {type(node).__name__}")
+
+        if isinstance(node, ast.Name):
+            if node.id != "x" and node.id not in math_namespace:
+                raise ValueError(f"Unknown name in function: {node.id}")
+        elif isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(
+                node.value, (int, float, complex)
+            ):
+                raise ValueError(f"Unsupported constant in function: {node.value!r}")
+        elif isinstance(node, ast.Call) and node.keywords:
+            raise ValueError("Keyword arguments are not supported in function")
+
+
+def compile_expression(source):
+    """Validate and compile an expression in x once into a callable f(x)
+
+    The returned function is a regular Python function whose globals are the
+    math namespace, so calling it does not re-parse the source. Because the
+    namespace maps to numpy ufuncs, it also accepts numpy arrays for x.
+    """
+    try:
+        tree = ast.parse(source.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid function syntax: {e.msg}")
+
+    validate_expression(tree)
+
+    # Wrap the expression body in `lambda x: ...` and compile it a single time
+    lambda_node = ast.Expression(
+        body=ast.Lambda(
+            args=ast.arguments(
+                posonlyargs=[],
+                args=[ast.arg(arg="x")],
+                kwonlyargs=[],
+                kw_defaults=[],
+                defaults=[],
+            ),
+            body=tree.body,
+        )
+    )
+    ast.fix_missing_locations(lambda_node)
+    code = compile(lambda_node, "<function>", "eval")
+
+    return eval(code, {"__builtins__": BUILTINS, **math_namespace})
+
+
+# Polynomials of higher degree use the general search, their companion
+# matrix eigenvalues are too ill-conditioned to be useful
+MAX_POLYNOMIAL_DEGREE = 100
+
+
+def polynomial_terms(node):
+    """Coefficients (lowest degree first) of an expression node that is a polynomial in x
+
+    Raises ValueError for anything else: function calls, non-integer or
+    negative powers, division by a non-constant and complex constants.
+    """
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ValueError("Not a real constant")
+        return np.array([float(node.value)])
+
+    if isinstance(node, ast.Name):
+        if node.id == "x":
+            return np.array([0.0, 1.0])
+        if node.id in ("pi", "e"):
+            return np.array([float(math_namespace[node.id])])
+        raise ValueError(f"Not a polynomial: {node.id}")
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        operand = polynomial_terms(node.operand)
+        return -operand if isinstance(node.op, ast.USub) else operand
+
+    if isinstance(node, ast.BinOp):
+        left = polynomial_terms(node.left)
+        right = polynomial_terms(node.right)
+        if isinstance(node.op, ast.Add):
+            return P.polyadd(left, right)
+        if isinstance(node.op, ast.Sub):
+            return P.polysub(left, right)
+        if isinstance(node.op, ast.Mult):
+            return P.polymul(left, right)
+        if isinstance(node.op, ast.Div) and len(P.polytrim(right)) == 1:
+            if right[0] == 0:
+                raise ValueError("Division by zero")
+            return left / right[0]
+        if isinstance(node.op, ast.Pow) and len(P.polytrim(right)) == 1:
+            exponent = right[0]
+            if exponent == int(exponent) and 0 <= exponent <= MAX_POLYNOMIAL_DEGREE:
+                return P.polypow(left, int(exponent))
+
+    raise ValueError(f"Not a polynomial: {type(node).__name__}")
+
+
+@lru_cache(maxsize=int(os.getenv("EXPRESSION_CACHE_SIZE", "128")))
+def polynomial_coefficients(source):
+    """Real coefficients, highest degree first, if the function is a polynomial in x
+
+    Returns an empty tuple when it is not a polynomial of degree 1 to
+    MAX_POLYNOMIAL_DEGREE. Results are cached on the normalized source.
+    """
+    try:
+        tree = ast.parse(normalize_function(source), mode="eval")
+        terms = P.polytrim(polynomial_terms(tree.body))
+    except (SyntaxError, ValueError):
+        return ()
+    if not 1 < len(terms) <= MAX_POLYNOMIAL_DEGREE + 1 or not np.isfinite(terms).all():
+        return ()
+    return tuple(terms[::-1].tolist())
+
+
+def normalize_function(source):
+    """Normalize a function string so equivalent spellings share a cache entry"""
+    return " ".join(source.split())
+
+
+@lru_cache(maxsize=1024)
+def canonical_function(source):
+    """Canonical form of a function string for response cache keys
+
+    The dump of its syntax tree, so spellings that differ only in spacing
+    or redundant parentheses share a key. Sources that do not parse keep
+    their normalized string.
+    """
+    try:
+        return ast.dump(ast.parse(source.strip(), mode="eval"))
+    except SyntaxError:
+        return normalize_function(source)
+
+
+class ExpressionCache:
+    """Bounded LRU cache of compiled functions keyed on the normalized source"""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, source):
+        """Return the compiled function for a source string, compiling it on a miss"""
+        key = normalize_function(source)
+
+        with self._lock:
+            f = self._entries.get(key)
+            if f is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return f
+            self.misses += 1
+
+        f = compile_expression(key)
+
+        with self._lock:
+            if self.maxsize <= 0:
+                return f
+            self._entries[key] = f
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return f
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Process-wide cache shared by every request handled by this worker
+expression_cache = ExpressionCache(int(os.getenv("EXPRESSION_CACHE_SIZE", "128")))
@@ -0,0 +1,87 @@
+import math
+
+import numpy as np
+
+HISTORY_MODES = ("full", "summary", "every_n", "last_k")
+
+
+class History:
+    """Array-backed iteration history with one float64 column per field
+
+    Rows are appended into a preallocated 2-D array that doubles in size
+    when full, so recording an iteration allocates nothing per row. Rows are
+    only turned into dicts when the history is serialized.
+    """
+
+    def __init__(self, fields, int_fields=("iteration",), capacity: int = 16):
+        self.fields = tuple(fields)
+        self.int_fields = tuple(field for field in int_fields if field in self.fields)
+        self._data = np.empty((capacity, len(self.fields)))
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _reserve(self, size: int):
+        if size > len(self._data):
+            data = np.empty((max(size, 2 * len(self._data)), len(self.fields)))
+            data[: self._size] = self._data[: self._size]
+            self._data = data
+
+    def append(self, row):
+        """Append one row given as a sequence of values in field order"""
+        self._reserve(self._size + 1)
+        self._data[self._size] = row
+        self._size += 1
+
+    def array(self):
+        """View of the recorded rows as a (rows, fields) float64 array"""
+        return self._data[: self._size]
+
+    def column(self, field: str):
+        return self.array()[:, self.fields.index(field)]
+
+    def select(self, mode: str = "full", n: int = 10):
+        """Row indices kept by a history mode
+
+        - full: every row
+        - summary: first and last row
+        - every_n: every n-th row, always including the last one
+        - last_k: the last n rows
+        """
+        size = self._size
+        if mode == "full" or size == 0:
+            return np.arange(size)
+        if mode == "summary":
+            return np.unique([0, size - 1])
+        if mode == "every_n":
+            return np.unique(np.append(np.arange(0, size, max(n, 1)), size - 1))
+        if mode == "last_k":
+            return np.arange(max(size - max(n, 0), 0), size)
+        raise ValueError(
+            f"Unknown history mode '{mode}', expected one of {', '.join(HISTORY_MODES)}"
+        )
+
+    def to_columns(self, mode: str = "full", n: int = 10):
+        """Serialize the selected rows as {field: [values]}, non-finite values as None"""
+        data = self.array()[self.select(mode, n)]
+        columns = {}
+        for i, field in enumerate(self.fields):
+            values = data[:, i]
+            if field in self.int_fields:
+                columns[field] = values.astype(np.int64).tolist()
+            elif np.isfinite(values).all():
+                columns[field] = values.tolist()
+            else:
+                columns[field] = [
+                    value if math.isfinite(value) else None for value in values.tolist()
+                ]
+        return columns
+
+    def to_rows(self, mode: str = "full", n: int = 10):
+        """Serialize the selected rows as a list of dicts"""
+        columns = self.to_columns(mode, n)
+        return [
+            dict(zip(self.fields, values))
+            for values in zip(*(columns[field] for field in self.fields))
+        ]
@@ -1,7 +1,23 @@
-from fastapi import FastAPI
+import asyncio
+import json
+import time
+from typing import List, Literal, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-import numpy as np
-from secant import secant_method
+from chebyshev import MAX_PIECES, PIECE_DEGREE
+from evaluation import Evaluations
+from expression import (
+    canonical_function,
+    expression_cache,
+    normalize_function,
+    polynomial_coefficients,
+)
+from metrics import Metrics, PhaseTimer
+from response_cache import response_cache_from_env
+from secant import enumerate_events, secant_events, secant_method, secant_polynomial
+from worker_pool import group_jobs, pool_from_env
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI()
@@ -22,72 +38,492 @@ class SecantInput(BaseModel):
     x1: float
     tolerance: float = 1e-6
     max_iterations: int = 100
+    # Which iterations to return: all, first and last, every n-th, or last n
+    history: Literal["full", "summary", "every_n", "last_k"] = "full"
+    history_n: int = 10
+    # Stop the search once the function has been evaluated this many times
+    max_evaluations: Optional[int] = None
+    # Include per-phase timings (timings_ms) in the response
+    include_timings: bool = False
+    # Also return the complex roots when the function is a polynomial
+    include_complex: bool = False
 
 
-@app.post("/api/secant")
-def run_secant(data: SecantInput):
-    try:
-        # Create a safe namespace with mathematical functions
-        math_namespace = {
-            "x": None,  # Will be set dynamically
-            "np": np,
-            # Basic math
-            "abs": abs,
-            "pow": pow,
-            "sqrt": np.sqrt,
-            # Trigonometric functions
-            "sin": np.sin,
-            "cos": np.cos,
-            "tan": np.tan,
-            "asin": np.arcsin,
-            "acos": np.arccos,
-            "atan": np.arctan,
-            "sinh": np.sinh,
-            "cosh": np.cosh,
-            "tanh": np.tanh,
-            "asinh": np.arcsinh,
-            "acosh": np.arccosh,
-            "atanh": np.arctanh,
-            # Exponential and logarithmic functions
-            "exp": np.exp,
-            "log": np.log,
-            "log10": np.log10,
-            "log2": np.log2,
-            # Constants
-            "pi": np.pi,
-            "e": np.e,
-        }
+class SecantBatchInput(BaseModel):
+    problems: List[SecantInput]
+
+
+class SecantEnumerateInput(BaseModel):
+    function: str
+    lower: float
+    upper: float
+    tolerance: float = 1e-6
+    # Limits of the enumeration: largest interpolant degree per piece, most
+    # pieces, smallest piece width (default: a millionth of the range), most
+    # roots and most evaluations of the function
+    max_degree: int = PIECE_DEGREE
+    max_pieces: int = MAX_PIECES
+    min_width: Optional[float] = None
+    max_roots: Optional[int] = None
+    max_evaluations: Optional[int] = None
+
+
+def secant_task(
+    function,
+    x0,
+    x1,
+    tolerance,
+    max_iterations,
+    history="full",
+    history_n=10,
+    max_evaluations=None,
+    include_complex=False,
+):
+    """Run the secant search inside a pool worker
 
-        f = lambda x: eval(data.function, {**math_namespace, "x": x})
+    Polynomials take the "polynomial" path (all roots from one eigenvalue
+    solve), other functions the "multistart" secant search. The time spent
+    in each phase, in seconds, is returned under "timings".
+    """
+    timer = PhaseTimer()
+
+    # Compile the expression once (or reuse the cached compilation)
+    with timer.phase("compile"):
+        f = expression_cache.get(function)
+        coefficients = polynomial_coefficients(function)
+
+    # Count (and memoize) every evaluation the search makes
+    evaluations = Evaluations(max_evaluations)
+
+    solve_start = time.perf_counter()
+    complex_roots = None
+    if coefficients:
+        path = "polynomial"
+        result, iterations, error, iteration_data, complex_roots = secant_polynomial(
+            evaluations.wrap(f), coefficients, x0, x1, tolerance, max_iterations, timer
+        )
+    else:
+        path = "multistart"
         result, iterations, error, iteration_data = secant_method(
-            f, data.x0, data.x1, data.tolerance, data.max_iterations
+            evaluations.wrap(f), x0, x1, tolerance, max_iterations, timer
         )
+    solve_time = time.perf_counter() - solve_start
+    with timer.phase("history"):
+        iteration_data = iteration_data.to_rows(history, history_n)
+    compile_time = timer.timings["compile"]
+
+    # Handle multiple roots or single root
+    if isinstance(result, list):
+        response = {
+            "roots": result,
+            "root": result[0] if result else None,  # For backward compatibility
+            "multiple_roots": len(result) > 1,
+            "num_roots": len(result),
+            "iterations": iterations,
+            "error": error,
+            "data": iteration_data,
+            "success": len(result) > 0,
+        }
+    else:
+        response = {
+            "root": result,
+            "roots": [result] if result is not None else [],
+            "multiple_roots": False,
+            "num_roots": 1 if result is not None else 0,
+            "iterations": iterations,
+            "error": error,
+            "data": iteration_data,
+            "success": result is not None,
+        }
+
+    response.update(
+        {
+            "path": path,
+            "nfev": evaluations.nfev,
+            "nfev_cached": evaluations.nfev_cached,
+            "budget_exhausted": evaluations.exhausted,
+            "compile_time_ms": compile_time * 1000,
+            "solve_time_ms": solve_time * 1000,
+            "timings": timer.timings,
+        }
+    )
+    if include_complex:
+        response["complex_roots"] = [
+            {"real": z.real, "imag": z.imag}
+            for z in (complex_roots if complex_roots is not None else [])
+        ]
+    return response
+
+
+def secant_batch_task(groups):
+    """Run groups of secant problems that share a function inside a pool worker
+
+    `groups` is a list of (function, [(index, secant_task arguments), ...]).
+    Returns (index, result, error) for every problem.
+    """
+    results = []
+    for function, problems in groups:
+        try:
+            # Compile once for the whole group; later solves hit the cache
+            expression_cache.get(function)
+        except Exception as e:
+            results.extend((index, None, str(e)) for index, _ in problems)
+            continue
+
+        for index, args in problems:
+            try:
+                results.append((index, secant_task(function, *args), None))
+            except Exception as e:
+                results.append((index, None, str(e)))
+
+    return results
+
+
+def with_evaluation_counts(events, evaluations):
+    """Pass events through, adding the evaluation counts to the result event"""
+    for event in events:
+        if event["type"] == "result":
+            event["nfev"] = evaluations.nfev
+            event["nfev_cached"] = evaluations.nfev_cached
+            event["budget_exhausted"] = evaluations.exhausted
+        yield event
+
+
+def secant_events_task(
+    function, x0, x1, tolerance, max_iterations, max_evaluations=None
+):
+    """Stream the events of a secant search from inside a pool worker
+
+    Yields None first, once the function has compiled, so invalid
+    functions fail before any event.
+    """
+    f = expression_cache.get(function)
+    coefficients = polynomial_coefficients(function)
+    evaluations = Evaluations(max_evaluations)
+    yield None
+    yield from with_evaluation_counts(
+        secant_events(
+            evaluations.wrap(f), x0, x1, tolerance, max_iterations, coefficients
+        ),
+        evaluations,
+    )
+
+
+def enumerate_events_task(
+    function,
+    lower,
+    upper,
+    tolerance,
+    max_degree,
+    min_width,
+    max_pieces,
+    max_roots,
+    max_evaluations=None,
+):
+    """Stream the events of a root enumeration from inside a pool worker
+
+    Yields None first, once the function has compiled.
+    """
+    f = expression_cache.get(function)
+    evaluations = Evaluations(max_evaluations)
+    yield None
+    yield from with_evaluation_counts(
+        enumerate_events(
+            evaluations.wrap(f),
+            lower,
+            upper,
+            tolerance,
+            max_degree,
+            min_width,
+            max_pieces,
+            max_roots,
+        ),
+        evaluations,
+    )
+
+
+def worker_cache_stats():
+    """Expression cache statistics of the current worker"""
+    return expression_cache.stats()
+
+
+def finish_result(result, endpoint, queue_wait, include_timings=False):
+    """Record a worker result in the metrics and add queue_wait_ms (and timings_ms)"""
+    timings = result.pop("timings")
+    timings["queue_wait"] = queue_wait
+    metrics.inc("solves_total", endpoint=endpoint)
+    if not result["success"]:
+        metrics.inc("convergence_failures_total", endpoint=endpoint)
+    metrics.observe_phases(timings, endpoint=endpoint)
+
+    result["queue_wait_ms"] = queue_wait * 1000
+    if include_timings:
+        result["timings_ms"] = {
+            phase: seconds * 1000 for phase, seconds in timings.items()
+        }
+    return result
+
+
+# CPU-bound work runs in a process pool so the event loop stays responsive
+solver_pool = pool_from_env(stats_hook=worker_cache_stats)
+
+# Request metrics of this API process, exposed on /metrics
+metrics = Metrics("secant")
 
-        # Handle multiple roots or single root
-        if isinstance(result, list):
-            return {
-                "roots": result,
-                "root": result[0] if result else None,  # For backward compatibility
-                "multiple_roots": len(result) > 1,
-                "num_roots": len(result),
-                "iterations": iterations,
-                "error": error,
-                "data": iteration_data,
-                "success": len(result) > 0,
-            }
-        else:
-            return {
-                "root": result,
-                "roots": [result] if result is not None else [],
-                "multiple_roots": False,
-                "num_roots": 1 if result is not None else 0,
-                "iterations": iterations,
-                "error": error,
-                "data": iteration_data,
-                "success": result is not None,
-            }
+# Finished /api/secant responses of this API process, keyed on the input
+response_cache = response_cache_from_env()
+
+
+def secant_cache_key(data: SecantInput):
+    """Response cache key of an /api/secant input: the canonical function and every other field"""
+    params = data.model_dump(exclude={"function"})
+    return canonical_function(data.function), tuple(sorted(params.items()))
+
+
+@app.post("/api/secant")
+async def run_secant(data: SecantInput):
+    """Solve one problem; identical inputs are answered from the response cache
+
+    The response has "cached": true when it was reused from an earlier or
+    concurrent identical request.
+    """
+
+    async def compute():
+        result, queue_wait = await solver_pool.run(
+            secant_task,
+            data.function,
+            data.x0,
+            data.x1,
+            data.tolerance,
+            data.max_iterations,
+            data.history,
+            data.history_n,
+            data.max_evaluations,
+            data.include_complex,
+        )
+        return finish_result(result, "/api/secant", queue_wait, data.include_timings)
+
+    request_start = time.perf_counter()
+    try:
+        result, cached = await response_cache.get(secant_cache_key(data), compute)
+        return {**result, "cached": cached}
     except Exception as e:
+        metrics.inc("errors_total", endpoint="/api/secant")
         return {"error": str(e)}
+    finally:
+        metrics.observe(
+            "request_duration_seconds",
+            time.perf_counter() - request_start,
+            endpoint="/api/secant",
+        )
+
+
+@app.post("/api/secant/stream")
+async def run_secant_stream(data: SecantInput, request: Request):
+    """Stream iterations and roots as NDJSON, or SSE with Accept: text/event-stream
+
+    Events are {"type": "iteration" | "root" | "result" | "error", ...}.
+    Closing the connection stops the search. It runs in the solver pool, so
+    a full queue is reported as an error like on /api/secant.
+    """
+    sse = "text/event-stream" in request.headers.get("accept", "")
+
+    events = solver_pool.stream(
+        secant_events_task,
+        data.function,
+        data.x0,
+        data.x1,
+        data.tolerance,
+        data.max_iterations,
+        data.max_evaluations,
+    )
+    try:
+        # Wait for the job to start (its first item, None) so a full queue
+        # or an invalid function is still reported before streaming
+        await anext(events)
+    except Exception as e:
+        metrics.inc("errors_total", endpoint="/api/secant/stream")
+        return {"error": str(e)}
+
+    async def stream():
+        # Events come from a pool worker; closing the stream stops the job
+        try:
+            async for event in events:
+                if event["type"] == "result":
+                    metrics.inc("solves_total", endpoint="/api/secant/stream")
+                    if not event["success"]:
+                        metrics.inc(
+                            "convergence_failures_total",
+                            endpoint="/api/secant/stream",
+                        )
+                payload = json.dumps(event)
+                if sse:
+                    yield f"event: {event['type']}\ndata: {payload}\n\n"
+                else:
+                    yield payload + "\n"
+        except Exception as e:
+            metrics.inc("errors_total", endpoint="/api/secant/stream")
+            payload = json.dumps({"type": "error", "error": str(e)})
+            yield f"event: error\ndata: {payload}\n\n" if sse else payload + "\n"
+        finally:
+            await events.aclose()
+
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    return StreamingResponse(stream(), media_type=media_type)
+
+
+@app.post("/api/secant/enumerate")
+async def run_secant_enumerate(data: SecantEnumerateInput, request: Request):
+    """Stream every root in [lower, upper] as NDJSON, or SSE with Accept: text/event-stream
+
+    Unlike /api/secant, whose starting points cover a fixed range, the
+    interval is subdivided adaptively so ranges with thousands of roots
+    work. Events are {"type": "roots" | "skipped" | "result" | "error", ...}.
+    Closing the connection stops the enumeration. It runs in the solver
+    pool, so a full queue is reported as an error like on /api/secant.
+    """
+    sse = "text/event-stream" in request.headers.get("accept", "")
+
+    if not data.upper > data.lower:
+        return {"error": "upper must be greater than lower"}
+
+    events = solver_pool.stream(
+        enumerate_events_task,
+        data.function,
+        data.lower,
+        data.upper,
+        data.tolerance,
+        data.max_degree,
+        data.min_width,
+        data.max_pieces,
+        data.max_roots,
+        data.max_evaluations,
+    )
+    try:
+        # Wait for the job to start (its first item, None) so a full queue
+        # or an invalid function is still reported before streaming
+        await anext(events)
+    except Exception as e:
+        metrics.inc("errors_total", endpoint="/api/secant/enumerate")
+        return {"error": str(e)}
+
+    async def stream():
+        # Events come from a pool worker; closing the stream stops the job
+        try:
+            async for event in events:
+                if event["type"] == "result":
+                    metrics.inc("solves_total", endpoint="/api/secant/enumerate")
+                    if not event["success"]:
+                        metrics.inc(
+                            "convergence_failures_total",
+                            endpoint="/api/secant/enumerate",
+                        )
+                payload = json.dumps(event)
+                if sse:
+                    yield f"event: {event['type']}\ndata: {payload}\n\n"
+                else:
+                    yield payload + "\n"
+        except Exception as e:
+            metrics.inc("errors_total", endpoint="/api/secant/enumerate")
+            payload = json.dumps({"type": "error", "error": str(e)})
+            yield f"event: error\ndata: {payload}\n\n" if sse else payload + "\n"
+        finally:
+            await events.aclose()
+
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    return StreamingResponse(stream(), media_type=media_type)
+
+
+@app.post("/api/secant/batch")
+async def run_secant_batch(data: SecantBatchInput):
+    """Solve many secant problems in one request, returned in input order"""
+    problems = data.problems
+    keys = [normalize_function(problem.function) for problem in problems]
+    jobs = [
+        [
+            (
+                function,
+                [
+                    (
+                        index,
+                        (
+                            problems[index].x0,
+                            problems[index].x1,
+                            problems[index].tolerance,
+                            problems[index].max_iterations,
+                            problems[index].history,
+                            problems[index].history_n,
+                            problems[index].max_evaluations,
+                            problems[index].include_complex,
+                        ),
+                    )
+                    for index in indices
+                ],
+            )
+            for function, indices in job
+        ]
+        for job in group_jobs(keys, solver_pool.max_workers)
+    ]
+
+    outcomes = await asyncio.gather(
+        *(solver_pool.run(secant_batch_task, job) for job in jobs),
+        return_exceptions=True,
+    )
+
+    results = [None] * len(problems)
+    for job, outcome in zip(jobs, outcomes):
+        if isinstance(outcome, Exception):
+            # The whole job failed (e.g. queue full), report it on each problem
+            for _, group in job:
+                for index, _ in group:
+                    metrics.inc("errors_total", endpoint="/api/secant/batch")
+                    results[index] = {
+                        "index": index,
+                        "success": False,
+                        "error": str(outcome),
+                    }
+            continue
+
+        job_results, queue_wait = outcome
+        for index, result, error in job_results:
+            if error is None:
+                result = finish_result(
+                    result,
+                    "/api/secant/batch",
+                    queue_wait,
+                    problems[index].include_timings,
+                )
+                results[index] = {"index": index, "success": True, "result": result}
+            else:
+                metrics.inc("errors_total", endpoint="/api/secant/batch")
+                results[index] = {"index": index, "success": False, "error": error}
+
+    solved = sum(1 for result in results if result["success"])
+    return {"results": results, "solved": solved, "failed": len(results) - solved}
+
+
+@app.get("/api/cache")
+def get_cache_stats():
+    """Return expression cache statistics summed over the solver workers, and response cache statistics"""
+    return {**solver_pool.worker_stats(), "response_cache": response_cache.stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Solve counts, latency histograms and cache statistics in the Prometheus text format"""
+    stats = solver_pool.worker_stats()
+    gauges = {
+        f"expression_cache_{key}": value
+        for key, value in stats.items()
+        if key != "workers"
+    }
+    gauges["solver_workers"] = stats["workers"]
+    gauges["solver_pending_jobs"] = solver_pool.pending
+    for key, value in response_cache.stats().items():
+        gauges[f"response_cache_{key}"] = value
+    return PlainTextResponse(
+        metrics.render(gauges), media_type="text/plain; version=0.0.4"
+    )
 
 
 @app.get("/api/functions")
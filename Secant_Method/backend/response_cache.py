@@ -0,0 +1,86 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """LRU cache, with a time to live, of finished responses keyed on the request
+
+    Lives in the API process and is only used from the event loop, so it
+    needs no locks. Identical requests that arrive while the first one is
+    still being computed wait for that computation instead of starting their
+    own. The computation runs as its own task, so a waiting client that
+    disconnects does not cancel it for the others. Failed computations are
+    not cached.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    async def get(self, key, compute):
+        """Return (response, cached) for key, awaiting compute() on a miss
+
+        `cached` is True when the response comes from the cache or from an
+        identical request already in flight.
+        """
+        if self.maxsize <= 0:
+            self.misses += 1
+            return await compute(), False
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires, response = entry
+            if expires > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return response, True
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task), True
+
+        self.misses += 1
+        task = asyncio.ensure_future(compute())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task), False
+
+    def _finish(self, key, task):
+        del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, task.result())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+        }
+
+
+def response_cache_from_env():
+    """ResponseCache sized by RESPONSE_CACHE_SIZE (0 disables it) and RESPONSE_CACHE_TTL"""
+    return ResponseCache(
+        int(os.getenv("RESPONSE_CACHE_SIZE", "256")),
+        float(os.getenv("RESPONSE_CACHE_TTL", "300")),
+    )
@@ -1,110 +1,201 @@
+import bisect
+
 import numpy as np
 
+from chebyshev import MAX_PIECES, PIECE_DEGREE, enumerate_roots
+from evaluation import EvaluationBudgetExceeded
+from history import History
+from metrics import PhaseTimer
 
-def secant_method_single(f, x0, x1, tol=1e-6, max_iter=100):
-    """Find a single root using secant method"""
-    iteration_data = []
+ITERATION_FIELDS = ("iteration", "x0", "x1", "x2", "error")
+
+
+def record_steps(steps, history):
+    """Run a step generator to completion, appending every yielded row to history
+
+    Returns the generator's return value.
+    """
+    while True:
+        try:
+            history.append(next(steps))
+        except StopIteration as stop:
+            return stop.value
+
+
+def secant_steps(f, x0, x1, tol=1e-6, max_iter=100):
+    """Generator core of the secant method for a single pair of starting points
+
+    Yields each iteration as a row of ITERATION_FIELDS as soon as it is
+    computed and returns (root, iterations, error) when the iteration stops.
+    f(x1) is carried over as f(x0) of the next step, so each iteration costs
+    a single evaluation. EvaluationBudgetExceeded is passed on to the caller.
+    """
+    x2, error = None, None
+    f_x0 = None
 
     for i in range(max_iter):
         try:
-            f_x0 = f(x0)
+            if f_x0 is None:
+                f_x0 = f(x0)
             f_x1 = f(x1)
 
             # Check for invalid function values
             if not (np.isfinite(f_x0) and np.isfinite(f_x1)):
-                return None, i, None, iteration_data
+                return None, i, None
 
             if abs(f_x1 - f_x0) < 1e-15:  # Avoid division by zero
-                return None, i, None, iteration_data
+                return None, i, None
 
             x2 = x1 - f_x1 * (x1 - x0) / (f_x1 - f_x0)
 
             # Check if new x2 is valid
             if not np.isfinite(x2):
-                return None, i, None, iteration_data
+                return None, i, None
 
             error = abs(x2 - x1)
-            iteration_data.append(
-                {"iteration": i + 1, "x0": x0, "x1": x1, "x2": x2, "error": error}
-            )
+            yield i + 1, x0, x1, x2, error
 
             if error < tol:
-                return x2, i + 1, error, iteration_data
+                return x2, i + 1, error
 
             x0, x1 = x1, x2
+            f_x0 = f_x1
+        except EvaluationBudgetExceeded:
+            raise
         except Exception:
             # If any mathematical error occurs, return current state
-            return None, i, None, iteration_data
+            return None, i, None
 
-    return x2, max_iter, error, iteration_data
+    return x2, max_iter, error
 
 
-def is_duplicate_root(root, existing_roots, tolerance=1e-3):
-    """Check if a root is already in the list of existing roots"""
-    if root is None:
-        return True
-    for existing_root in existing_roots:
-        if abs(root - existing_root) < tolerance:
-            return True
-    return False
+def secant_method_single(f, x0, x1, tol=1e-6, max_iter=100):
+    """Find a single root using secant method"""
+    iteration_data = History(ITERATION_FIELDS)
+    root, iterations, error = record_steps(
+        secant_steps(f, x0, x1, tol, max_iter), iteration_data
+    )
+    return root, iterations, error, iteration_data
 
 
-def is_valid_root(f, root, tolerance=1e-6, x0=None, x1=None, max_distance=None):
-    """Verify that the root is actually a root by checking f(root) ≈ 0 and distance from starting points"""
-    if root is None:
-        return False
-    try:
-        # Check if function value is close to zero
-        f_value = f(root)
-        if not (np.isfinite(f_value) and abs(f_value) < tolerance):
-            return False
-
-        # Check distance from starting points if provided
-        if x0 is not None and x1 is not None and max_distance is not None:
-            center = (x0 + x1) / 2
-            search_radius = max(abs(x0 - x1), 1)
-            # For small starting ranges, allow broader search for trig functions
-            if search_radius < 2:
-                search_radius = max(search_radius * 3, 2)
-            allowed_distance = max_distance * search_radius
-            if abs(root - center) > allowed_distance:
-                return False
-
-        return True
-    except Exception:
-        return False
+def evaluate_array(f, x_values):
+    """Evaluate f on a numpy array in one call, NaN where the value is invalid"""
+    x_values = np.asarray(x_values, dtype=float)
 
+    with np.errstate(all="ignore"):
+        try:
+            y_values = np.asarray(f(x_values))
+            if np.iscomplexobj(y_values):
+                y_values = np.where(y_values.imag == 0, y_values.real, np.nan)
+            return np.broadcast_to(y_values, x_values.shape).astype(float)
+        except EvaluationBudgetExceeded:
+            raise
+        except Exception:
+            pass
 
-def secant_method(f, x0, x1, tol=1e-6, max_iter=100):
-    """Find multiple roots using secant method with different starting points"""
-    all_roots = []
-    all_iteration_data = []
+        # Fall back to one call per point for functions that cannot take arrays
+        y_values = np.full(x_values.shape, np.nan)
+        for i, x_val in enumerate(x_values.flat):
+            try:
+                y_values.flat[i] = float(f(float(x_val)))
+            except EvaluationBudgetExceeded:
+                raise
+            except Exception:
+                continue
+        return y_values
+
+
+def secant_batch_steps(f, x0_values, x1_values, tol=1e-6, max_iter=100):
+    """Run the secant method for many (x0, x1) pairs at once
+
+    Each pair is a lane of a numpy array and all lanes advance together.
+    Lanes stop independently once they converge or hit an invalid step, and
+    the function value of x1 is carried over as f(x0) of the next step.
+    After each step yields the indices of the lanes that converged with
+    their roots; lanes that run out of iterations are yielded last with
+    their final estimate.
+    """
+    active = np.arange(len(x0_values))
+    x0 = np.asarray(x0_values, dtype=float)
+    x1 = np.asarray(x1_values, dtype=float)
+    f_x0 = evaluate_array(f, x0)
+
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
 
-    # Calculate reasonable search bounds based on starting points
-    max_distance_factor = 8
+        f_x1 = evaluate_array(f, x1)
+
+        # Invalid function values or a flat secant end the lane
+        failed = ~np.isfinite(f_x0) | ~np.isfinite(f_x1) | (np.abs(f_x1 - f_x0) < 1e-15)
+        with np.errstate(all="ignore"):
+            x2 = x1 - f_x1 * (x1 - x0) / np.where(failed, 1.0, f_x1 - f_x0)
+        failed |= ~np.isfinite(x2)
+
+        error = np.abs(x2 - x1)
+        converged = ~failed & (error < tol)
+        if converged.any():
+            yield active[converged], x2[converged]
+
+        running = ~(converged | failed)
+        active = active[running]
+        x0, x1, f_x0 = x1[running], x2[running], f_x1[running]
+
+    # Lanes that ran out of iterations keep their last estimate
+    if active.size:
+        yield active, x1
+
+
+def secant_method_batch(f, x0_values, x1_values, tol=1e-6, max_iter=100):
+    """Return the final estimate of each (x0, x1) lane, NaN where the lane failed"""
+    roots = np.full(len(x0_values), np.nan)
+    for lanes, lane_roots in secant_batch_steps(f, x0_values, x1_values, tol, max_iter):
+        roots[lanes] = lane_roots
+    return roots
+
+
+def valid_root_mask(f, roots, tolerance=1e-6, x0=None, x1=None, max_distance=None):
+    """Verify candidate roots by checking f(root) ≈ 0 and distance from starting points"""
+    roots = np.asarray(roots, dtype=float)
+    f_values = evaluate_array(f, roots)
+    valid = np.isfinite(roots) & np.isfinite(f_values) & (np.abs(f_values) < tolerance)
+
+    # Check distance from starting points if provided
+    if x0 is not None and x1 is not None and max_distance is not None:
+        center = (x0 + x1) / 2
+        search_radius = max(abs(x0 - x1), 1)
+        # For small starting ranges, allow broader search for trig functions
+        if search_radius < 2:
+            search_radius = max(search_radius * 3, 2)
+        allowed_distance = max_distance * search_radius
+        with np.errstate(invalid="ignore"):
+            valid &= np.abs(roots - center) <= allowed_distance
+
+    return valid
+
+
+def unique_roots(roots, tolerance=1e-3):
+    """Group roots closer than tolerance and return the lane that found each group first
+
+    `roots` holds one candidate per lane (in search order). Returns the lane
+    indices of the distinct roots, ordered by the lane that found them.
+    """
+    lanes = np.flatnonzero(np.isfinite(roots))
+    if lanes.size == 0:
+        return lanes
+
+    order = lanes[np.argsort(roots[lanes], kind="stable")]
+    starts = np.flatnonzero(
+        np.concatenate(([True], np.diff(roots[order]) >= tolerance))
+    )
+    return np.sort(np.minimum.reduceat(order, starts))
 
-    # Try the original starting points first
-    try:
-        # Check if function values are valid at starting points
-        f_x0 = f(x0)
-        f_x1 = f(x1)
-        if not (np.isfinite(f_x0) and np.isfinite(f_x1)):
-            raise ValueError("Function values at starting points are not finite")
-
-        root, iterations, error, iteration_data = secant_method_single(
-            f, x0, x1, tol, max_iter
-        )
-        # Validate that the found root is actually a root and within reasonable distance
-        if (
-            root is not None
-            and is_valid_root(f, root, tol, x0, x1, max_distance_factor)
-            and not is_duplicate_root(root, all_roots)
-        ):
-            all_roots.append(root)
-            all_iteration_data.extend(iteration_data)
-    except Exception:
-        pass
 
+def start_pairs(x0, x1):
+    """Build the (x0, x1) starting pairs searched around the given points
+
+    The original pair is always the first lane.
+    """
     # Generate systematic starting point pairs to search for more roots
     # Use a more comprehensive search range for polynomials
     base_range = max(abs(x0), abs(x1), 3)
@@ -123,66 +214,270 @@ def secant_method(f, x0, x1, tol=1e-6, max_iter=100):
     start_points = np.concatenate([start_points, local_points])
     start_points = np.unique(start_points)  # Remove duplicates
 
-    for i in range(len(start_points) - 1):
-        # Allow finding up to 4 roots for polynomials (covers most practical cases)
-        if len(all_roots) >= 4:
-            break
+    # Pair every start point with its next two neighbours
+    i, j = np.triu_indices(len(start_points), k=1)
+    neighbours = j - i <= 2
+    x0_values = start_points[i[neighbours]]
+    x1_values = start_points[j[neighbours]]
 
-        for j in range(
-            i + 1, min(i + 3, len(start_points))
-        ):  # More combinations but still limited
-            x0_new = start_points[i]
-            x1_new = start_points[j]
+    # Skip if points are too close to each other
+    spread = np.abs(x0_values - x1_values) >= 0.05
+    x0_values = x0_values[spread]
+    x1_values = x1_values[spread]
 
-            # Skip if points are too close to each other
-            if abs(x0_new - x1_new) < 0.05:
-                continue
+    # The original starting points always run first
+    x0_values = np.concatenate(([x0], x0_values))
+    x1_values = np.concatenate(([x1], x1_values))
+    return x0_values, x1_values
 
-            # Skip if we've already tried very similar starting points
-            too_similar = False
-            for existing_root in all_roots:
-                if (
-                    abs(x0_new - existing_root) < 0.1
-                    and abs(x1_new - existing_root) < 0.1
-                ):
-                    too_similar = True
-                    break
-            if too_similar:
-                continue
 
-            try:
-                # Check if function values exist at these points
-                f_x0 = f(x0_new)
-                f_x1 = f(x1_new)
-                if not (np.isfinite(f_x0) and np.isfinite(f_x1)):
-                    continue
-
-                root, iterations, error, iteration_data = secant_method_single(
-                    f, x0_new, x1_new, tol, max_iter
+def secant_method(f, x0, x1, tol=1e-6, max_iter=100, timer=None):
+    """Find multiple roots using secant method with different starting points
+
+    If f raises EvaluationBudgetExceeded the search stops, and the roots
+    verified and iterations recorded up to that point are returned. The
+    multi-start search and the re-run that records the iterations of the
+    first roots are timed into `timer` as the search and trace phases.
+    """
+    timer = timer or PhaseTimer()
+
+    # Calculate reasonable search bounds based on starting points
+    max_distance_factor = 8
+
+    x0_values, x1_values = start_pairs(x0, x1)
+    roots = np.full(len(x0_values), np.nan)
+    all_iteration_data = History(ITERATION_FIELDS)
+    error = None
+
+    try:
+        # Validate that the found roots are actually roots and within
+        # reasonable distance as soon as their lanes finish
+        with timer.phase("search"):
+            for lanes, candidates in secant_batch_steps(
+                f, x0_values, x1_values, tol, max_iter
+            ):
+                valid = valid_root_mask(f, candidates, tol, x0, x1, max_distance_factor)
+                roots[lanes[valid]] = candidates[valid]
+            root_lanes = unique_roots(roots)
+
+        # Add iteration data for the first few roots found
+        with timer.phase("trace"):
+            for lane in root_lanes[:3]:
+                root, iterations, error = record_steps(
+                    secant_steps(f, x0_values[lane], x1_values[lane], tol, max_iter),
+                    all_iteration_data,
                 )
-                # Validate that the found root is actually a root and within reasonable distance
-                if (
-                    root is not None
-                    and is_valid_root(f, root, tol, x0, x1, max_distance_factor)
-                    and not is_duplicate_root(root, all_roots)
-                ):
-                    all_roots.append(root)
-                    # Add iteration data for the first few roots found
-                    if len(all_roots) <= 3:
-                        all_iteration_data.extend(iteration_data)
-            except Exception:
-                continue
+    except EvaluationBudgetExceeded:
+        root_lanes = unique_roots(roots)
+
+    all_roots = [float(roots[lane]) for lane in root_lanes]
 
     # Sort roots for consistent output
-    if all_roots:
-        all_roots.sort()
+    all_roots.sort()
+
+    return root_result(all_roots, error, all_iteration_data)
+
 
+def root_result(all_roots, error, iteration_data):
+    """Return (root or roots, iterations, error, iteration data) for sorted roots"""
     # If multiple roots found, return all of them
     if len(all_roots) > 1:
-        return all_roots, len(all_iteration_data), None, all_iteration_data
+        return all_roots, len(iteration_data), None, iteration_data
     elif len(all_roots) == 1:
         # If only one root found, return it in the original format
-        return all_roots[0], len(all_iteration_data), error, all_iteration_data
+        return all_roots[0], len(iteration_data), error, iteration_data
     else:
         # No roots found
-        return None, 0, None, []
+        return None, 0, None, History(ITERATION_FIELDS)
+
+
+def polish_roots(f, coefficients, roots, steps=2):
+    """Refine approximate roots of a polynomial with a few Newton steps, all at once
+
+    f(x) is evaluated through f, the derivative from the coefficients. A
+    root whose step is invalid keeps its previous value.
+    """
+    derivative = np.polyder(np.asarray(coefficients, dtype=float))
+    roots = np.asarray(roots, dtype=float)
+    for _ in range(steps):
+        f_x = evaluate_array(f, roots)
+        with np.errstate(all="ignore"):
+            polished = roots - f_x / np.polyval(derivative, roots)
+        roots = np.where(np.isfinite(polished), polished, roots)
+    return roots
+
+
+def polynomial_roots(f, coefficients, tol=1e-6):
+    """All real roots of a polynomial from one eigenvalue solve
+
+    np.roots computes the eigenvalues of the companion matrix. The real parts
+    of the (nearly) real eigenvalues are polished and kept if f(root) ≈ 0,
+    so a multiple root, whose eigenvalues split into a small cluster, still
+    comes out as one real root. Returns the sorted real roots and the
+    remaining complex eigenvalues.
+    """
+    eigenvalues = np.roots(coefficients)
+    nearly_real = np.abs(eigenvalues.imag) <= 1e-3 * np.maximum(
+        1.0, np.abs(eigenvalues)
+    )
+
+    candidates = polish_roots(f, coefficients, eigenvalues.real[nearly_real])
+    all_roots = []
+    for root in candidates[valid_root_mask(f, candidates, tol)].tolist():
+        insert_root(all_roots, root)
+    return all_roots, eigenvalues[~nearly_real]
+
+
+def secant_polynomial(f, coefficients, x0, x1, tol=1e-6, max_iter=100, timer=None):
+    """Polynomial fast path of secant_method: every real root from one eigenvalue solve
+
+    Returns the secant_method result plus the complex roots. The iteration
+    data is the secant run from the given starting points.
+    """
+    timer = timer or PhaseTimer()
+    all_roots, complex_roots = [], np.empty(0, dtype=complex)
+    iteration_data = History(ITERATION_FIELDS)
+    error = None
+
+    try:
+        with timer.phase("search"):
+            all_roots, complex_roots = polynomial_roots(f, coefficients, tol)
+        with timer.phase("trace"):
+            _, _, error = record_steps(
+                secant_steps(f, x0, x1, tol, max_iter), iteration_data
+            )
+    except EvaluationBudgetExceeded:
+        pass
+
+    return (*root_result(all_roots, error, iteration_data), complex_roots)
+
+
+def insert_root(roots, root, tolerance=1e-3):
+    """Insert root into the sorted list roots unless it is within tolerance of one already there"""
+    position = bisect.bisect_left(roots, root)
+    if position > 0 and root - roots[position - 1] < tolerance:
+        return False
+    if position < len(roots) and roots[position] - root < tolerance:
+        return False
+    roots.insert(position, root)
+    return True
+
+
+def secant_events(f, x0, x1, tol=1e-6, max_iter=100, coefficients=()):
+    """Generator version of secant_method that reports results as soon as they exist
+
+    Yields `iteration` events for the run from the original starting points,
+    a `root` event for each new valid root as soon as its lane converges and
+    a final `result` event with all roots found. When polynomial
+    `coefficients` are given the roots come from secant_polynomial's
+    eigenvalue solve instead of the multi-start search.
+    """
+    max_distance_factor = 8
+
+    iterations = 0
+    all_roots = []
+    try:
+        for row in secant_steps(f, x0, x1, tol, max_iter):
+            iterations += 1
+            yield {"type": "iteration", **dict(zip(ITERATION_FIELDS, row))}
+
+        if coefficients:
+            for root in polynomial_roots(f, coefficients, tol)[0]:
+                insert_root(all_roots, root)
+                yield {"type": "root", "root": root}
+        else:
+            x0_values, x1_values = start_pairs(x0, x1)
+            for _, candidates in secant_batch_steps(
+                f, x0_values, x1_values, tol, max_iter
+            ):
+                valid = valid_root_mask(f, candidates, tol, x0, x1, max_distance_factor)
+                for root in candidates[valid].tolist():
+                    if insert_root(all_roots, root):
+                        yield {"type": "root", "root": root}
+    except EvaluationBudgetExceeded:
+        # Stop searching; the roots found so far are still reported
+        pass
+
+    yield {
+        "type": "result",
+        "root": all_roots[0] if all_roots else None,
+        "roots": all_roots,
+        "multiple_roots": len(all_roots) > 1,
+        "num_roots": len(all_roots),
+        "iterations": iterations,
+        "success": len(all_roots) > 0,
+        "path": "polynomial" if coefficients else "multistart",
+    }
+
+
+def enumerate_events(
+    f,
+    lower,
+    upper,
+    tol=1e-6,
+    max_degree=PIECE_DEGREE,
+    min_width=None,
+    max_pieces=MAX_PIECES,
+    max_roots=None,
+):
+    """Generator of every root of f on [lower, upper], for ranges too wide for start_pairs
+
+    The range is subdivided adaptively (chebyshev.enumerate_roots) and a
+    `roots` event with the new valid roots of each piece is yielded as soon
+    as the piece is done, from left to right; pieces where f could not be
+    resolved are yielded as `skipped` events. Roots are inserted into a
+    sorted list with insert_root, so repeats at piece edges cost a bisection.
+    Stops at `max_pieces` pieces, `max_roots` roots or when f raises
+    EvaluationBudgetExceeded, then yields a final `result` event.
+    """
+    all_roots = []
+    pieces, skipped = 0, 0
+    covered = lower
+    truncated = False
+    try:
+        for piece_lower, piece_upper, roots in enumerate_roots(
+            lambda x: evaluate_array(f, x),
+            lower,
+            upper,
+            max_degree,
+            min_width,
+            max_pieces,
+        ):
+            pieces += 1
+            if roots is None:
+                skipped += 1
+                covered = piece_upper
+                yield {"type": "skipped", "lower": piece_lower, "upper": piece_upper}
+                continue
+
+            new_roots = []
+            for root in roots[valid_root_mask(f, roots, tol)].tolist():
+                if max_roots is not None and len(all_roots) >= max_roots:
+                    truncated = True
+                    break
+                if insert_root(all_roots, root):
+                    new_roots.append(root)
+            # A piece cut short by max_roots is covered up to its last root
+            covered = all_roots[-1] if truncated and all_roots else piece_upper
+            yield {
+                "type": "roots",
+                "lower": piece_lower,
+                "upper": piece_upper,
+                "roots": new_roots,
+            }
+            if truncated:
+                break
+    except EvaluationBudgetExceeded:
+        # Stop enumerating; the roots found so far have been reported
+        pass
+
+    yield {
+        "type": "result",
+        "num_roots": len(all_roots),
+        "complete": covered >= upper and not truncated,
+        "covered": covered,
+        "pieces": pieces,
+        "skipped_pieces": skipped,
+        "max_roots_reached": truncated,
+        "success": len(all_roots) > 0,
+    }
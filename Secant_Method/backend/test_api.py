@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_batch_results_in_input_order(client):
+    problems = [
+        {"function": "x**2 - 4", "x0": 1, "x1": 3},
+        {"function": "x +", "x0": 1, "x1": 2},
+        {"function": "cos(x) - x", "x0": 0, "x1": 1},
+        {"function": "x**2-4", "x0": -1, "x1": -3},
+    ]
+    response = client.post("/api/secant/batch", json={"problems": problems})
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["index"] for item in data["results"]] == [0, 1, 2, 3]
+    assert (data["solved"], data["failed"]) == (3, 1)
+    assert not data["results"][1]["success"]
+    assert "Invalid function syntax" in data["results"][1]["error"]
+    assert data["results"][0]["result"]["roots"] == pytest.approx([-2.0, 2.0])
+    assert data["results"][2]["result"]["root"] == pytest.approx(0.7390851, abs=1e-6)
+
+
+def test_stream_events(client):
+    response = client.post(
+        "/api/secant/stream", json={"function": "x**2 - 4", "x0": 1, "x1": 3}
+    )
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0]["type"] == "iteration"
+    assert events[-1]["type"] == "result"
+    assert events[-1]["roots"] == pytest.approx([-2.0, 2.0])
+    assert events[-1]["nfev"] > 0
+
+
+def test_stream_reports_invalid_functions_before_streaming(client):
+    response = client.post(
+        "/api/secant/stream", json={"function": "x +", "x0": 1, "x1": 2}
+    )
+    assert "Invalid function syntax" in response.json()["error"]
+
+
+def test_enumerate_stream(client):
+    response = client.post(
+        "/api/secant/enumerate", json={"function": "cos(x)", "lower": 0, "upper": 10}
+    )
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    result = events[-1]
+    assert result["type"] == "result"
+    assert (result["num_roots"], result["budget_exhausted"]) == (3, False)
+
+
+def test_enumerate_rejects_an_empty_range(client):
+    response = client.post(
+        "/api/secant/enumerate", json={"function": "cos(x)", "lower": 1, "upper": 0}
+    )
+    assert response.json() == {"error": "upper must be greater than lower"}
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from expression import ExpressionCache, compile_expression
+
+
+def test_compiled_function_takes_floats_and_arrays():
+    f = compile_expression("x**2 - 2*sin(x) + e")
+    assert f(0.0) == pytest.approx(np.e)
+    assert np.allclose(f(np.array([0.0, 1.0])), [np.e, 1 - 2 * np.sin(1) + np.e])
+
+
+@pytest.mark.parametrize(
+    "source",
+    ["np.save(np.binary_repr(5), x)", 'np.load("101.npy")', "np.cos(x) - x"],
+)
+def test_numpy_attributes_are_rejected(source):
+    with pytest.raises(ValueError, match="Unsupported syntax in function: Attribute"):
+        compile_expression(source)
+
+
+@pytest.mark.parametrize(
+    "source, message",
+    [
+        ('__import__("os")', "Unknown name in function: __import__"),
+        ("y + 1", "Unknown name in function: y"),
+        ("x.real", "Unsupported syntax in function: Attribute"),
+        ('"a"', "Unsupported constant in function"),
+        ("sin(x, out=x)", "Keyword arguments are not supported"),
+        ("lambda: 1", "Unsupported syntax in function: Lambda"),
+        ("x +", "Invalid function syntax"),
+    ],
+)
+def test_unsafe_or_invalid_sources_are_rejected(source, message):
+    with pytest.raises(ValueError, match=message):
+        compile_expression(source)
+
+
+def test_cache_shares_normalized_sources_and_evicts():
+    cache = ExpressionCache(2)
+    f = cache.get("x**2  -  2")
+    assert cache.get(" x**2 - 2 ") is f
+    cache.get("x - 1")
+    cache.get("x - 2")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 3)
+    assert (stats["size"], stats["evictions"]) == (2, 1)
+
+
+def test_invalid_sources_are_not_cached():
+    cache = ExpressionCache(2)
+    with pytest.raises(ValueError):
+        cache.get("x +")
+    assert cache.stats()["size"] == 0
+
+
+def test_numpy_warnings_do_not_break_evaluation():
+    f = compile_expression("log(x)")
+    with pytest.warns(RuntimeWarning):
+        values = f(np.array([-1.0, 1.0]))
+    assert np.isnan(values[0]) and values[1] == 0.0
@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+import pytest
+
+from evaluation import Evaluations
+from expression import compile_expression
+from secant import (
+    enumerate_events,
+    secant_method,
+    secant_method_batch,
+    start_pairs,
+    unique_roots,
+)
+
+
+def test_lanes_run_independently():
+    f = compile_expression("x**2 - 4")
+    roots = secant_method_batch(f, [1.0, -1.0, 1.0], [3.0, -3.0, 1.0])
+    assert roots[:2] == pytest.approx([2.0, -2.0])
+    # x0 == x1 gives a flat secant, which ends the lane
+    assert math.isnan(roots[2])
+
+
+def test_original_pair_runs_first():
+    x0_values, x1_values = start_pairs(1.0, 2.0)
+    assert (x0_values[0], x1_values[0]) == (1.0, 2.0)
+    assert len(x0_values) == len(x1_values) > 1
+
+
+def test_unique_roots_keeps_the_first_lane_of_each_group():
+    roots = np.array([2.0, np.nan, 2.0000001, -2.0])
+    assert unique_roots(roots).tolist() == [0, 3]
+
+
+def test_multistart_finds_sorted_distinct_roots():
+    roots, iterations, _, history = secant_method(
+        compile_expression("sin(x)"), 1.0, 2.0
+    )
+    assert roots == sorted(roots)
+    assert np.all(np.diff(roots) >= 1e-3)
+    for k in (-1, 0, 1):
+        assert min(abs(root - k * math.pi) for root in roots) < 1e-9
+    assert iterations == len(history) > 0
+
+
+def test_no_real_roots():
+    root, iterations, error, history = secant_method(
+        compile_expression("x**2 + 1"), 1.0, 2.0
+    )
+    assert (root, iterations, error, len(history)) == (None, 0, None, 0)
+
+
+def test_enumerate_skips_poles_and_reports_each_piece():
+    events = list(enumerate_events(compile_expression("tan(x)"), 0, 4))
+    roots = [
+        root for event in events if event["type"] == "roots" for root in event["roots"]
+    ]
+    assert roots == pytest.approx([0.0, math.pi], abs=1e-9)
+    assert [event["type"] for event in events].count("skipped") == 1
+    assert events[-1]["complete"]
+
+
+def test_enumerate_stops_at_max_roots_or_the_budget():
+    events = list(enumerate_events(compile_expression("sin(x)"), 0, 100, max_roots=3))
+    assert events[-1]["num_roots"] == 3
+    assert events[-1]["max_roots_reached"]
+    assert not events[-1]["complete"]
+
+    evaluations = Evaluations(2000)
+    f = evaluations.wrap(compile_expression("sin(50*x)"))
+    result = list(enumerate_events(f, -100, 100))[-1]
+    assert evaluations.exhausted
+    assert not result["complete"]
+    assert -100 < result["covered"] < 100
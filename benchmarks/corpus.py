@@ -0,0 +1,176 @@
+"""Fixed benchmark corpus shared by the bisection, Newton-Raphson and secant runs
+
+Expressions use the syntax accepted by all three backends (sympy for
+bisection and Newton-Raphson, the AST whitelist for the secant method).
+Every problem has a bracket with a sign change for the bracketing methods,
+an initial guess `x0` for Newton-Raphson and a starting pair for the
+secant method.
+"""
+
+CORPUS = [
+    # Examples listed by the secant /api/functions endpoint
+    {
+        "name": "quadratic",
+        "category": "example",
+        "expression": "x**2 - 4",
+        "bracket": (0.0, 3.0),
+        "x0": 1.0,
+        "secant": (1.0, 3.0),
+    },
+    {
+        "name": "sine",
+        "category": "example",
+        "expression": "sin(x) - 0.5",
+        "bracket": (0.0, 1.0),
+        "x0": 0.5,
+        "secant": (0.0, 1.0),
+    },
+    {
+        "name": "exponential",
+        "category": "example",
+        "expression": "exp(x) - 2",
+        "bracket": (0.0, 1.0),
+        "x0": 1.0,
+        "secant": (0.0, 1.0),
+    },
+    {
+        "name": "logarithm",
+        "category": "example",
+        "expression": "log(x) - 1",
+        "bracket": (1.0, 4.0),
+        "x0": 2.0,
+        "secant": (2.0, 3.0),
+    },
+    {
+        "name": "cubic",
+        "category": "example",
+        "expression": "x**3 - 2*x - 5",
+        "bracket": (2.0, 3.0),
+        "x0": 2.0,
+        "secant": (2.0, 3.0),
+    },
+    {
+        "name": "dottie",
+        "category": "example",
+        "expression": "cos(x) - x",
+        "bracket": (0.0, 1.0),
+        "x0": 0.5,
+        "secant": (0.0, 1.0),
+    },
+    {
+        "name": "tangent",
+        "category": "example",
+        "expression": "tan(x) - x",
+        "bracket": (4.4, 4.6),
+        "x0": 4.5,
+        "secant": (4.4, 4.6),
+    },
+    # Polynomials of rising degree
+    {
+        "name": "poly_deg5",
+        "category": "polynomial",
+        "expression": "x**5 - x - 1",
+        "bracket": (1.0, 2.0),
+        "x0": 1.5,
+        "secant": (1.0, 2.0),
+    },
+    {
+        "name": "poly_deg8",
+        "category": "polynomial",
+        "expression": "x**8 - 3*x**5 + x**2 - 7",
+        "bracket": (1.0, 2.0),
+        "x0": 1.5,
+        "secant": (1.0, 2.0),
+    },
+    {
+        "name": "poly_deg12",
+        "category": "polynomial",
+        "expression": "x**12 - 2*x**7 + 3*x - 100",
+        "bracket": (1.0, 2.0),
+        "x0": 1.5,
+        "secant": (1.0, 2.0),
+    },
+    {
+        "name": "poly_deg20",
+        "category": "polynomial",
+        "expression": "x**20 - 1000",
+        "bracket": (1.0, 2.0),
+        "x0": 1.5,
+        "secant": (1.0, 2.0),
+    },
+    # Transcendental
+    {
+        "name": "lambert",
+        "category": "transcendental",
+        "expression": "x*exp(x) - 1",
+        "bracket": (0.0, 1.0),
+        "x0": 1.0,
+        "secant": (0.0, 1.0),
+    },
+    {
+        "name": "exp_decay",
+        "category": "transcendental",
+        "expression": "exp(-x) - x",
+        "bracket": (0.0, 1.0),
+        "x0": 0.0,
+        "secant": (0.0, 1.0),
+    },
+    {
+        "name": "log_linear",
+        "category": "transcendental",
+        "expression": "log(x) + x",
+        "bracket": (0.1, 1.0),
+        "x0": 0.5,
+        "secant": (0.1, 1.0),
+    },
+    # Oscillatory
+    {
+        "name": "fast_sine",
+        "category": "oscillatory",
+        "expression": "sin(20*x) - 0.1",
+        "bracket": (0.0, 0.05),
+        "x0": 0.01,
+        "secant": (0.0, 0.05),
+    },
+    {
+        "name": "damped_cosine",
+        "category": "oscillatory",
+        "expression": "exp(-x/5)*cos(3*x) - 0.2",
+        "bracket": (0.0, 0.5),
+        "x0": 0.3,
+        "secant": (0.0, 0.5),
+    },
+    # Ill-conditioned: multiple roots, clustered roots and tiny slopes
+    {
+        "name": "triple_root",
+        "category": "ill_conditioned",
+        "expression": "(x - 1)**3",
+        "bracket": (0.0, 2.5),
+        "x0": 2.0,
+        "secant": (2.0, 2.5),
+    },
+    {
+        "name": "wilkinson7",
+        "category": "ill_conditioned",
+        "expression": "(x - 1)*(x - 2)*(x - 3)*(x - 4)*(x - 5)*(x - 6)*(x - 7)",
+        "bracket": (0.6, 1.7),
+        "x0": 0.5,
+        "secant": (0.5, 1.5),
+    },
+    {
+        "name": "flat_slope",
+        "category": "ill_conditioned",
+        "expression": "1e-8*(x - 3)",
+        "bracket": (0.0, 5.0),
+        "x0": 1.0,
+        "secant": (1.0, 2.0),
+    },
+    {
+        "name": "arctangent",
+        "category": "ill_conditioned",
+        "expression": "atan(x - 1)",
+        "bracket": (-2.0, 5.0),
+        "x0": 3.0,
+        "secant": (3.0, 4.0),
+    },
+]
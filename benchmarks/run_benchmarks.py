@@ -0,0 +1,490 @@
+"""Benchmark the bisection, Newton-Raphson and secant solvers on a fixed corpus
+
+Every corpus problem is solved by each solver entry point and the wall time
+(median and minimum over --repeat runs, after one warm-up run so parsing is
+served from the expression cache), iterations, function evaluations and
+roots found are written to JSON. Each backend runs in its own subprocess,
+since their helper modules share names.
+
+Startup is measured in fresh subprocesses too: `<backend>.import` is the
+time to import the backend's app module (`main`) and `<backend>.first_solve`
+the latency of the first solve in that process, which pays for parsing,
+compiling and any library imported on demand.
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --compare baseline.json
+
+With --compare the results are checked against a saved run: slower timings
+beyond --threshold, more iterations or evaluations, fewer roots and lost
+convergence are reported as regressions and the exit status is 1.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from corpus import CORPUS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BACKENDS = {
+    "bisection": os.path.join(ROOT, "Bisection_Method"),
+    "newton": os.path.join(ROOT, "NewtonRaphson_Method", "backend"),
+    "secant": os.path.join(ROOT, "Secant_Method", "backend"),
+}
+
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 100
+
+
+def bisection_cases(problem):
+    """(method, run) pairs for the bracketing methods
+
+    Each method also runs as `<method>.numpy` with the numpy-backed function
+    alone, to show what the math-backed scalar function saves.
+    """
+    from bisection import METHODS, parse_function
+    from evaluation import Evaluations
+
+    f = parse_function(problem["expression"])
+    a, b = problem["bracket"]
+
+    for name, method in METHODS.items():
+        for suffix, func in (("", f), (".numpy", f.vector)):
+
+            def run(method=method, func=func):
+                evaluations = Evaluations()
+                root, iterations, error, _ = method(
+                    evaluations.wrap(func), a, b, TOLERANCE, MAX_ITERATIONS
+                )
+                return {
+                    "iterations": iterations,
+                    "nfev": evaluations.nfev,
+                    "roots": [root],
+                    "converged": error < TOLERANCE
+                    or abs(float(func(root))) < TOLERANCE,
+                }
+
+            yield f"bisection.{name}{suffix}", run
+
+
+def newton_cases(problem):
+    """(method, run) pairs for a single Newton-Raphson run and the multi-root solve
+
+    The single run is repeated as `solve_single.numpy` with the numpy-backed
+    f and f' evaluator alone, to show what the math-backed scalar path saves.
+    """
+    from evaluation import Evaluations
+    from main import solver
+
+    compiled = solver.compile_equation(problem["expression"])
+    x0 = problem["x0"]
+
+    def run_single(f_and_prime=compiled.f_and_prime):
+        evaluations = Evaluations()
+        root, history, status = solver.solve_single(
+            evaluations.wrap(f_and_prime, cost=2),
+            x0,
+            TOLERANCE,
+            MAX_ITERATIONS,
+        )
+        return {
+            "iterations": len(history),
+            "nfev": evaluations.nfev,
+            "roots": [root] if root is not None else [],
+            "converged": status == "converged",
+        }
+
+    def run_single_numpy():
+        return run_single(compiled.f_and_prime.vector)
+
+    def run_solve():
+        result = solver.solve(problem["expression"], x0, TOLERANCE, MAX_ITERATIONS)
+        return {
+            "iterations": result["iterations_count"],
+            "nfev": result["nfev"],
+            "roots": result["roots"],
+            "converged": result["converged"],
+        }
+
+    yield "newton.solve_single", run_single
+    yield "newton.solve_single.numpy", run_single_numpy
+    yield "newton.solve", run_solve
+
+
+def secant_cases(problem):
+    """(method, run) pairs for a single secant run and the multi-root search"""
+    from evaluation import Evaluations
+    from expression import expression_cache
+    from secant import secant_method, secant_method_single
+
+    f = expression_cache.get(problem["expression"])
+    x0, x1 = problem["secant"]
+
+    def run_single():
+        evaluations = Evaluations()
+        root, iterations, error, _ = secant_method_single(
+            evaluations.wrap(f), x0, x1, TOLERANCE, MAX_ITERATIONS
+        )
+        return {
+            "iterations": iterations,
+            "nfev": evaluations.nfev,
+            "roots": [root] if root is not None else [],
+            "converged": root is not None and error is not None and error < TOLERANCE,
+        }
+
+    def run_search():
+        evaluations = Evaluations()
+        result, iterations, _, _ = secant_method(
+            evaluations.wrap(f), x0, x1, TOLERANCE, MAX_ITERATIONS
+        )
+        if isinstance(result, list):
+            roots = result
+        else:
+            roots = [result] if result is not None else []
+        return {
+            "iterations": iterations,
+            "nfev": evaluations.nfev,
+            "roots": roots,
+            "converged": len(roots) > 0,
+        }
+
+    yield "secant.secant_method_single", run_single
+    yield "secant.secant_method", run_search
+
+
+CASES = {
+    "bisection": bisection_cases,
+    "newton": newton_cases,
+    "secant": secant_cases,
+}
+
+
+def bisection_first_solve(problem):
+    from bisection import bisection_task
+
+    a, b = problem["bracket"]
+    result = bisection_task(problem["expression"], a, b, TOLERANCE, MAX_ITERATIONS)
+    return {
+        "iterations": result["iterations"],
+        "nfev": result["evaluations"]["nfev"],
+        "roots": [result["root"]],
+        "converged": result["converged"],
+    }
+
+
+def newton_first_solve(problem):
+    from main import solve_task
+
+    result = solve_task(problem["expression"], problem["x0"], TOLERANCE, MAX_ITERATIONS)
+    return {
+        "iterations": result["iterations_count"],
+        "nfev": result["nfev"],
+        "roots": result["roots"],
+        "converged": result["converged"],
+    }
+
+
+def secant_first_solve(problem):
+    from main import secant_task
+
+    x0, x1 = problem["secant"]
+    result = secant_task(problem["expression"], x0, x1, TOLERANCE, MAX_ITERATIONS)
+    return {
+        "iterations": result["iterations"],
+        "nfev": result["nfev"],
+        "roots": result["roots"],
+        "converged": result["success"],
+    }
+
+
+# The work a solver worker does for a request, run as a process's first solve
+FIRST_SOLVE = {
+    "bisection": bisection_first_solve,
+    "newton": newton_first_solve,
+    "secant": secant_first_solve,
+}
+
+# Problem of the first solve in the startup measurements
+STARTUP_PROBLEM = CORPUS[0]
+
+
+def finite_or_none(value):
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def measure(run, repeat):
+    """Run once to warm up, then time `repeat` runs; returns the last outcome and the times"""
+    outcome = run()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outcome = run()
+        times.append(time.perf_counter() - start)
+    return outcome, times
+
+
+def run_backend(backend, repeat):
+    """Benchmark every corpus problem on one backend (runs inside its subprocess)"""
+    results = []
+    for problem in CORPUS:
+        base = {"problem": problem["name"], "category": problem["category"]}
+        try:
+            cases = list(CASES[backend](problem))
+        except Exception as e:
+            results.append({**base, "method": backend, "error": str(e)})
+            continue
+
+        for method, run in cases:
+            try:
+                outcome, times = measure(run, repeat)
+            except Exception as e:
+                results.append({**base, "method": method, "error": str(e)})
+                continue
+            results.append(
+                {
+                    **base,
+                    "method": method,
+                    "time_ms": statistics.median(times) * 1000,
+                    "time_min_ms": min(times) * 1000,
+                    "iterations": int(outcome["iterations"]),
+                    "nfev": int(outcome["nfev"]),
+                    "roots": [finite_or_none(root) for root in outcome["roots"]],
+                    "converged": bool(outcome["converged"]),
+                }
+            )
+    return results
+
+
+def measure_startup(backend):
+    """Import time of the app module and first solve time (runs in a fresh subprocess)"""
+    try:
+        start = time.perf_counter()
+        import main  # noqa: F401
+
+        import_time = time.perf_counter() - start
+        start = time.perf_counter()
+        outcome = FIRST_SOLVE[backend](STARTUP_PROBLEM)
+        first_solve_time = time.perf_counter() - start
+    except Exception as e:
+        return {"error": str(e)}
+    return {"import": import_time, "first_solve": first_solve_time, "outcome": outcome}
+
+
+def run_startup(backend, python, repeat):
+    """Startup results of one backend, each of the `repeat` runs in a new process"""
+    base = {"problem": STARTUP_PROBLEM["name"], "category": "startup"}
+    runs = [run_child(backend, python, "--startup") for _ in range(repeat)]
+    failed = [run for run in runs if "error" in run]
+    if failed:
+        return [
+            {**base, "method": f"{backend}.{phase}", "error": failed[0]["error"]}
+            for phase in ("import", "first_solve")
+        ]
+
+    results = []
+    for phase in ("import", "first_solve"):
+        times = [run[phase] for run in runs]
+        outcome = runs[-1]["outcome"]
+        if phase == "import":
+            outcome = {"iterations": 0, "nfev": 0, "roots": [], "converged": True}
+        results.append(
+            {
+                **base,
+                "method": f"{backend}.{phase}",
+                "time_ms": statistics.median(times) * 1000,
+                "time_min_ms": min(times) * 1000,
+                "iterations": int(outcome["iterations"]),
+                "nfev": int(outcome["nfev"]),
+                "roots": [finite_or_none(root) for root in outcome["roots"]],
+                "converged": bool(outcome["converged"]),
+            }
+        )
+    return results
+
+
+def run_subprocess(backend, python, repeat):
+    """Run one backend's benchmarks in a child process with the backend on sys.path"""
+    return run_child(backend, python, "--repeat", str(repeat))
+
+
+def run_child(backend, python, *args):
+    """Run this script for one backend in a child process and return its JSON output"""
+    env = dict(os.environ, PYTHONPATH=BACKENDS[backend], SOLVER_WORKERS="0")
+    completed = subprocess.run(
+        [
+            python,
+            os.path.abspath(__file__),
+            "--backend",
+            backend,
+            *args,
+        ],
+        cwd=BACKENDS[backend],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{backend} benchmarks failed:\n{completed.stderr.strip()}")
+    return json.loads(completed.stdout)
+
+
+def result_key(result):
+    return result["method"], result["problem"]
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Return a list of regression messages of results against a baseline run"""
+    previous = {result_key(result): result for result in baseline["results"]}
+    regressions = []
+
+    for result in results:
+        key = result_key(result)
+        label = f"{key[0]} / {key[1]}"
+        old = previous.get(key)
+        if old is None:
+            continue
+        if "error" in result:
+            if "error" not in old:
+                regressions.append(f"{label}: now fails ({result['error']})")
+            continue
+        if "error" in old:
+            continue
+
+        delta = result["time_ms"] - old["time_ms"]
+        if delta > min_delta_ms and result["time_ms"] > old["time_ms"] * (
+            1 + threshold
+        ):
+            regressions.append(
+                f"{label}: {old['time_ms']:.3f} -> {result['time_ms']:.3f} ms"
+                f" (+{delta / old['time_ms'] * 100:.0f}%)"
+            )
+        for field in ("iterations", "nfev"):
+            if result[field] > old[field]:
+                regressions.append(f"{label}: {field} {old[field]} -> {result[field]}")
+        if len(result["roots"]) < len(old["roots"]):
+            regressions.append(
+                f"{label}: roots found {len(old['roots'])} -> {len(result['roots'])}"
+            )
+        if old["converged"] and not result["converged"]:
+            regressions.append(f"{label}: no longer converges")
+
+    return regressions
+
+
+def print_table(results):
+    print(
+        f"{'method':<30} {'problem':<15} {'ms':>9} {'iter':>5} {'nfev':>6} {'roots':>5}"
+    )
+    for result in results:
+        if "error" in result:
+            print(
+                f"{result['method']:<30} {result['problem']:<15} error: {result['error']}"
+            )
+            continue
+        print(
+            f"{result['method']:<30} {result['problem']:<15}"
+            f" {result['time_ms']:>9.3f} {result['iterations']:>5}"
+            f" {result['nfev']:>6} {len(result['roots']):>5}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--output", help="Write the results to this JSON file (default: stdout table)"
+    )
+    parser.add_argument(
+        "--compare", help="Baseline JSON file from an earlier run to compare against"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Relative slowdown reported as a regression (default: 0.25)",
+    )
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=0.05,
+        help="Ignore slowdowns smaller than this many milliseconds (default: 0.05)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Timed runs per case (default: 5)"
+    )
+    parser.add_argument(
+        "--methods",
+        nargs="+",
+        choices=sorted(BACKENDS),
+        default=sorted(BACKENDS),
+        help="Backends to benchmark (default: all)",
+    )
+    parser.add_argument(
+        "--python",
+        default=sys.executable,
+        help="Interpreter with the backend dependencies installed",
+    )
+    parser.add_argument(
+        "--no-startup",
+        action="store_true",
+        help="Skip the import and first solve measurements",
+    )
+    parser.add_argument("--backend", choices=sorted(BACKENDS), help=argparse.SUPPRESS)
+    parser.add_argument("--startup", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend and args.startup:
+        # Fresh child process: time the startup of a single backend
+        json.dump(measure_startup(args.backend), sys.stdout)
+        return 0
+    if args.backend:
+        # Child process: benchmark a single backend and report on stdout
+        json.dump(run_backend(args.backend, args.repeat), sys.stdout)
+        return 0
+
+    results = []
+    for backend in args.methods:
+        if not args.no_startup:
+            results.extend(run_startup(backend, args.python, args.repeat))
+        results.extend(run_subprocess(backend, args.python, args.repeat))
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "tolerance": TOLERANCE,
+            "max_iterations": MAX_ITERATIONS,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    print_table(results)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print(f"\nNo regressions against {args.compare}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import sys
+
+import pytest
+
+from corpus import CORPUS
+from run_benchmarks import BACKENDS, compare, run_child, run_subprocess
+
+
+def result(**fields):
+    return {
+        "method": "newton.solve",
+        "problem": "quadratic",
+        "time_ms": 1.0,
+        "iterations": 5,
+        "nfev": 10,
+        "roots": [2.0],
+        "converged": True,
+        **fields,
+    }
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_every_problem_runs_on_every_backend(backend):
+    results = run_subprocess(backend, sys.executable, 1)
+    assert [r for r in results if "error" in r] == []
+    assert {r["problem"] for r in results} == {p["name"] for p in CORPUS}
+    assert all(r["time_ms"] >= r["time_min_ms"] > 0 for r in results)
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_startup_is_measured_in_a_fresh_process(backend):
+    startup = run_child(backend, sys.executable, "--startup")
+    assert "error" not in startup
+    assert startup["import"] > 0
+    assert startup["outcome"]["converged"]
+
+
+def test_unchanged_results_are_not_regressions():
+    baseline = {"results": [result()]}
+    assert compare([result(time_ms=1.04)], baseline, 0.1, 0.05) == []
+
+
+def test_regressions_are_reported():
+    baseline = {"results": [result()]}
+    regressions = compare(
+        [result(time_ms=2.0, nfev=12, roots=[], converged=False)],
+        baseline,
+        0.1,
+        0.05,
+    )
+    assert regressions == [
+        "newton.solve / quadratic: 1.000 -> 2.000 ms (+100%)",
+        "newton.solve / quadratic: nfev 10 -> 12",
+        "newton.solve / quadratic: roots found 1 -> 0",
+        "newton.solve / quadratic: no longer converges",
+    ]
+
+
+def test_small_slowdowns_and_new_entries_are_ignored():
+    baseline = {"results": [result(time_ms=0.01)]}
+    fast = result(time_ms=0.03)
+    new = result(problem="sine", time_ms=100.0)
+    assert compare([fast, new], baseline, 0.1, 0.05) == []
+
+
+def test_new_failures_are_regressions():
+    baseline = {"results": [result()]}
+    assert compare([result(error="boom")], baseline, 0.1, 0.05) == [
+        "newton.solve / quadratic: now fails (boom)"
+    ]